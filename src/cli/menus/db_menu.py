@@ -125,6 +125,7 @@ def _clear_query_cache(cli_instance: 'ScraperCLI') -> None:
         
         print(f"{Fore.YELLOW}1.{Style.RESET_ALL} Svuota tutta la cache")
         print(f"{Fore.YELLOW}2.{Style.RESET_ALL} Svuota cache per database specifico")
+        print(f"{Fore.YELLOW}3.{Style.RESET_ALL} Svuota cache delle pagine scaricate")
         print(f"\n{Fore.YELLOW}0.{Style.RESET_ALL} Torna al menu precedente")
         
         choice = prompt_for_input("Scelta: ").strip()
@@ -157,6 +158,15 @@ def _clear_query_cache(cli_instance: 'ScraperCLI') -> None:
             except Exception as e:
                 print(f"{Fore.RED}✗ Errore pulizia cache: {e}{Style.RESET_ALL}")
             input(f"\n{Fore.CYAN}Premi INVIO per continuare...{Style.RESET_ALL}")
+
+        elif choice == "3":
+            try:
+                cache_stats = cli_instance.web_fetcher.get_cache_stats()
+                cli_instance.web_fetcher.clear_cache()
+                print(f"{Fore.YELLOW}✓ Cache delle pagine svuotata ({cache_stats.get('entries', 0)} voci, {cache_stats.get('size_bytes', 0) / 1024:.1f} KB){Style.RESET_ALL}")
+            except Exception as e:
+                print(f"{Fore.RED}✗ Errore pulizia cache: {e}{Style.RESET_ALL}")
+            input(f"\n{Fore.CYAN}Premi INVIO per continuare...{Style.RESET_ALL}")
             
         elif choice == "0":
             break
@@ -8,7 +8,7 @@ from urllib.parse import urlparse
 import time
 import logging
 import validators
-from ..utils import clear_screen, prompt_for_input
+from ..utils import clear_screen, prompt_for_input, prompt_crawl_budget, describe_budget_hit
 import json
 
 if TYPE_CHECKING: # Serve a evitare errori di importazione circolare
@@ -28,7 +28,9 @@ def display_download_menu() -> str:
     print(f"{'═' * 40}{Style.RESET_ALL}")
     print(f"{Fore.YELLOW}1.{Style.RESET_ALL} Downlod singola pagina web (HTML + Struttura)")
     print(f"{Fore.YELLOW}2.{Style.RESET_ALL} Download multiplo da file (HTML + Struttura)")
-    print(f"{Fore.YELLOW}3.{Style.RESET_ALL} Crawl e download struttura sito web\n")
+    print(f"{Fore.YELLOW}3.{Style.RESET_ALL} Crawl e download struttura sito web")
+    print(f"{Fore.YELLOW}4.{Style.RESET_ALL} Riprendi un crawl interrotto")
+    print(f"{Fore.YELLOW}5.{Style.RESET_ALL} Crawl multi-dominio da file di seed\n")
     print(f"{Fore.YELLOW}0.{Style.RESET_ALL} Torna al menu principale")
 
     return prompt_for_input("Scelta: ")
@@ -45,6 +47,8 @@ def handle_download_choice(cli_instance: 'ScraperCLI', choice: str) -> None:
         case "1": download_single_url(cli_instance)
         case "2": download_multiple_urls(cli_instance)
         case "3": start_website_crawl_base(cli_instance)
+        case "4": resume_interrupted_crawl(cli_instance)
+        case "5": start_multi_domain_crawl(cli_instance)
         case "0": return
         case _:
             print(f"{Fore.RED}✗ Scelta non valida")
@@ -122,37 +126,48 @@ def download_multiple_urls(cli_instance: 'ScraperCLI') -> None:
         report_lines = [f"Report di Download Batch - {timestamp}\nTotal URLs: {len(urls)}\n"]
         success_count = 0
 
-        for i, url in enumerate(urls, 1): # enumerate inizia da 1 e conta gli URL
-            parsed = urlparse(url)
-            if not parsed.scheme:
-                url = "https://" + url
-            print(f"{Fore.CYAN}[{i}/{len(urls)}] Scaricando: {url}...{Style.RESET_ALL}")
+        # Normalizza gli URL: aggiungi https:// se manca lo schema
+        urls = [url if urlparse(url).scheme else "https://" + url for url in urls]
+        url_reports: list[str] = [""] * len(urls) # report nell'ordine del file, anche se i download terminano in ordine sparso
+
+        def _save_result(index: int, url: str, response) -> None:
+            # Chiamata dal fetcher asincrono appena il download di un URL termina
+            nonlocal success_count
+            i = index + 1 # numerazione da 1 come nel file
             try:
-                content = cli_instance.web_fetcher.fetch(url)
+                content = None
+                if response and response.content:
+                    content = response.content.decode(response.encoding if response.encoding else 'utf-8', errors='replace')
                 if content:
                     domain = urlparse(url).netloc or f"url_{i}" # netloc riesce a ottenere il dominio eseguendo un parse dell'URL 
                     file_name = f"{domain.replace('.', '_')}_{i}.html"
                     file_save_path = batch_download_dir / file_name
                     with open(file_save_path, "w", encoding="utf-8") as cf:
                         cf.write(content)
-                    report_lines.append(f"[SUCCESS] {url} -> Salvato in {file_save_path} ({len(content)} bytes)")
+                    url_reports[index] = f"[SUCCESS] {url} -> Salvato in {file_save_path} ({len(content)} bytes)"
                     success_count += 1
-                    print(f"{Fore.YELLOW}✓ Successo.{Style.RESET_ALL}")
+                    print(f"{Fore.YELLOW}[{i}/{len(urls)}] ✓ {url}{Style.RESET_ALL}")
                 else:
-                    report_lines.append(f"[FAILED] {url} -> Nessun contenuto o errore download.")
-                    print(f"{Fore.RED}✗ Fallito (nessun contenuto).{Style.RESET_ALL}")
-            except KeyboardInterrupt:
-                print(f"\n{Fore.YELLOW}Operazione annullata dall'utente durante il download multiplo.{Style.RESET_ALL}")
-                break
+                    url_reports[index] = f"[FAILED] {url} -> Nessun contenuto o errore download."
+                    print(f"{Fore.RED}[{i}/{len(urls)}] ✗ {url} (nessun contenuto){Style.RESET_ALL}")
             except Exception as e_multi:
                 logger.error(f"Error downloading {url} in batch: {e_multi}", exc_info=True)
-                report_lines.append(f"[ERROR] {url} -> {e_multi}")
-                print(f"{Fore.RED}✗ Errore: {e_multi}{Style.RESET_ALL}")
-            time.sleep(0.5) # evito scovraccarico
+                url_reports[index] = f"[ERROR] {url} -> {e_multi}"
+                print(f"{Fore.RED}[{i}/{len(urls)}] ✗ {url}: {e_multi}{Style.RESET_ALL}")
+
+        # Download in parallelo, con limiti di concorrenza globali e per host
+        cli_instance.async_fetcher.fetch_many_blocking(urls, on_result=_save_result)
+        report_lines.extend(line for line in url_reports if line)
 
         report_lines.insert(2, f"Completati con successo: {success_count}")
         report_lines.insert(3, f"Falliti/Errori: {len(urls) - success_count}\n")
 
+        conn_stats = cli_instance.web_fetcher.get_connection_stats()
+        report_lines.append(
+            f"\nConnessioni: {conn_stats['new_connections']} nuove, "
+            f"{conn_stats['reused_connections']} riutilizzate su {conn_stats['requests']} richieste"
+        )
+
         report_file_path = cli_instance.dirs["reports"] / f"report_batch_{timestamp}.txt"
         with open(report_file_path, "w", encoding="utf-8") as rf:
             rf.write("\n".join(report_lines))
@@ -187,6 +202,9 @@ def start_website_crawl_base(cli_instance: 'ScraperCLI') -> None:
     depth = cli_instance._get_depth_input(default=2, message="Inserisci il limite di profondità per il crawling (default: 2): ")
     if depth is None:
         return
+    use_sitemaps = prompt_for_input("Accodare anche le pagine elencate nelle sitemap del sito? (s/n, default: n): ").lower() == "s"
+    incremental = prompt_for_input("Crawl incrementale (riscarica solo le pagine nuove o modificate)? (s/n, default: n): ").lower() == "s"
+    budget = prompt_crawl_budget()
 
     # Imposta i livelli di logging per vedere solo le informazioni importanti durante il crawling
     original_crawler_level = crawler_logger.level
@@ -220,10 +238,13 @@ def start_website_crawl_base(cli_instance: 'ScraperCLI') -> None:
                 depth_limit=depth,
                 politeness_delay=1.0,
                 perform_osint_on_pages=False,
-                save_to_disk=True  # Modalità download
+                save_to_disk=True,  # Modalità download
+                seed_from_sitemaps=use_sitemaps,
+                incremental=incremental,
+                **budget
             )
         except KeyboardInterrupt:
-            print(f"\n{Fore.YELLOW}Crawling annullato dall'utente.{Style.RESET_ALL}")
+            print(f"\n{Fore.YELLOW}Crawling annullato dall'utente (riprendibile dal menu \"Riprendi un crawl interrotto\").{Style.RESET_ALL}")
             return
         
         # Ripristina l'osint_extractor originale del crawler per operazioni future
@@ -242,6 +263,111 @@ def start_website_crawl_base(cli_instance: 'ScraperCLI') -> None:
         db_logger.setLevel(original_db_level)
 
 
+def start_multi_domain_crawl(cli_instance: 'ScraperCLI') -> None:
+    '''
+    Esegue in un'unica sessione il crawling in modalità download di tutti i siti elencati in un file di seed
+    (un URL per riga), con politeness, robots.txt, budget e statistiche per dominio.
+    '''
+    print(f"\n{Fore.BLUE}{'═' * 40}")
+    print(f"█ {Fore.WHITE}{'CRAWL MULTI-DOMINIO':^36}{Fore.BLUE} █")
+    print(f"{'═' * 40}{Style.RESET_ALL}\n")
+
+    seeds_path = Path(prompt_for_input("Inserisci il percorso del file con gli URL di partenza (uno per riga): "))
+    if not seeds_path.is_file():
+        print(f"{Fore.RED}✗ File non trovato: {seeds_path}")
+        return
+
+    depth = cli_instance._get_depth_input(default=2, message="Inserisci il limite di profondità per il crawling (default: 2): ")
+    if depth is None:
+        return
+    max_pages_input = prompt_for_input("Numero massimo di pagine per dominio (INVIO = nessun limite): ")
+    max_pages_per_host = int(max_pages_input) if max_pages_input.isdigit() and int(max_pages_input) > 0 else None
+    concurrency_input = prompt_for_input("Download in parallelo, per tutti i domini (default: 8): ")
+    concurrency = int(concurrency_input) if concurrency_input.isdigit() and int(concurrency_input) > 0 else 8
+    use_sitemaps = prompt_for_input("Accodare anche le pagine elencate nelle sitemap dei siti? (s/n, default: n): ").lower() == "s"
+    budget = prompt_crawl_budget()
+
+    original_crawler_level = crawler_logger.level
+    crawler_logger.setLevel(logging.INFO)
+    crawler_instance = cli_instance.crawler
+    original_crawler_osint_extractor = crawler_instance.osint_extractor
+    crawler_instance.osint_extractor = None # Come in start_website_crawl_base
+    try:
+        crawl_stats = crawler_instance.crawl_many(
+            seeds_path,
+            depth_limit=depth,
+            politeness_delay=1.0,
+            save_to_disk=True,
+            concurrency=concurrency,
+            max_pages_per_host=max_pages_per_host,
+            seed_from_sitemaps=use_sitemaps,
+            **budget
+        )
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}Crawling annullato dall'utente (riprendibile dal menu \"Riprendi un crawl interrotto\").{Style.RESET_ALL}")
+        return
+    except Exception as e:
+        logger.error(f"Errore durante il crawl multi-dominio: {e}", exc_info=True)
+        print(f"{Fore.RED}✗ Errore durante il crawling: {e}")
+        return
+    finally:
+        crawler_instance.osint_extractor = original_crawler_osint_extractor
+        crawler_logger.setLevel(original_crawler_level)
+
+    domain_stats = crawl_stats.get('domains', {})
+    if domain_stats:
+        print(f"\n{Fore.CYAN}Domini ({len(domain_stats)}):{Style.RESET_ALL}")
+        for domain, site_stats in domain_stats.items():
+            budget_note = " - limite di pagine raggiunto" if site_stats.get('budget_hit') else ""
+            print(f"  • {domain}: {site_stats.get('urls_visited', 0)} URL visitati, {site_stats.get('pages_saved', 0)} salvati, "
+                  f"{site_stats.get('errors', 0)} errori{budget_note}")
+    _display_base_crawl_stats(crawl_stats)
+
+
+def resume_interrupted_crawl(cli_instance: 'ScraperCLI') -> None:
+    '''
+    Elenca i crawl interrotti salvati nel database websites e riprende quello scelto dall'ultimo checkpoint.
+    '''
+    db_manager = cli_instance.db_manager
+    db_manager.init_schema("websites")
+    crawls = db_manager.fetch_all(
+        "SELECT id, start_url, options, stats, updated_at FROM crawls WHERE status != 'completed' ORDER BY updated_at DESC"
+    )
+    if not crawls:
+        print(f"{Fore.YELLOW}⚠ Nessun crawl interrotto da riprendere.{Style.RESET_ALL}")
+        return
+
+    print(f"\n{Fore.CYAN}Crawl interrotti:{Style.RESET_ALL}")
+    for crawl in crawls:
+        visited = json.loads(crawl["stats"] or "{}").get("urls_visited", 0)
+        print(f"  {Fore.YELLOW}{crawl['id']}.{Style.RESET_ALL} {crawl['start_url']} ({visited} URL visitati, ultimo checkpoint {crawl['updated_at']})")
+
+    choice = prompt_for_input("ID del crawl da riprendere: ")
+    crawl = next((c for c in crawls if str(c["id"]) == choice), None)
+    if not crawl:
+        print(f"{Fore.RED}✗ ID non valido.")
+        return
+
+    crawler_instance = cli_instance.crawler
+    perform_osint = json.loads(crawl["options"] or "{}").get("perform_osint_on_pages", False)
+    original_crawler_osint_extractor = crawler_instance.osint_extractor
+    if not perform_osint:
+        crawler_instance.osint_extractor = None # Come in start_website_crawl_base
+    try:
+        crawl_stats = crawler_instance.resume_crawl(crawl["id"])
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}Crawling annullato dall'utente.{Style.RESET_ALL}")
+        return
+    except Exception as e:
+        logger.error(f"Errore durante la ripresa del crawl {crawl['id']}: {e}", exc_info=True)
+        print(f"{Fore.RED}✗ Errore durante la ripresa del crawl: {e}")
+        return
+    finally:
+        crawler_instance.osint_extractor = original_crawler_osint_extractor
+
+    _display_base_crawl_stats(crawl_stats)
+
+
 def _display_base_crawl_stats(stats: dict) -> None:
     '''Visualizza statistiche di base del crawling completato.'''
     print(f"\n{Fore.YELLOW}✓ Crawling completato{Style.RESET_ALL}")
@@ -249,6 +375,37 @@ def _display_base_crawl_stats(stats: dict) -> None:
     print(f"  • URLs visitati: {stats.get('urls_visited', 0)}")
     print(f"  • Pagine salvate (HTML): {stats.get('pages_saved', 0)}") 
     print(f"  • Errori download: {stats.get('errors', 0)}")
+    if stats.get('bytes_downloaded'):
+        print(f"  • Dati scaricati: {stats['bytes_downloaded'] / (1024 * 1024):.1f} MB in {stats.get('elapsed_seconds', 0):.0f} s")
+    if budget_line := describe_budget_hit(stats):
+        print(f"  • {budget_line}")
+    sitemap_stats = stats.get('sitemaps')
+    if sitemap_stats:
+        print(f"  • URL dalle sitemap: {sitemap_stats.get('seeded', 0)} accodati su {sitemap_stats.get('urls_in_scope', 0)} ({sitemap_stats.get('sitemaps_read', 0)} sitemap lette)")
+    conn_stats = stats.get('connections')
+    if conn_stats:
+        print(f"  • Connessioni riutilizzate: {conn_stats.get('reused_connections', 0)}/{conn_stats.get('requests', 0)}")
+    cache_stats = stats.get('cache')
+    if cache_stats:
+        print(f"  • Pagine dalla cache: {cache_stats.get('hits', 0)} (hit ratio {cache_stats.get('hit_ratio', 0.0):.0%})")
+        if cache_stats.get('revalidated'):
+            print(f"  • Pagine rivalidate (304): {cache_stats['revalidated']} ({cache_stats.get('bytes_saved', 0) / 1024:.1f} KB risparmiati)")
+    incremental_stats = stats.get('incremental')
+    if incremental_stats:
+        print(f"  • Crawl incrementale: {incremental_stats.get('new', 0)} nuove, {incremental_stats.get('changed', 0)} modificate, "
+              f"{incremental_stats.get('unchanged', 0)} invariate, {incremental_stats.get('skipped', 0)} non ricontrollate")
+    frontier_stats = stats.get('frontier')
+    if frontier_stats and frontier_stats.get('spilled'):
+        print(f"  • URL in coda passati su disco (frontiera oltre il limite in memoria): {frontier_stats['spilled']}")
+    if stats.get('near_duplicates'):
+        print(f"  • Pagine quasi duplicate (link non espansi): {stats['near_duplicates']}")
+    trap_stats = stats.get('traps')
+    if trap_stats and trap_stats.get('rejected'):
+        print(f"  • URL scartati come trappole per crawler: {trap_stats['rejected']} "
+              f"({', '.join(f'{reason}: {count}' for reason, count in trap_stats['by_reason'].items())})")
+    canonical_stats = stats.get('canonicalization')
+    if canonical_stats and canonical_stats.get('fetches_saved'):
+        print(f"  • Download evitati da URL duplicati: {canonical_stats['fetches_saved']}")
     
     print(f"\nPercorsi di salvataggio:")
     # Il percorso di download è generato all'interno del Crawler e dovrebbe essere una Path
@@ -3,7 +3,7 @@ Scraping menu module for the Browsint CLI application.
 """
 from colorama import Fore, Style
 from typing import TYPE_CHECKING
-from ..utils import clear_screen, prompt_for_input, json_serial, export_menu
+from ..utils import clear_screen, prompt_for_input, json_serial, export_menu, describe_budget_hit
 import json
 import validators
 import time
@@ -13,8 +13,8 @@ import logging
 from pathlib import Path
 from tabulate import tabulate
 from scraper.utils.formatters import format_page_analysis_report, generate_html_report, create_pdf_page_report, text_report_to_html, formal_html_report_page
-from scraper.utils.extractors import extract_emails, extract_phone_numbers
-from scraper.utils.web_analysis import detect_technologies
+from scraper.page_pipeline import PageAnalysis
+from scraper.events import CrawlFinished, EntityFound, StatsTick
 
 if TYPE_CHECKING:
     from ..scraper_cli import ScraperCLI
@@ -74,29 +74,20 @@ def analyze_page_structure(cli_instance: 'ScraperCLI') -> None:
             print(f"{Fore.RED}✗ Impossibile scaricare il contenuto per l'analisi.")
             return
 
-        try:
-            content = response.content.decode(response.encoding if response.encoding else 'utf-8', errors='replace') 
-        except Exception as e_decode:
-            logger.warning(f"Errore decodifica contenuto testuale per {url}: {e_decode}")
-            print(f"{Fore.RED}✗ Errore decodifica contenuto per {url}: {e_decode}")
-            return
-
-        parsed_data = cli_instance.web_parser.parse(content, url) # parsing del contenuto HTML
+        # Una sola decodifica e un solo parsing, condivisi da parser, estrattori e rilevamento tecnologie
+        page = PageAnalysis.from_response(url, response, cli_instance.web_parser)
+        parsed_data = page.parsed # parsing del contenuto HTML
 
         # Prepare OSINT data
         osint_data = {}
         if hasattr(cli_instance, 'osint_extractor') and cli_instance.osint_extractor: # hasattr per verificare se l'OSINT Extractor è disponibile
             try:
-                page_emails = extract_emails(content) 
-                page_phones = extract_phone_numbers(content)
-                osint_data["emails"] = page_emails
-                osint_data["phone_numbers"] = page_phones
+                osint_data["emails"] = page.emails
+                osint_data["phone_numbers"] = page.phones
 
-                domain_for_tech = urlparse(url).netloc
-                if domain_for_tech:
-                    tech_data = detect_technologies(domain_for_tech, logger)
-                    if tech_data and not tech_data.get("error"):
-                        osint_data["page_technologies"] = tech_data
+                # Tecnologie dalla risposta già scaricata (nessuna seconda richiesta)
+                if page.technologies:
+                    osint_data["page_technologies"] = page.technologies
 
             except Exception as e_osint_page:
                 logger.error(f"Errore durante estrazione OSINT base per {url}: {e_osint_page}", exc_info=True)
@@ -140,6 +131,8 @@ def start_website_crawl_with_osint(cli_instance: 'ScraperCLI') -> None:
 
     depth_str = prompt_for_input("Inserisci il limite di profondità (default: 1): ")
     depth = int(depth_str) if depth_str.isdigit() else 1
+    max_pages_str = prompt_for_input("Numero massimo di pagine da visitare (le più promettenti per prime, INVIO = nessun limite): ")
+    max_pages = int(max_pages_str) if max_pages_str.isdigit() and int(max_pages_str) > 0 else None
 
     print(f"{Fore.YELLOW}⏳ Inizializzazione crawler OSINT per {url} con profondità {depth}...")
 
@@ -149,13 +142,27 @@ def start_website_crawl_with_osint(cli_instance: 'ScraperCLI') -> None:
     fetcher_logger.setLevel(logging.WARNING)
 
     try:
+        # Le entità arrivano come eventi durante il crawl: il report ne tiene solo le righe da mostrare
+        report = CrawlOsintReport()
+        crawl_stats = {}
         try:
-            crawl_stats = cli_instance.crawler.start_crawl(
+            events = cli_instance.crawler.iter_events(
+                cli_instance.crawler.start_crawl,
                 start_url=url,
                 depth_limit=depth,
                 perform_osint_on_pages=True,
-                save_to_disk=False  # Non salvare su disco in modalità OSINT
+                save_to_disk=False,  # Non salvare su disco in modalità OSINT
+                max_pages=max_pages
             )
+            for event in events:
+                if isinstance(event, EntityFound):
+                    report.add(event.page_url, event.entity_type, event.entity, event.profile_details)
+                elif isinstance(event, StatsTick):
+                    progress = event.stats
+                    print(f"{Fore.CYAN}  ↳ {progress['urls_visited']} pagine visitate, {progress['queued']} in coda, "
+                          f"{progress['errors']} errori, {progress['elapsed_seconds']}s{Style.RESET_ALL}")
+                elif isinstance(event, CrawlFinished):
+                    crawl_stats = event.stats
         except KeyboardInterrupt:
             print(f"\n{Fore.YELLOW}Crawling OSINT annullato dall'utente.{Style.RESET_ALL}")
             return
@@ -164,7 +171,7 @@ def start_website_crawl_with_osint(cli_instance: 'ScraperCLI') -> None:
 
         if "osint_summary" in crawl_stats:
             print("\n")
-            display_crawl_osint_report(crawl_stats["osint_summary"], url)
+            report.display(url)
     except Exception as e:
         logger.error(f"Errore durante il crawling OSINT: {e}", exc_info=True)
         print(f"{Fore.RED}✗ Errore durante il crawling OSINT: {e}")
@@ -172,54 +179,77 @@ def start_website_crawl_with_osint(cli_instance: 'ScraperCLI') -> None:
         crawler_logger.setLevel(original_crawler_level)
         fetcher_logger.setLevel(original_fetcher_level)
 
+class CrawlOsintReport:
+    '''
+    Report OSINT di un crawl costruito man mano che le entità vengono trovate (eventi EntityFound):
+    di ogni entità conserva solo la riga da mostrare, non il profilo completo.
+    '''
+
+    def __init__(self):
+        self.emails_data = []
+        self.phones_data = []
+        self.social_data = []
+        self.tech_data = []
+
+    def add(self, page: str, etype: str, entity_identifier, profile_details: dict | None) -> None:
+        '''Aggiunge al report un'entità trovata nella pagina page.'''
+        profile_details = profile_details or {}
+        if etype == "email":
+            if profile_details and not profile_details.get("error"):
+                email_db_profiles = profile_details.get("profiles", {}).get("email", {})
+                extracted_info = email_db_profiles.get("extracted", {})
+
+                self.emails_data.append([
+                    entity_identifier,
+                    page,
+                    extracted_info.get("hunterio_status", "N/A"),
+                    extracted_info.get("breach_count", 0)
+                ])
+        elif etype == "phone_numbers_found":
+            if isinstance(entity_identifier, list):
+                for phone in entity_identifier:
+                    self.phones_data.append([phone, page])
+            else:
+                self.phones_data.append([entity_identifier, page])
+        elif etype == "social_profile":
+            # Aggiungiamo i dati social con più informazioni
+            self.social_data.append([
+                profile_details.get("platform", "N/A"),
+                entity_identifier,
+                profile_details.get("url", "N/A"),
+                profile_details.get("confidence", "N/A")
+            ])
+        elif etype == "technologies":
+            techs = entity_identifier
+            self.tech_data.append([
+                page,
+                techs.get("framework_cms", "N/A"),
+                ", ".join(techs.get("js_libraries", [])) if techs.get("js_libraries") else "N/A",
+                ", ".join(techs.get("analytics", [])) if techs.get("analytics") else "N/A"
+            ])
+
+    def display(self, target_url: str) -> None:
+        '''Mostra il report aggregato dei risultati OSINT raccolti durante il crawling.'''
+        _print_crawl_osint_report(self, target_url)
+
+
 def display_crawl_osint_report(osint_summary: dict, target_url: str) -> None:
-    '''Mostra un report aggregato dei risultati OSINT raccolti durante il crawling.'''
+    '''Mostra un report aggregato dei risultati OSINT raccolti durante il crawling (riepilogo completo di start_crawl).'''
+    report = CrawlOsintReport()
+    for finding in osint_summary.get("entities_profiled", []):
+        report.add(finding.get('page_url'), finding.get('entity_type'), finding.get('entity'), finding.get('profile_details', {}))
+    for page, techs in osint_summary.get("page_technologies", {}).items():
+        report.add(page, "technologies", techs, {})
+    report.display(target_url)
+
+
+def _print_crawl_osint_report(report: CrawlOsintReport, target_url: str) -> None:
     print(f"\n{Fore.BLUE}{'=' * 70}")
     print(f"█ {Fore.WHITE}{f'REPORT OSINT CRAWL per {target_url}':^66}{Fore.BLUE} █")
     print(f"{'=' * 70}{Style.RESET_ALL}\n")
 
-    entities_profiled = osint_summary.get("entities_profiled", [])
-    if entities_profiled:
-        # Organizziamo i dati per tipo
-        emails_data = []
-        phones_data = []
-        social_data = []
-        
-        for finding in entities_profiled:
-            page = finding.get('page_url')
-            etype = finding.get('entity_type')
-            entity_identifier = finding.get('entity')
-            profile_details = finding.get('profile_details', {})
-
-            if etype == "email":
-                if profile_details and not profile_details.get("error"):
-                    email_db_profiles = profile_details.get("profiles", {}).get("email", {})
-                    extracted_info = email_db_profiles.get("extracted", {})
-                    
-                    emails_data.append([
-                        entity_identifier,
-                        page,
-                        extracted_info.get("hunterio_status", "N/A"),
-                        extracted_info.get("breach_count", 0)
-                    ])
-            elif etype == "phone_numbers_found":
-                if isinstance(entity_identifier, list):
-                    for phone in entity_identifier:
-                        phones_data.append([phone, page])
-                else:
-                    phones_data.append([entity_identifier, page])
-            elif etype == "social_profile":
-                # Aggiungiamo i dati social con più informazioni
-                platform = profile_details.get("platform", "N/A")
-                url = profile_details.get("url", "N/A")
-                confidence = profile_details.get("confidence", "N/A")
-                social_data.append([
-                    platform,
-                    entity_identifier,
-                    url,
-                    confidence
-                ])
-
+    emails_data, phones_data, social_data = report.emails_data, report.phones_data, report.social_data
+    if emails_data or phones_data or social_data:
         # Mostra tabella email
         if emails_data:
             print(f"\n{Fore.YELLOW}--- 📧 Email Trovate e Profilate ---{Style.RESET_ALL}")
@@ -248,26 +278,13 @@ def display_crawl_osint_report(osint_summary: dict, target_url: str) -> None:
             ))
 
         # Mostra tecnologie rilevate
-        page_technologies = osint_summary.get("page_technologies", {})
-        if page_technologies:
+        if report.tech_data:
             print(f"\n{Fore.YELLOW}--- 💻 Tecnologie Rilevate per Pagina ---{Style.RESET_ALL}")
-            tech_data = []
-            for page, techs in page_technologies.items():
-                tech_data.append([
-                    page,
-                    techs.get("framework_cms", "N/A"),
-                    ", ".join(techs.get("js_libraries", [])) if techs.get("js_libraries") else "N/A",
-                    ", ".join(techs.get("analytics", [])) if techs.get("analytics") else "N/A"
-                ])
-            
-            if tech_data:
-                print(tabulate(
-                    tech_data,
-                    headers=["URL", "Framework/CMS", "JS Libraries", "Analytics"],
-                    tablefmt="grid"
-                ))
-            else:
-                print(f"{Fore.YELLOW}Nessuna tecnologia specifica rilevata.{Style.RESET_ALL}")
+            print(tabulate(
+                report.tech_data,
+                headers=["URL", "Framework/CMS", "JS Libraries", "Analytics"],
+                tablefmt="grid"
+            ))
     else:
         print(f"{Fore.YELLOW}Nessuna entità OSINT (email/telefoni/social) rilevata e profilata dalle pagine.{Style.RESET_ALL}")
 
@@ -280,6 +297,12 @@ def _display_base_crawl_stats(stats: dict) -> None:
     print(f"  • URLs visitati: {stats.get('urls_visited', 0)}")
     print(f"  • Pagine salvate: {stats.get('pages_saved', 0)}")
     print(f"  • Errori download: {stats.get('errors', 0)}")
+    if stats.get('first_contact_at'):
+        print(f"  • Pagine con contatti: {stats.get('contact_pages', 0)} (la prima alla visita n. {stats['first_contact_at']})")
+    if budget_line := describe_budget_hit(stats):
+        print(f"  • {budget_line}")
+    if stats.get('traps', {}).get('rejected'):
+        print(f"  • URL scartati come trappole per crawler: {stats['traps']['rejected']}")
     print(f"\nPercorso di salvataggio:")
     print(f"  • Contenuto: {stats.get('download_path', 'N/A')}")
 
@@ -22,6 +22,7 @@ from db.manager import DatabaseManager
 # Import scraper components
 from scraper.extractors.osint_extractor import OSINTExtractor
 from scraper.fetcher import WebFetcher
+from scraper.async_fetcher import AsyncWebFetcher
 from scraper.parser import WebParser
 from scraper.crawler import Crawler
 
@@ -39,8 +40,10 @@ db_logger = logging.getLogger("DatabaseManager")
 class ScraperCLI:
     '''Gestisce l'interfaccia a riga di comando per lo strumento OSINT (ORCHESTRATORE).'''
 
-    def __init__(self):
-        '''Inizializza l'interfaccia a riga di comando per lo strumento OSINT.'''
+    def __init__(self, fetch_mode: str | None = None, warc_path: str | None = None):
+        '''Inizializza l'interfaccia a riga di comando per lo strumento OSINT.
+        fetch_mode/warc_path selezionano la modalità del fetcher (live, record, replay); se non indicati
+        si leggono BROWSINT_FETCH_MODE e BROWSINT_WARC_PATH dall'ambiente o dal file .env.'''
         # Prima chiamiamo setup per inizializzare i percorsi
         self.setup()
         
@@ -49,12 +52,19 @@ class ScraperCLI:
         
         # Infine inizializziamo tutti i componenti
         self.db_manager = DatabaseManager()
+        self.web_fetcher = WebFetcher(
+            cache_dir=str(self.data_dir / "page_cache"),
+            cache_ttl=24 * 3600,
+            mode=fetch_mode or os.getenv("BROWSINT_FETCH_MODE", "live"),
+            warc_path=warc_path or os.getenv("BROWSINT_WARC_PATH")
+        )
         self.osint_extractor = OSINTExtractor(
             api_keys=self.api_keys,
             data_dir=self.data_dir,
-            dirs=self.dirs
+            dirs=self.dirs,
+            fetcher=self.web_fetcher
         )
-        self.web_fetcher = WebFetcher()
+        self.async_fetcher = AsyncWebFetcher(self.web_fetcher)
         self.web_parser = WebParser()
         self.crawler = Crawler(
             fetcher=self.web_fetcher,
@@ -44,6 +44,48 @@ def confirm_action(message: str, default_yes: bool = True) -> bool:
         return choice.lower() == 's' 
 
 
+# Descrizione dei limiti del crawl (stats['budget_hit'], vedi CrawlBudget)
+BUDGET_DESCRIPTIONS = {
+    'max_pages': "numero massimo di pagine",
+    'max_pages_per_host': "numero massimo di pagine per host",
+    'max_bytes': "quantità massima di dati scaricati",
+    'deadline': "durata massima del crawl",
+    'error_rate': "tasso di errore massimo",
+}
+
+def _positive_number(text: str) -> float | None:
+    try:
+        value = float(text.replace(',', '.'))
+    except ValueError:
+        return None
+    return value if value > 0 else None
+
+def prompt_crawl_budget() -> dict:
+    '''
+    Chiede all'utente i limiti di costo di un crawl (INVIO = nessun limite).
+    Valore di ritorno:
+        dict -> Argomenti max_pages, max_bytes, max_seconds e max_error_rate per Crawler.start_crawl
+    '''
+    print(f"\n{Fore.CYAN}Limiti del crawl (INVIO = nessun limite):{Style.RESET_ALL}")
+    pages = _positive_number(prompt_for_input("  Numero massimo di pagine: "))
+    megabytes = _positive_number(prompt_for_input("  Dati massimi da scaricare (MB): "))
+    minutes = _positive_number(prompt_for_input("  Durata massima (minuti): "))
+    error_percent = _positive_number(prompt_for_input("  Interrompi oltre questa percentuale di errori (%): "))
+    return {
+        'max_pages': int(pages) if pages else None,
+        'max_bytes': int(megabytes * 1024 * 1024) if megabytes else None,
+        'max_seconds': minutes * 60 if minutes else None,
+        'max_error_rate': min(error_percent, 100) / 100 if error_percent else None,
+    }
+
+def describe_budget_hit(stats: dict) -> str | None:
+    '''Restituisce la riga di riepilogo sul limite che ha fermato il crawl, o None se il crawl è terminato da solo.'''
+    budget_hit = stats.get('budget_hit')
+    if not budget_hit:
+        return None
+    return f"Crawl fermato al raggiungimento del limite: {BUDGET_DESCRIPTIONS.get(budget_hit, budget_hit)} (URL rimanenti non visitati)"
+
+
 def export_menu() -> str:
     print(f"{Fore.BLUE}\nScegli il formato di esportazione:{Style.RESET_ALL}")
     print(f"{Fore.YELLOW}1.{Style.RESET_ALL} JSON")
@@ -10,6 +10,7 @@ Gestore database semplificato per SQLite con focus su:
 import logging
 import os
 import sqlite3
+import threading
 from collections.abc import Iterator
 from contextlib import contextmanager
 from functools import lru_cache
@@ -18,7 +19,7 @@ from typing import Any, Dict, List, Optional, Set, Tuple, Union, cast
 from datetime import datetime
 import pandas as pd
 
-from .schema import SCHEMAS
+from .schema import MIGRATIONS, SCHEMAS
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger("DatabaseManager")
@@ -79,14 +80,30 @@ class DatabaseManager:
             self.databases["websites"] = db_path
 
         self.initialized_tables: set[str] = set()
-        self.connections: dict[str, sqlite3.Connection | None] = {}
+        self._local = threading.local() # connessioni del thread corrente (vedi connections)
 
         logger.info(f"DatabaseManager inizializzato con database: {', '.join(self.databases.keys())}")
 
+    @property
+    def connections(self) -> dict[str, sqlite3.Connection | None]:
+        '''
+        Funzione: connections
+        Connessioni aperte dal thread corrente. Una connessione SQLite si usa solo nel thread che l'ha creata:
+        un crawl eseguito in un altro thread (Crawler.iter_events, task web) apre le proprie connessioni.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            dict[str, sqlite3.Connection | None] -> Le connessioni del thread corrente per nome del database
+        '''
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        return connections
+
     def connect(self, db_name: str = "websites") -> bool:
         '''
         Funzione: connect
-        Stabilisce una connessione al database specificato.
+        Stabilisce una connessione al database specificato per il thread corrente.
         Parametri formali:
             self -> Riferimento all'istanza della classe
             str db_name -> Nome del database a cui connettersi
@@ -121,7 +138,7 @@ class DatabaseManager:
     def disconnect(self, db_name: str | None = None) -> None:
         '''
         Funzione: disconnect
-        Chiude una o tutte le connessioni attive al database.
+        Chiude una o tutte le connessioni attive al database aperte dal thread corrente.
         Parametri formali:
             self -> Riferimento all'istanza della classe
             str | None db_name -> Nome del database la cui connessione chiudere, o None per tutte
@@ -203,6 +220,13 @@ class DatabaseManager:
                     if query.strip():
                         connection.execute(query)
 
+                # Colonne aggiunte in versioni successive: le tabelle già esistenti non le hanno
+                for table, column, definition in MIGRATIONS.get(name, []):
+                    existing_columns = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+                    if column not in existing_columns:
+                        connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                        logger.info(f"Colonna {table}.{column} aggiunta a {name}")
+
                 connection.commit()
                 self.initialized_tables.add(f"{name}_schema")
                 logger.info(f"Schema inizializzato per {name}")
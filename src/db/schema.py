@@ -5,6 +5,9 @@ Definizione degli schemi (strutture delle tabelle) per tutti i database dell'app
 Ogni chiave del dizionario SCHEMAS corrisponde al nome logico di un database,
 e il valore associato è una stringa contenente le istruzioni SQL CREATE TABLE
 separate da punto e virgola (;).
+
+MIGRATIONS elenca, per database, le colonne aggiunte dopo la creazione delle tabelle
+come tuple (tabella, colonna, definizione): init_schema le aggiunge ai database esistenti.
 """
 
 SCHEMAS = {
@@ -24,6 +27,14 @@ SCHEMAS = {
             status_code INTEGER,
             content_length INTEGER,
             content_type TEXT,
+            simhash TEXT,
+            content_hash TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            refresh_interval REAL,
+            next_check TIMESTAMP,
+            last_changed TIMESTAMP,
+            change_count INTEGER NOT NULL DEFAULT 0,
             last_checked TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -82,6 +93,28 @@ SCHEMAS = {
             FOREIGN KEY (robots_txt_id) REFERENCES robots_txt(id) ON DELETE CASCADE,
             UNIQUE(robots_txt_id, url)
         );
+
+        CREATE TABLE IF NOT EXISTS crawls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            start_url TEXT NOT NULL,
+            status TEXT CHECK(status IN ('running', 'interrupted', 'completed')) NOT NULL DEFAULT 'running',
+            options TEXT,
+            stats TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS crawl_frontier (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            crawl_id INTEGER NOT NULL,
+            url TEXT NOT NULL,
+            depth INTEGER NOT NULL,
+            done BOOLEAN NOT NULL DEFAULT 0,
+            FOREIGN KEY (crawl_id) REFERENCES crawls(id) ON DELETE CASCADE,
+            UNIQUE(crawl_id, url)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_crawl_frontier_pending ON crawl_frontier(crawl_id, done);
     ''',
     "osint": '''
         CREATE TABLE IF NOT EXISTS entities (
@@ -129,4 +162,17 @@ SCHEMAS = {
             UNIQUE(entity_id, email, phone)
         );
     '''
-}
\ No newline at end of file
+}
+
+MIGRATIONS = {
+    "websites": [
+        ("pages", "simhash", "TEXT"),
+        ("pages", "content_hash", "TEXT"),
+        ("pages", "etag", "TEXT"),
+        ("pages", "last_modified", "TEXT"),
+        ("pages", "refresh_interval", "REAL"),
+        ("pages", "next_check", "TIMESTAMP"),
+        ("pages", "last_changed", "TIMESTAMP"),
+        ("pages", "change_count", "INTEGER NOT NULL DEFAULT 0"),
+    ],
+}
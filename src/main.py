@@ -33,9 +33,17 @@ def main():
     colorama.init(autoreset=True)
 
     parser = argparse.ArgumentParser(description="Strumento OSINT CLI.")
+    fetch_mode = parser.add_mutually_exclusive_group()
+    fetch_mode.add_argument("--record", metavar="DIR", help="Registra tutte le risposte scaricate in file WARC nella directory indicata")
+    fetch_mode.add_argument("--replay", metavar="PATH", help="Nessuna rete: serve le risposte da file/directory WARC o da un mirror file://")
     args = parser.parse_args()
 
-    cli = ScraperCLI()
+    if args.record:
+        cli = ScraperCLI(fetch_mode="record", warc_path=args.record)
+    elif args.replay:
+        cli = ScraperCLI(fetch_mode="replay", warc_path=args.replay)
+    else:
+        cli = ScraperCLI()
     cli.run()
 
 if __name__ == "__main__":
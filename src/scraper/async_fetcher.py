@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, Optional
+from urllib.parse import urlparse
+
+from scraper.fetcher import FetchResponse, WebFetcher
+
+logger = logging.getLogger("scraper.async_fetcher")
+
+
+class AsyncWebFetcher:
+    '''
+    Funzione: AsyncWebFetcher
+    Interfaccia asyncio di WebFetcher: esegue molte richieste in parallelo con limiti di concorrenza
+    globali e per host. L'I/O non è asincrono: ogni richiesta è una chiamata bloccante al WebFetcher
+    sottostante (cache, retry, politeness) eseguita con run_in_executor su un pool di max_concurrency thread,
+    ciascuno con la propria requests.Session (vedi WebFetcher.session); le coroutine attendono solo il risultato.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        WebFetcher | None fetcher -> Fetcher sincrono da utilizzare (None per crearne uno nuovo)
+        int max_concurrency -> Numero massimo di richieste in corso contemporaneamente
+        int per_host_concurrency -> Numero massimo di richieste in corso verso lo stesso host
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, fetcher: WebFetcher | None = None, max_concurrency: int = 50, per_host_concurrency: int = 4):
+        if max_concurrency < 1 or per_host_concurrency < 1:
+            raise ValueError("I limiti di concorrenza devono essere >= 1")
+
+        self.fetcher = fetcher or WebFetcher(pool_maxsize=per_host_concurrency)
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="browsint-fetch")
+
+        # I semafori asyncio sono legati all'event loop in cui vengono usati:
+        # si ricreano quando cambia il loop (es. chiamate successive ad asyncio.run)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def _semaphores_for(self, host: str) -> tuple[asyncio.Semaphore, asyncio.Semaphore]:
+        '''
+        Funzione: _semaphores_for
+        Restituisce il semaforo globale e quello dell'host per l'event loop corrente.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str host -> L'host (netloc) della richiesta
+        Valore di ritorno:
+            tuple[asyncio.Semaphore, asyncio.Semaphore] -> (semaforo globale, semaforo dell'host)
+        '''
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._host_semaphores = {}
+
+        host_semaphore = self._host_semaphores.get(host)
+        if host_semaphore is None:
+            host_semaphore = asyncio.Semaphore(self.per_host_concurrency)
+            self._host_semaphores[host] = host_semaphore
+        return self._global_semaphore, host_semaphore
+
+    async def fetch_full_response(
+        self,
+        url: str,
+        force_download: bool = False,
+        timeout: int = 30,
+        retries: int | None = None,
+        destination: Callable[[str, str], Path] | None = None,
+    ) -> FetchResponse | None:
+        '''
+        Funzione: fetch_full_response
+        Versione asincrona di WebFetcher.fetch_full_response, rispettando i limiti di concorrenza.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL da scaricare
+            bool force_download -> Forzare il download (ignora cache)
+            int timeout -> Timeout della richiesta in secondi
+            int | None retries -> Numero di tentativi in caso di errore (None = quello della retry policy)
+            Callable[[str, str], Path] | None destination -> Destinazione su disco dei contenuti binari (vedi WebFetcher)
+        Valore di ritorno:
+            FetchResponse | None -> La risposta completa, o None in caso di fallimento
+        '''
+        global_semaphore, host_semaphore = self._semaphores_for(urlparse(url).netloc)
+        loop = asyncio.get_running_loop()
+
+        async with host_semaphore:
+            async with global_semaphore:
+                # La politeness è per host (HostScheduler del fetcher): host diversi procedono in parallelo
+                call = partial(self.fetcher.fetch_full_response, url, force_download, timeout, retries, destination=destination)
+                try:
+                    return await loop.run_in_executor(self._executor, call)
+                except Exception as e:
+                    logger.error(f"Errore imprevisto durante il download asincrono di {url}: {e}")
+                    return None
+
+    async def fetch_many(
+        self,
+        urls: Iterable[str],
+        force_download: bool = False,
+        timeout: int = 30,
+        retries: int | None = None,
+        destination: Callable[[str, str], Path] | None = None,
+        on_result: Callable[[int, str, FetchResponse | None], Awaitable[None] | None] | None = None,
+    ) -> list[FetchResponse | None]:
+        '''
+        Funzione: fetch_many
+        Scarica una lista di URL in parallelo e restituisce le risposte nello stesso ordine degli URL.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            Iterable[str] urls -> Gli URL da scaricare
+            bool force_download -> Forzare il download (ignora cache)
+            int timeout -> Timeout di ogni richiesta in secondi
+            int | None retries -> Numero di tentativi per ogni richiesta (None = quello della retry policy)
+            Callable[[str, str], Path] | None destination -> Destinazione su disco dei contenuti binari (vedi WebFetcher)
+            Callable | None on_result -> Callback (indice, url, risposta) chiamata appena ogni download termina
+        Valore di ritorno:
+            list[FetchResponse | None] -> Le risposte (None per i download falliti), nell'ordine degli URL
+        '''
+        url_list = list(urls)
+        results: list[FetchResponse | None] = [None] * len(url_list)
+
+        async def _fetch_one(index: int, url: str) -> None:
+            response = await self.fetch_full_response(url, force_download, timeout, retries, destination)
+            results[index] = response
+            if on_result:
+                outcome = on_result(index, url, response)
+                if asyncio.iscoroutine(outcome):
+                    await outcome
+
+        await asyncio.gather(*(_fetch_one(i, url) for i, url in enumerate(url_list)))
+        return results
+
+    def fetch_many_blocking(self, urls: Iterable[str], **kwargs) -> list[FetchResponse | None]:
+        '''
+        Funzione: fetch_many_blocking
+        Esegue fetch_many da codice sincrono. Se il thread corrente ha già un event loop attivo
+        (es. endpoint FastAPI), il loop dedicato viene avviato in un thread separato.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            Iterable[str] urls -> Gli URL da scaricare
+            **kwargs -> Argomenti aggiuntivi passati a fetch_many
+        Valore di ritorno:
+            list[FetchResponse | None] -> Le risposte nell'ordine degli URL
+        '''
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.fetch_many(urls, **kwargs))
+
+        outcome: dict[str, object] = {}
+
+        def _runner() -> None:
+            try:
+                outcome["results"] = asyncio.run(self.fetch_many(urls, **kwargs))
+            except BaseException as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=_runner, name="browsint-fetch-loop")
+        thread.start()
+        thread.join()
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["results"]
+
+    def close(self) -> None:
+        '''
+        Funzione: close
+        Arresta il pool di thread. Il WebFetcher sottostante resta aperto (può essere condiviso).
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        self._executor.shutdown(wait=True)
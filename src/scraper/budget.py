@@ -0,0 +1,91 @@
+import time
+from dataclasses import dataclass
+from typing import Any
+
+# Pagine minime visitate prima di valutare il tasso di errore (evita stop per un errore sulle prime pagine)
+ERROR_RATE_MIN_PAGES = 20
+
+
+@dataclass
+class CrawlBudget:
+    '''
+    Funzione: CrawlBudget
+    Limiti di costo di un crawl. Quando uno si esaurisce il crawler smette di avviare download, completa
+    quelli in corso e restituisce le statistiche con il nome del limite raggiunto (stats['budget_hit']).
+    Parametri formali:
+        int | None max_pages -> Pagine massime in totale
+        int | None max_pages_per_host -> Pagine massime per host
+        int | None max_bytes -> Byte massimi scaricati (i download in corso possono superarlo di poco)
+        float | None max_seconds -> Durata massima del crawl in secondi (scadenza)
+        float | None max_error_rate -> Frazione massima di pagine con errore (0-1), valutata dopo ERROR_RATE_MIN_PAGES pagine
+        bool single_host -> Se il crawl riguarda un solo host: il limite per host vale allora come limite totale
+    '''
+    max_pages: int | None = None
+    max_pages_per_host: int | None = None
+    max_bytes: int | None = None
+    max_seconds: float | None = None
+    max_error_rate: float | None = None
+    single_host: bool = True
+
+    def __post_init__(self):
+        self._deadline: float | None = None
+
+    @classmethod
+    def from_options(cls, options: dict[str, Any], single_host: bool = True) -> "CrawlBudget":
+        '''Crea il budget dalle opzioni di un crawl (vedi Crawler.start_crawl); i valori non positivi non sono limiti.'''
+        def limit(key: str):
+            value = options.get(key)
+            return value if value and value > 0 else None
+        return cls(limit('max_pages'), limit('max_pages_per_host'), limit('max_bytes'), limit('max_seconds'),
+                   limit('max_error_rate'), single_host)
+
+    def start(self) -> None:
+        '''Fa partire il conteggio della scadenza (all'avvio o alla ripresa del crawl).'''
+        self._deadline = time.monotonic() + self.max_seconds if self.max_seconds else None
+
+    def _page_limit(self) -> tuple[int | None, str]:
+        if self.single_host and self.max_pages_per_host and (not self.max_pages or self.max_pages_per_host < self.max_pages):
+            return self.max_pages_per_host, "max_pages_per_host"
+        return self.max_pages, "max_pages"
+
+    def pages_left(self, stats: dict[str, Any], in_flight: int = 0) -> int | None:
+        '''
+        Funzione: pages_left
+        Calcola quante pagine si possono ancora avviare entro il limite di pagine.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            dict stats -> Statistiche correnti del crawl
+            int in_flight -> Pagine già avviate e non ancora contate
+        Valore di ritorno:
+            int | None -> Pagine rimanenti, None se non c'è un limite di pagine
+        '''
+        limit, _ = self._page_limit()
+        if not limit:
+            return None
+        return max(0, limit - stats['urls_visited'] - in_flight)
+
+    def host_exhausted(self, dispatched: int) -> bool:
+        '''Indica se un host ha esaurito il proprio limite di pagine (crawl multi-host).'''
+        return bool(self.max_pages_per_host) and dispatched >= self.max_pages_per_host
+
+    def exhausted(self, stats: dict[str, Any], in_flight: int = 0) -> str | None:
+        '''
+        Funzione: exhausted
+        Verifica se un limite del crawl è esaurito, cioè se non vanno avviati altri download.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            dict stats -> Statistiche correnti del crawl
+            int in_flight -> Pagine già avviate e non ancora contate
+        Valore di ritorno:
+            str | None -> Il limite esaurito ("max_pages", "max_pages_per_host", "max_bytes", "deadline", "error_rate") o None
+        '''
+        if self.pages_left(stats, in_flight) == 0:
+            return self._page_limit()[1]
+        if self.max_bytes and stats.get('bytes_downloaded', 0) >= self.max_bytes:
+            return "max_bytes"
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            return "deadline"
+        visited = stats['urls_visited']
+        if self.max_error_rate is not None and visited >= ERROR_RATE_MIN_PAGES and stats['errors'] / visited > self.max_error_rate:
+            return "error_rate"
+        return None
@@ -0,0 +1,489 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, NamedTuple
+
+logger = logging.getLogger("scraper.cache")
+
+# Intestazioni di una 304 che descrivono il trasferimento e non la risorsa: non sostituiscono quelle salvate
+_TRANSFER_HEADERS = {"content-length", "content-encoding", "transfer-encoding", "connection", "keep-alive"}
+# File del vecchio formato di cache: <md5 dell'URL>.html
+_LEGACY_FILE = re.compile(r"[0-9a-f]{32}\.html")
+_MAX_AGE = re.compile(r"(?:^|,)\s*max-age\s*=\s*\"?(\d+)", re.IGNORECASE)
+# Durata di una voce la cui risposta non indica né Cache-Control né Expires
+DEFAULT_CACHE_TTL = 3600.0
+
+
+def _http_date(value: str | None) -> float | None:
+    '''Converte una data HTTP (Date, Expires) in timestamp epoch; None se assente o non valida.'''
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class CacheEntry(NamedTuple):
+    '''
+    Funzione: CacheEntry
+    Rappresenta una risposta HTTP salvata nella cache su disco.
+    Parametri formali:
+        int status_code -> Codice di stato HTTP della risposta
+        dict[str, str] headers -> Intestazioni della risposta
+        str url -> URL finale (dopo eventuali redirect)
+        bytes content -> Corpo della risposta (decompresso)
+        str | None encoding -> Codifica rilevata al momento del download
+        float stored_at -> Timestamp (epoch) del salvataggio
+        str | None encoding_source -> Livello del rilevamento che ha determinato la codifica
+    '''
+    status_code: int
+    headers: dict[str, str]
+    url: str
+    content: bytes
+    encoding: str | None
+    stored_at: float
+    encoding_source: str | None = None
+
+    def header(self, name: str) -> str | None:
+        '''
+        Funzione: header
+        Restituisce un'intestazione salvata ignorando maiuscole/minuscole nel nome.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str name -> Nome dell'intestazione
+        Valore di ritorno:
+            str | None -> Il valore dell'intestazione, o None se assente
+        '''
+        name = name.lower()
+        for key, value in self.headers.items():
+            if key.lower() == name:
+                return value
+        return None
+
+    def conditional_headers(self) -> dict[str, str]:
+        '''
+        Funzione: conditional_headers
+        Costruisce le intestazioni per una GET condizionale a partire dai validatori salvati (ETag, Last-Modified).
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            dict[str, str] -> If-None-Match / If-Modified-Since, vuoto se la risposta non aveva validatori
+        '''
+        headers = {}
+        etag = self.header("ETag")
+        if etag:
+            headers["If-None-Match"] = etag
+        last_modified = self.header("Last-Modified")
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def freshness_lifetime(self, default_ttl: float | None) -> float | None:
+        '''
+        Funzione: freshness_lifetime
+        Calcola per quanti secondi dal salvataggio la voce resta valida senza rivalidarla, secondo le intestazioni
+        salvate: Cache-Control no-cache (0), poi max-age, poi Expires (rispetto a Date); se mancano vale default_ttl.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            float | None default_ttl -> Durata da usare se la risposta non indica la propria (None = nessuna scadenza)
+        Valore di ritorno:
+            float | None -> La durata in secondi, None se la voce non scade
+        '''
+        cache_control = (self.header("Cache-Control") or "").lower()
+        if re.search(r"(?:^|,)\s*no-cache\b", cache_control):
+            return 0.0
+        max_age = _MAX_AGE.search(cache_control)
+        if max_age:
+            return float(max_age.group(1))
+        expires = self.header("Expires")
+        if expires is not None:
+            # Un Expires non valido (es. "0") indica una risposta già scaduta
+            expires_at = _http_date(expires)
+            if expires_at is None:
+                return 0.0
+            return max(0.0, expires_at - (_http_date(self.header("Date")) or self.stored_at))
+        return default_ttl
+
+
+class ResponseCache:
+    '''
+    Funzione: ResponseCache
+    Cache su disco delle risposte HTTP complete (status, header, URL finale e corpo), compresse con zlib.
+    Le voci sono gestite in ordine LRU: quando la dimensione totale supera max_bytes vengono eliminate
+    le voci usate meno di recente. Una voce scade secondo Cache-Control (max-age, no-cache) o Expires della
+    sua risposta, altrimenti dopo ttl secondi; le voci scadute che hanno validatori (ETag/Last-Modified) restano
+    su disco per essere rivalidate con una GET condizionale. Espone contatori di hit/miss/byte.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        str | Path cache_dir -> Directory in cui salvare le voci
+        int max_bytes -> Dimensione massima (compressa) della cache su disco
+        float | None ttl -> Età massima in secondi delle voci senza Cache-Control/Expires (None = nessuna scadenza)
+        int compression_level -> Livello di compressione zlib (1-9)
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    ENTRY_SUFFIX = ".cache"
+
+    def __init__(self, cache_dir: str | Path, max_bytes: int = 200 * 1024 * 1024, ttl: float | None = DEFAULT_CACHE_TTL, compression_level: int = 6):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.compression_level = compression_level
+
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict() # chiave -> dimensione su disco, dal meno al più recente
+        self._total_bytes = 0
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "revalidated": 0,
+            "stores": 0,
+            "evictions": 0,
+            "bytes_served": 0,
+            "bytes_stored": 0,
+            "bytes_saved": 0,
+        }
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self) -> None:
+        '''
+        Funzione: _load_index
+        Ricostruisce l'indice LRU dai file presenti su disco (ordinati per data di ultimo utilizzo)
+        e rimuove i file <md5>.html del vecchio formato di cache, mai riletti (gli altri file non vengono toccati).
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        legacy_files = [path for path in self.cache_dir.glob("*.html") if _LEGACY_FILE.fullmatch(path.name)]
+        for legacy in legacy_files:
+            try:
+                legacy.unlink()
+            except OSError:
+                pass
+        if legacy_files:
+            logger.info(f"Rimossi {len(legacy_files)} file del vecchio formato di cache da {self.cache_dir}")
+
+        entries = []
+        for path in self.cache_dir.glob(f"*{self.ENTRY_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+        self._evict_if_needed()
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.ENTRY_SUFFIX}"
+
+    def get(self, url: str) -> CacheEntry | None:
+        '''
+        Funzione: get
+        Restituisce la voce in cache per l'URL, se presente e non scaduta.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL richiesto
+        Valore di ritorno:
+            CacheEntry | None -> La risposta salvata, o None in caso di miss
+        '''
+        entry, fresh = self.lookup(url)
+        return entry if fresh else None
+
+    def lookup(self, url: str) -> tuple[CacheEntry | None, bool]:
+        '''
+        Funzione: lookup
+        Cerca l'URL in cache distinguendo le voci valide da quelle scadute ma rivalidabili.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL richiesto
+        Valore di ritorno:
+            tuple[CacheEntry | None, bool] -> (voce, True) se valida; (voce, False) se scaduta ma con
+                                              validatori; (None, False) in caso di miss
+        '''
+        key = self._key(url)
+        with self._lock:
+            if key not in self._index:
+                self.stats["misses"] += 1
+                return None, False
+
+        entry = self._read(key)
+        if entry is None:
+            self._remove(key)
+            with self._lock:
+                self.stats["misses"] += 1
+            return None, False
+
+        lifetime = entry.freshness_lifetime(self.ttl)
+        if lifetime is not None and time.time() - entry.stored_at >= lifetime:
+            if entry.conditional_headers():
+                logger.debug(f"Voce di cache scaduta per {url}, da rivalidare")
+                with self._lock:
+                    self.stats["stale"] += 1
+                return entry, False
+            logger.debug(f"Voce di cache scaduta per {url}")
+            self._remove(key)
+            with self._lock:
+                self.stats["misses"] += 1
+            return None, False
+
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+            self.stats["hits"] += 1
+            self.stats["bytes_served"] += len(entry.content)
+        try:
+            os.utime(self._path(key)) # l'mtime conserva l'ordine LRU tra un'esecuzione e l'altra
+        except OSError:
+            pass
+        logger.debug(f"Cache hit per {url}")
+        return entry, True
+
+    def put(self, url: str, status_code: int, headers: dict[str, str], final_url: str, content: bytes, encoding: str | None, encoding_source: str | None = None) -> bool:
+        '''
+        Funzione: put
+        Salva (compressa) una risposta nella cache ed elimina le voci meno recenti se si supera max_bytes.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL richiesto (chiave della cache)
+            int status_code -> Codice di stato HTTP
+            dict[str, str] headers -> Intestazioni della risposta
+            str final_url -> URL finale dopo i redirect
+            bytes content -> Corpo della risposta
+            str | None encoding -> Codifica rilevata
+            str | None encoding_source -> Livello del rilevamento che ha determinato la codifica
+        Valore di ritorno:
+            bool -> True se il salvataggio è avvenuto con successo, False altrimenti
+        '''
+        size = self._write(url, status_code, headers, final_url, content, encoding, encoding_source=encoding_source)
+        if size is None:
+            return False
+
+        with self._lock:
+            self.stats["stores"] += 1
+            self.stats["bytes_stored"] += size
+        self._evict_if_needed()
+        return True
+
+    def refresh(self, url: str, entry: CacheEntry, headers: dict[str, str]) -> CacheEntry:
+        '''
+        Funzione: refresh
+        Aggiorna una voce rivalidata dal server (risposta 304): unisce le nuove intestazioni a quelle salvate
+        e azzera l'età della voce, senza riscaricare il corpo.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL richiesto (chiave della cache)
+            CacheEntry entry -> La voce scaduta restituita da lookup
+            dict[str, str] headers -> Le intestazioni della risposta 304
+        Valore di ritorno:
+            CacheEntry -> La voce aggiornata
+        '''
+        merged = dict(entry.headers)
+        for name, value in headers.items():
+            if name.lower() in _TRANSFER_HEADERS:
+                continue
+            for existing in [k for k in merged if k.lower() == name.lower()]:
+                del merged[existing]
+            merged[name] = value
+
+        refreshed = entry._replace(headers=merged, stored_at=time.time())
+        self._write(
+            url, refreshed.status_code, merged, refreshed.url, refreshed.content, refreshed.encoding,
+            refreshed.stored_at, refreshed.encoding_source
+        )
+        with self._lock:
+            key = self._key(url)
+            if key in self._index:
+                self._index.move_to_end(key)
+            self.stats["revalidated"] += 1
+            self.stats["bytes_saved"] += len(entry.content)
+        self._evict_if_needed()
+        logger.debug(f"Voce di cache rivalidata (304) per {url}")
+        return refreshed
+
+    def _write(
+        self,
+        url: str,
+        status_code: int,
+        headers: dict[str, str],
+        final_url: str,
+        content: bytes,
+        encoding: str | None,
+        stored_at: float | None = None,
+        encoding_source: str | None = None,
+    ) -> int | None:
+        '''
+        Funzione: _write
+        Serializza, comprime e scrive atomicamente una voce su disco aggiornando l'indice.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL richiesto (chiave della cache)
+            int status_code -> Codice di stato HTTP
+            dict[str, str] headers -> Intestazioni della risposta
+            str final_url -> URL finale dopo i redirect
+            bytes content -> Corpo della risposta
+            str | None encoding -> Codifica rilevata
+            float | None stored_at -> Timestamp del salvataggio (None = adesso)
+            str | None encoding_source -> Livello del rilevamento che ha determinato la codifica
+        Valore di ritorno:
+            int | None -> Dimensione su disco della voce, o None se non è stata salvata
+        '''
+        meta = {
+            "status_code": status_code,
+            "headers": dict(headers),
+            "url": final_url,
+            "encoding": encoding,
+            "encoding_source": encoding_source,
+            "stored_at": stored_at if stored_at is not None else time.time(),
+        }
+        payload = json.dumps(meta).encode("utf-8") + b"\n" + (content or b"")
+        blob = zlib.compress(payload, self.compression_level)
+
+        if len(blob) > self.max_bytes:
+            logger.debug(f"Risposta troppo grande per la cache ({len(blob)} byte): {url}")
+            return None
+
+        key = self._key(url)
+        path = self._path(key)
+        tmp_path = None
+        try:
+            # File temporaneo unico per scrittura: due thread che salvano lo stesso URL non si sovrascrivono
+            with tempfile.NamedTemporaryFile(dir=self.cache_dir, prefix=f"{key}.", suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                f.write(blob)
+            os.replace(tmp_path, path) # scrittura atomica: un lettore concorrente non vede mai file parziali
+        except OSError as e:
+            logger.warning(f"Impossibile salvare in cache {url}: {e}")
+            if tmp_path:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            return None
+
+        with self._lock:
+            self._total_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(blob)
+            self._total_bytes += len(blob)
+        return len(blob)
+
+    def _read(self, key: str) -> CacheEntry | None:
+        '''
+        Funzione: _read
+        Legge e decomprime una voce dal disco.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str key -> Chiave (hash) della voce
+        Valore di ritorno:
+            CacheEntry | None -> La voce letta, o None se mancante o corrotta
+        '''
+        try:
+            with open(self._path(key), "rb") as f:
+                payload = zlib.decompress(f.read())
+            meta_raw, content = payload.split(b"\n", 1)
+            meta = json.loads(meta_raw)
+            return CacheEntry(
+                status_code=meta["status_code"],
+                headers=meta["headers"],
+                url=meta["url"],
+                content=content,
+                encoding=meta.get("encoding"),
+                stored_at=meta["stored_at"],
+                encoding_source=meta.get("encoding_source"),
+            )
+        except (OSError, ValueError, KeyError, zlib.error) as e:
+            logger.warning(f"Voce di cache illeggibile {key}: {e}")
+            return None
+
+    def _remove(self, key: str) -> None:
+        with self._lock:
+            self._total_bytes -= self._index.pop(key, 0)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def _evict_if_needed(self) -> None:
+        '''
+        Funzione: _evict_if_needed
+        Elimina le voci meno usate di recente finché la cache non rientra in max_bytes.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        to_delete = []
+        with self._lock:
+            while self._total_bytes > self.max_bytes and self._index:
+                key, size = self._index.popitem(last=False)
+                self._total_bytes -= size
+                self.stats["evictions"] += 1
+                to_delete.append(key)
+
+        for key in to_delete:
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+        if to_delete:
+            logger.debug(f"Cache: eliminate {len(to_delete)} voci per rispettare il limite di {self.max_bytes} byte")
+
+    def clear(self) -> None:
+        '''
+        Funzione: clear
+        Svuota completamente la cache su disco.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        with self._lock:
+            keys = list(self._index.keys())
+            self._index.clear()
+            self._total_bytes = 0
+        for key in keys:
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+        logger.info(f"Cache svuotata ({len(keys)} voci) in {self.cache_dir}")
+
+    def get_stats(self) -> dict[str, Any]:
+        '''
+        Funzione: get_stats
+        Restituisce i contatori della cache e l'occupazione corrente.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            dict[str, Any] -> Contatori (hits, misses, stale, revalidated, stores, evictions, bytes_served,
+                              bytes_stored, bytes_saved), entries e size_bytes
+        '''
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._index)
+            stats["size_bytes"] = self._total_bytes
+        lookups = stats["hits"] + stats["misses"] + stats["stale"]
+        # Una rivalidazione con 304 evita il trasferimento del corpo come un hit
+        stats["hit_ratio"] = ((stats["hits"] + stats["revalidated"]) / lookups) if lookups else 0.0
+        return stats
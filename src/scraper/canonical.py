@@ -0,0 +1,217 @@
+import logging
+import re
+from dataclasses import dataclass, replace
+from typing import Any
+from urllib.parse import quote, unquote, unquote_plus, urljoin, urlsplit, urlunsplit
+
+from scraper.scheduler import host_key
+from scraper.seen import UrlSeenSet
+
+logger = logging.getLogger("scraper.canonical")
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# Parametri di tracciamento/sessione che non cambiano il contenuto della pagina
+DEFAULT_STRIP_PARAMS = (
+    "utm_*", "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "_ga", "yclid",
+    "sessionid", "session_id", "sid", "phpsessid", "jsessionid", "aspsessionid", "cfid", "cftoken",
+)
+# File indice comuni, da indicare in CanonicalRules.index_files per i siti in cui /dir/ e /dir/index.html coincidono
+DEFAULT_INDEX_FILES = ("index.html", "index.htm", "index.php", "default.htm", "default.html", "default.aspx")
+# Parametri di sessione incorporati nel path (es. /page;jsessionid=ABC)
+_PATH_SESSION_RE = re.compile(r";(?:jsessionid|phpsessid|sid)=[^/?#]*", re.IGNORECASE)
+_PERCENT_RE = re.compile(r"%([0-9A-Fa-f]{2})")
+_UNRESERVED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+# Caratteri lasciati invariati nel path e nella query (riservati e già codificati)
+_SAFE_CHARS = "!$&'()*+,/:;=?@[]~%"
+
+
+def _normalize_escapes(component: str) -> str:
+    '''
+    Funzione: _normalize_escapes
+    Normalizza la codifica percentuale di una parte dell'URL (RFC 3986, 6.2.2): codifica spazi e caratteri
+    non ASCII, decodifica i caratteri non riservati (%7E -> ~) e porta in maiuscolo gli altri escape (%2b -> %2B).
+    I caratteri riservati codificati (%2B, %26, %3D, ...) restano codificati, quindi il significato non cambia.
+    Parametri formali:
+        str component -> Il path o un elemento della query
+    Valore di ritorno:
+        str -> La parte normalizzata
+    '''
+    def fix(match: re.Match) -> str:
+        char = chr(int(match.group(1), 16))
+        return char if char in _UNRESERVED else f"%{match.group(1).upper()}"
+    return _PERCENT_RE.sub(fix, quote(component, safe=_SAFE_CHARS))
+
+
+@dataclass(frozen=True)
+class CanonicalRules:
+    '''
+    Funzione: CanonicalRules
+    Insieme di regole di canonicalizzazione degli URL, globale o specifico di un sito.
+    Parametri formali:
+        tuple[str, ...] strip_params -> Parametri di query da rimuovere (case-insensitive; "prefisso*" per i prefissi)
+        bool sort_query -> Se True ordina i parametri di query
+        bool drop_default_port -> Se True rimuove :80 / :443
+        tuple[str, ...] index_files -> Nomi di file indice da togliere dalla fine del path (nessuno di default, vedi DEFAULT_INDEX_FILES)
+        bool strip_trailing_slash -> Se True rimuove lo slash finale (tranne che per la radice); di default no: /docs/ e /docs
+                                     possono essere pagine diverse
+        bool lowercase_path -> Se True porta il path in minuscolo (siti con path case-insensitive, es. IIS)
+        bool drop_empty_query -> Se True rimuove i parametri senza valore
+    '''
+    strip_params: tuple[str, ...] = DEFAULT_STRIP_PARAMS
+    sort_query: bool = True
+    drop_default_port: bool = True
+    index_files: tuple[str, ...] = ()
+    strip_trailing_slash: bool = False
+    lowercase_path: bool = False
+    drop_empty_query: bool = False
+
+    def strips(self, param: str) -> bool:
+        name = param.lower()
+        return any(
+            name.startswith(rule[:-1].lower()) if rule.endswith("*") else name == rule.lower()
+            for rule in self.strip_params
+        )
+
+
+class UrlCanonicalizer:
+    '''
+    Funzione: UrlCanonicalizer
+    Riduce a una forma canonica gli URL che indicano la stessa risorsa: host in minuscolo, porta di
+    default, frammento, codifica percentuale, parametri di tracciamento/sessione e ordine dei parametri
+    (file indice e slash finale solo se abilitati). La forma canonica è una chiave di deduplicazione:
+    i link di una pagina vanno risolti rispetto al suo URL effettivo. Le regole possono essere personalizzate per sito. Tiene statistiche su quanti URL distinti
+    sono stati ricondotti a uno già noto, cioè quanti download ha evitato.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        CanonicalRules | None rules -> Regole predefinite
+        dict[str, CanonicalRules] | None site_rules -> Regole per host (netloc in minuscolo)
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, rules: CanonicalRules | None = None, site_rules: dict[str, CanonicalRules] | None = None):
+        self.rules = rules or CanonicalRules()
+        self.site_rules: dict[str, CanonicalRules] = {host_key(host): r for host, r in (site_rules or {}).items()}
+        self.reset_stats()
+
+    def set_site_rules(self, host: str, **overrides: Any) -> CanonicalRules:
+        '''
+        Funzione: set_site_rules
+        Definisce le regole di un sito modificando quelle predefinite.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str host -> L'host (o un URL dell'host)
+            **overrides -> Campi di CanonicalRules da cambiare (es. lowercase_path=True)
+        Valore di ritorno:
+            CanonicalRules -> Le regole risultanti per il sito
+        '''
+        site = replace(self.rules, **overrides)
+        self.site_rules[host_key(host)] = site
+        return site
+
+    def rules_for(self, url: str) -> CanonicalRules:
+        return self.site_rules.get(host_key(url), self.rules)
+
+    def canonicalize(self, url: str, base_url: str | None = None) -> str | None:
+        '''
+        Funzione: canonicalize
+        Restituisce la forma canonica di un URL (assoluto o relativo a base_url) e aggiorna le statistiche.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL da canonicalizzare
+            str | None base_url -> L'URL base per risolvere URL relativi
+        Valore di ritorno:
+            str | None -> L'URL canonico, o None se l'URL non è valido
+        '''
+        try:
+            absolute_url = urljoin(base_url, url.strip()) if base_url else url.strip()
+            parts = urlsplit(absolute_url)
+        except ValueError as e:
+            logger.warning(f"URL non valido '{url}': {e}")
+            return None
+        # Forma "grezza": la normalizzazione minima usata in precedenza (senza frammento, decodificata)
+        raw = unquote(parts._replace(fragment="").geturl())
+        if parts.scheme not in DEFAULT_PORTS:
+            return raw
+
+        rules = self.rules_for(parts.netloc)
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").lower()
+        if not host:
+            return raw
+        try:
+            port = parts.port
+        except ValueError:
+            port = None
+        netloc = host if ":" not in host else f"[{host}]"
+        if port is not None and not (rules.drop_default_port and DEFAULT_PORTS.get(scheme) == port):
+            netloc = f"{netloc}:{port}"
+        if parts.username:
+            netloc = f"{parts.username}{':' + parts.password if parts.password else ''}@{netloc}"
+
+        path = _PATH_SESSION_RE.sub("", parts.path) or "/"
+        if rules.lowercase_path:
+            path = path.lower()
+        last_segment = path.rsplit("/", 1)[-1]
+        if last_segment and last_segment.lower() in rules.index_files:
+            path = path[: -len(last_segment)]
+        if rules.strip_trailing_slash and len(path) > 1 and path.endswith("/"):
+            path = path.rstrip("/") or "/"
+
+        # La query resta codificata com'è (a+b, c%2B%2B, %26 e ?flag senza "=" non cambiano significato)
+        params = []
+        for field in parts.query.split("&"):
+            if not field:
+                continue
+            name, _, value = field.partition("=")
+            if rules.strips(unquote_plus(name)) or (rules.drop_empty_query and not value):
+                continue
+            params.append((_normalize_escapes(name), _normalize_escapes(value), field))
+        if rules.sort_query:
+            params.sort(key=lambda param: (param[0], param[1]))
+        query = "&".join(
+            f"{name}={value}" if "=" in field else name for name, value, field in params
+        )
+
+        canonical = urlunsplit((scheme, netloc, _normalize_escapes(path), query, ""))
+        if self.scope is None or netloc in self.scope:
+            self._record(raw, canonical)
+        return canonical
+
+    def _record(self, raw: str, canonical: str) -> None:
+        if raw != canonical:
+            self._rewritten += 1
+        self._raw_seen.add(raw)
+        self._canonical_seen.add(canonical)
+
+    def reset_stats(self, scope: set[str] | None = None) -> None:
+        '''
+        Funzione: reset_stats
+        Azzera le statistiche e imposta gli host di cui contarle (es. i siti di un crawl: i link esterni non verrebbero scaricati).
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            set[str] | None scope -> Netloc canonici da considerare (None = tutti)
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        self.scope = {host_key(host) for host in scope} if scope is not None else None
+        self._rewritten = 0
+        self._raw_seen = UrlSeenSet()
+        self._canonical_seen = UrlSeenSet()
+
+    def get_stats(self) -> dict[str, int]:
+        '''
+        Funzione: get_stats
+        Restituisce le statistiche di canonicalizzazione dall'ultimo reset.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            dict[str, int] -> rewritten (URL modificati), distinct_raw (URL distinti prima della canonicalizzazione),
+                              distinct_canonical (URL distinti dopo), fetches_saved (differenza: download evitati)
+        '''
+        return {
+            "rewritten": self._rewritten,
+            "distinct_raw": len(self._raw_seen),
+            "distinct_canonical": len(self._canonical_seen),
+            "fetches_saved": len(self._raw_seen) - len(self._canonical_seen),
+        }
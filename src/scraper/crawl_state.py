@@ -0,0 +1,153 @@
+import json
+import logging
+import time
+from typing import Any
+
+from db.manager import DatabaseManager
+
+logger = logging.getLogger("scraper.crawl_state")
+
+# Checkpoint dopo questo numero di pagine completate o dopo questi secondi, il primo che scatta
+CHECKPOINT_PAGES = 25
+CHECKPOINT_SECONDS = 30.0
+
+
+class CrawlCheckpoint:
+    '''
+    Funzione: CrawlCheckpoint
+    Stato persistente di un crawl nel database websites (tabelle crawls e crawl_frontier): opzioni,
+    statistiche e ogni URL accodato con il flag "done". Le modifiche sono bufferizzate in memoria e
+    scritte a intervalli (checkpoint), così il costo per pagina resta trascurabile; dopo un'interruzione
+    gli URL non ancora marcati "done" vengono ripresi, quelli completati non vengono riscaricati.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        DatabaseManager db_manager -> Il gestore del database
+        int crawl_id -> ID della riga in crawls
+        dict options -> Opzioni del crawl (salvate ad ogni checkpoint)
+        int checkpoint_pages -> Pagine completate tra due checkpoint
+        float checkpoint_seconds -> Secondi massimi tra due checkpoint
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, db_manager: DatabaseManager, crawl_id: int, options: dict[str, Any],
+                 checkpoint_pages: int = CHECKPOINT_PAGES, checkpoint_seconds: float = CHECKPOINT_SECONDS):
+        self.db_manager = db_manager
+        self.crawl_id = crawl_id
+        self.options = options
+        self.checkpoint_pages = checkpoint_pages
+        self.checkpoint_seconds = checkpoint_seconds
+        self._enqueued: list[tuple[str, int]] = []
+        self._done: list[str] = []
+        self._last_flush = time.monotonic()
+
+    @classmethod
+    def create(cls, db_manager: DatabaseManager, start_url: str, options: dict[str, Any]) -> "CrawlCheckpoint":
+        '''
+        Funzione: create
+        Registra un nuovo crawl nel database.
+        Parametri formali:
+            cls -> Riferimento alla classe
+            DatabaseManager db_manager -> Il gestore del database (schema websites già inizializzato)
+            str start_url -> L'URL di partenza
+            dict options -> Opzioni del crawl
+        Valore di ritorno:
+            CrawlCheckpoint -> Lo stato del nuovo crawl
+        '''
+        with db_manager.transaction("websites") as cursor:
+            cursor.execute(
+                "INSERT INTO crawls (start_url, options) VALUES (?, ?)",
+                (start_url, json.dumps(options))
+            )
+            crawl_id = cursor.lastrowid
+        logger.info(f"Crawl {crawl_id} registrato per {start_url}")
+        return cls(db_manager, crawl_id, options)
+
+    @classmethod
+    def load(cls, db_manager: DatabaseManager, crawl_id: int) -> tuple["CrawlCheckpoint", dict[str, Any]] | None:
+        '''
+        Funzione: load
+        Carica un crawl salvato.
+        Parametri formali:
+            cls -> Riferimento alla classe
+            DatabaseManager db_manager -> Il gestore del database (schema websites già inizializzato)
+            int crawl_id -> ID del crawl
+        Valore di ritorno:
+            tuple[CrawlCheckpoint, dict] | None -> (stato, riga di crawls con options e stats decodificati), None se non esiste
+        '''
+        row = db_manager.fetch_one("SELECT * FROM crawls WHERE id = ?", (crawl_id,))
+        if not row:
+            return None
+        row["options"] = json.loads(row["options"] or "{}")
+        row["stats"] = json.loads(row["stats"] or "{}")
+        return cls(db_manager, crawl_id, row["options"]), row
+
+    def pending(self) -> list[tuple[str, int]]:
+        '''Restituisce gli URL accodati e non ancora completati, nell'ordine di inserimento.'''
+        rows = self.db_manager.fetch_all(
+            "SELECT url, depth FROM crawl_frontier WHERE crawl_id = ? AND done = 0 ORDER BY id",
+            (self.crawl_id,)
+        )
+        return [(row["url"], row["depth"]) for row in rows]
+
+    def done_urls(self) -> set[str]:
+        '''Restituisce gli URL già completati.'''
+        rows = self.db_manager.fetch_all(
+            "SELECT url FROM crawl_frontier WHERE crawl_id = ? AND done = 1",
+            (self.crawl_id,)
+        )
+        return {row["url"] for row in rows}
+
+    def enqueued(self, url: str, depth: int) -> None:
+        self._enqueued.append((url, depth))
+
+    def done(self, url: str) -> None:
+        self._done.append(url)
+
+    def maybe_flush(self, stats: dict[str, Any]) -> None:
+        '''
+        Funzione: maybe_flush
+        Esegue un checkpoint se sono state completate abbastanza pagine o è passato abbastanza tempo.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            dict stats -> Statistiche correnti del crawl
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        if len(self._done) >= self.checkpoint_pages or time.monotonic() - self._last_flush >= self.checkpoint_seconds:
+            self.flush(stats)
+
+    def flush(self, stats: dict[str, Any], status: str = "running") -> None:
+        '''
+        Funzione: flush
+        Scrive in un'unica transazione gli URL accodati e completati dall'ultimo checkpoint, le opzioni,
+        le statistiche e lo stato del crawl.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            dict stats -> Statistiche correnti del crawl
+            str status -> Stato da registrare ("running", "interrupted" o "completed")
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        try:
+            with self.db_manager.transaction("websites") as cursor:
+                # Prima gli inserimenti: un URL accodato e completato nello stesso intervallo deve risultare done
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO crawl_frontier (crawl_id, url, depth) VALUES (?, ?, ?)",
+                    [(self.crawl_id, url, depth) for url, depth in self._enqueued]
+                )
+                cursor.executemany(
+                    "UPDATE crawl_frontier SET done = 1 WHERE crawl_id = ? AND url = ?",
+                    [(self.crawl_id, url) for url in self._done]
+                )
+                cursor.execute(
+                    "UPDATE crawls SET status = ?, options = ?, stats = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    (status, json.dumps(self.options), json.dumps(stats, default=str), self.crawl_id)
+                )
+        except Exception as e:
+            logger.error(f"Errore durante il checkpoint del crawl {self.crawl_id}: {e}")
+            return
+        logger.debug(f"Checkpoint crawl {self.crawl_id}: {len(self._enqueued)} accodati, {len(self._done)} completati")
+        self._enqueued.clear()
+        self._done.clear()
+        self._last_flush = time.monotonic()
@@ -1,17 +1,30 @@
 import logging
 import time
-from collections import deque
-from urllib.parse import urlparse, urljoin, unquote
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from urllib.parse import urlparse, urljoin
 from colorama import Fore, Style
-from bs4 import BeautifulSoup
-from typing import Optional, Any
-from scraper.fetcher import WebFetcher
+from typing import Optional, Any, Callable, Iterable, Iterator, AsyncIterator
+from scraper.fetcher import WebFetcher, FetchResponse
+from scraper.frontier import HostFrontier, PriorityFrontier
+from scraper.link_scoring import LinkScorer
+from scraper.crawl_state import CrawlCheckpoint
+from scraper.seen import BloomUrlSet, UrlSeenSet
+from scraper.canonical import UrlCanonicalizer
+from scraper.simhash import SimHashIndex
+from scraper.sitemap import SitemapEntry, SitemapIngester
+from scraper.refresh import PageHistory, RefreshPolicy, content_hash, utc_now
+from scraper.traps import CrawlTrapDetector
+from scraper.domains import DOMAIN_COUNTERS, DomainCrawl, load_seeds
+from scraper.budget import CrawlBudget
+from scraper.events import (STATS_TICK_SECONDS, CrawlError, CrawlEvent, EntityFound, EventStream, LinkDiscovered, PageFetched,
+                            PageParsed, StatsTick)
+from scraper.scheduler import host_key
 from scraper.parser import WebParser
+from scraper.page_pipeline import PageResult, analyze_content, analyze_in_worker, init_parse_worker
 from scraper.utils.robots_parser import RobotsParser, RobotsData
 from db.manager import DatabaseManager
 from pathlib import Path
-from scraper.utils.extractors import extract_emails, extract_phone_numbers, filter_phone_numbers, filter_emails
-from scraper.utils.web_analysis import detect_framework, detect_js_libraries, detect_analytics
 import json
 
 
@@ -28,15 +41,20 @@ class Crawler:
         DatabaseManager db_manager -> Istanza di DatabaseManager per operazioni sul database
         osint_extractor -> Istanza opzionale di OSINTExtractor per profilazione OSINT
         dict[str, Path] base_dirs -> Dizionario con le directory di base per il salvataggio
+        UrlCanonicalizer | None canonicalizer -> Canonicalizzatore degli URL (regole predefinite se None)
+        RefreshPolicy | None refresh_policy -> Politica di ricontrollo per i crawl incrementali (predefinita se None)
+        CrawlTrapDetector | None trap_detector -> Rilevatore di trappole per crawler consultato prima di accodare (limiti predefiniti se None)
+        UrlSeenSet | BloomUrlSet | None seen_urls -> Insieme degli URL già visti (UrlSeenSet esatto se None; BloomUrlSet per memoria fissa)
     Valore di ritorno:
         None -> Il costruttore non restituisce un valore esplicito
     '''
-    def __init__(self, fetcher: WebFetcher, parser: WebParser, db_manager: DatabaseManager, osint_extractor=None, base_dirs: dict[str, Path] = None):
+    def __init__(self, fetcher: WebFetcher, parser: WebParser, db_manager: DatabaseManager, osint_extractor=None, base_dirs: dict[str, Path] = None, canonicalizer: UrlCanonicalizer | None = None, refresh_policy: RefreshPolicy | None = None, trap_detector: CrawlTrapDetector | None = None, seen_urls: UrlSeenSet | BloomUrlSet | None = None):
         self.fetcher = fetcher
+        self.canonicalizer = canonicalizer or UrlCanonicalizer()
         self.parser = parser
         self.db_manager = db_manager
         self.osint_extractor = osint_extractor
-        self.visited_urls = set()
+        self.seen_urls = seen_urls if seen_urls is not None else UrlSeenSet() # URL già accodati o visitati (deduplicati all'accodamento)
         self.base_domain = ""
         self.base_dirs = base_dirs or {}
         self.current_site_dir = None
@@ -44,6 +62,25 @@ class Crawler:
         self.robots_parser = RobotsParser()
         self.robots_data: Optional[RobotsData] = None
         self.respect_robots = True
+        self._checkpoint: CrawlCheckpoint | None = None
+        self.simhash_index = SimHashIndex() # impronte delle pagine del crawl corrente
+        self.refresh_policy = refresh_policy or RefreshPolicy()
+        self.trap_detector = trap_detector or CrawlTrapDetector()
+        self.link_scorer = LinkScorer()
+        self._best_first = False
+        self._incremental = False
+        self._extract_osint = False # estrazione di email, telefoni e tecnologie durante l'analisi delle pagine
+        self._domains: dict[str, DomainCrawl] = {} # domini di un crawl multi-dominio (vuoto nei crawl di un solo sito)
+        self._active_domain: DomainCrawl | None = None
+        self._budget = CrawlBudget() # limiti di costo del crawl corrente
+        self._prep_pool: ThreadPoolExecutor | None = None # download di robots.txt dei domini di un crawl multi-dominio
+        self._prep_options: dict[str, Any] = {} # opzioni con cui preparare i domini non ancora pronti
+        self._on_event: Callable[[CrawlEvent], None] | None = None # consumatore degli eventi (vedi iter_events)
+        self._started_at = 0.0
+        self._tick_at = 0.0
+        self._sitemap_lastmod: dict[str, str] = {} # lastmod dichiarati nelle sitemap (solo crawl incrementali)
+        self._histories: dict[str, PageHistory | None] = {} # storico delle pagine in download, letto in _next_batch
+        self._revalidate: dict[str, dict[str, str]] = {} # validatori da inviare per le pagine da ricontrollare
 
     def set_osint_extractor(self, extractor):
         '''
@@ -63,7 +100,8 @@ class Crawler:
     def _normalize_url(self, url: str, base_url: str) -> str | None:
         '''
         Funzione: _normalize_url
-        Normalizza un URL relativo o assoluto rispetto a un URL base, rimuovendo frammenti e decodificando.
+        Risolve un URL relativo o assoluto rispetto a un URL base e lo riduce alla forma canonica
+        (vedi UrlCanonicalizer): è la forma usata per la deduplicazione, pages.url e links.href.
         Parametri formali:
             self -> Riferimento all'istanza della classe
             str url -> L'URL da normalizzare
@@ -72,13 +110,7 @@ class Crawler:
             str | None -> L'URL normalizzato o None in caso di errore
         '''
         try:
-            absolute_url = urljoin(base_url, url.strip())
-            parsed_url = urlparse(absolute_url)
-            clean_url = parsed_url._replace(fragment="").geturl()
-            clean_url = unquote(clean_url)
-            if clean_url.endswith("/") and parsed_url.path != "/":
-                clean_url = clean_url.rstrip("/")
-            return clean_url
+            return self.canonicalizer.canonicalize(url, base_url)
         except Exception as e:
             logger.warning(f"Errore normalizzazione URL '{url}': {e}")
             return None
@@ -102,7 +134,9 @@ class Crawler:
             return False
 
  
-    def _save_page_info(self, url: str, title: str, status_code: int, content_length: int, content_type: str) -> Optional[int]:
+    def _save_page_info(self, url: str, title: str, status_code: int, content_length: int, content_type: str, fingerprint: int | None = None,
+                        body_hash: str | None = None, etag: str | None = None, last_modified: str | None = None,
+                        refresh_interval: float | None = None, changed: bool = True) -> Optional[int]:
         '''
         Funzione: _save_page_info
         Salva le informazioni di una pagina nel database o le aggiorna se esistenti.
@@ -113,10 +147,18 @@ class Crawler:
             int status_code -> Codice di stato HTTP della risposta
             int content_length -> Dimensione del contenuto in byte
             str content_type -> Tipo di contenuto (es. text/html)
+            int | None fingerprint -> Impronta SimHash del contenuto (salvata in esadecimale)
+            str | None body_hash -> Hash del contenuto (vedi refresh.content_hash)
+            str | None etag -> Intestazione ETag della risposta
+            str | None last_modified -> Intestazione Last-Modified della risposta
+            float | None refresh_interval -> Nuovo intervallo di ricontrollo in secondi (None = quello iniziale della politica)
+            bool changed -> Se il contenuto è cambiato dall'ultimo controllo (aggiorna last_changed e change_count)
         Valore di ritorno:
             int | None -> ID della pagina salvata/aggiornata, o None in caso di errore
         '''
         domain = urlparse(url).netloc
+        simhash_hex = f"{fingerprint:016x}" if fingerprint is not None else None
+        next_check = self._next_check_modifier(refresh_interval)
         website_id = self._get_or_create_website(domain)
         if not website_id:
             logger.error(f"Impossibile ottenere o creare website_id per il dominio {domain}")
@@ -134,15 +176,21 @@ class Crawler:
                 if existing_page:
                     page_id = existing_page['id']
                     cursor.execute(
-                        "UPDATE pages SET status_code = ?, content_length = ?, content_type = ?, last_checked = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-                        (status_code, content_length, content_type, page_id)
+                        "UPDATE pages SET status_code = ?, content_length = ?, content_type = ?, simhash = ?, content_hash = ?, etag = ?, last_modified = ?, "
+                        "refresh_interval = ?, next_check = datetime('now', ?), "
+                        "last_changed = CASE WHEN ? THEN CURRENT_TIMESTAMP ELSE last_changed END, change_count = change_count + ?, "
+                        "last_checked = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                        (status_code, content_length, content_type, simhash_hex, body_hash, etag, last_modified,
+                         next_check[0], next_check[1], changed, int(changed), page_id)
                     )
                     logger.info(f"Pagina '{url}' aggiornata (ID: {page_id}).")
                     return page_id
                 else:
                     cursor.execute(
-                        "INSERT INTO pages (website_id, url, title, status_code, content_length, content_type) VALUES (?, ?, ?, ?, ?, ?)",
-                        (website_id, url, title, status_code, content_length, content_type)
+                        "INSERT INTO pages (website_id, url, title, status_code, content_length, content_type, simhash, content_hash, etag, last_modified, "
+                        "refresh_interval, next_check, last_changed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now', ?), CURRENT_TIMESTAMP)",
+                        (website_id, url, title, status_code, content_length, content_type, simhash_hex, body_hash, etag, last_modified,
+                         next_check[0], next_check[1])
                     )
                     return cursor.lastrowid
 
@@ -150,6 +198,68 @@ class Crawler:
             logger.error(f"Errore durante il salvataggio della pagina '{url}': {e}")
             return None
 
+    def _next_check_modifier(self, refresh_interval: float | None) -> tuple[float, str]:
+        # Intervallo effettivo e modificatore SQLite per datetime('now', ...)
+        interval = refresh_interval if refresh_interval is not None else self.refresh_policy.initial_interval
+        return interval, f"+{int(interval)} seconds"
+
+    def _load_page_history(self, url: str) -> PageHistory | None:
+        '''
+        Funzione: _load_page_history
+        Legge lo storico di controllo di una pagina già salvata nel database websites.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> URL (canonico) della pagina
+        Valore di ritorno:
+            PageHistory | None -> Lo storico, o None se la pagina non è mai stata scaricata
+        '''
+        row = self.db_manager.fetch_one(
+            "SELECT id, content_hash, etag, last_modified, refresh_interval, next_check, last_checked FROM pages WHERE url = ?",
+            (url,)
+        )
+        return PageHistory.from_row(row) if row else None
+
+    def _record_unchanged(self, history: PageHistory) -> None:
+        '''
+        Funzione: _record_unchanged
+        Registra un controllo che ha trovato la pagina invariata (risposta 304): allunga l'intervallo di ricontrollo.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            PageHistory history -> Lo storico della pagina
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        interval, modifier = self._next_check_modifier(self.refresh_policy.next_interval(history.refresh_interval, changed=False))
+        try:
+            with self.db_manager.transaction("websites") as cursor:
+                cursor.execute(
+                    "UPDATE pages SET refresh_interval = ?, next_check = datetime('now', ?), last_checked = CURRENT_TIMESTAMP WHERE id = ?",
+                    (interval, modifier, history.page_id)
+                )
+        except Exception as e:
+            logger.error(f"Errore durante l'aggiornamento dello storico della pagina ID {history.page_id}: {e}")
+
+    def _expand_stored_links(self, page_id: int, current_depth: int, queue: HostFrontier, depth_limit: int) -> None:
+        '''
+        Funzione: _expand_stored_links
+        Accoda i link interni salvati al download precedente di una pagina non riscaricata (saltata o 304),
+        così il crawl incrementale raggiunge comunque le pagine sottostanti.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            int page_id -> ID della pagina
+            int current_depth -> Profondità della pagina nel crawling
+            HostFrontier queue -> La frontiera del crawler
+            int depth_limit -> Il limite massimo di profondità del crawling
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        if current_depth >= depth_limit:
+            return
+        rows = self.db_manager.fetch_all("SELECT href FROM links WHERE page_id = ? AND is_internal = 1", (page_id,))
+        for row in rows:
+            if self._is_internal_url(row["href"]):
+                self._enqueue(queue, row["href"], current_depth + 1)
+
     def _get_or_create_website(self, domain: str) -> Optional[int]:
         '''
         Funzione: _get_or_create_website
@@ -291,7 +401,8 @@ class Crawler:
         Valore di ritorno:
             tuple[Path, str] -> (directory di salvataggio, nome file)
         '''
-        if not self.current_site_dir:
+        site_dir = self._site_dir_for(url)
+        if not site_dir:
             logger.error("Site directory not initialized")
             return Path("."), "error.html"
 
@@ -300,13 +411,13 @@ class Crawler:
         
         # Determine the content directory based on content type
         if 'html' in content_type_header or not content_type_header:
-            base_dir = self.current_site_dir / "html"
+            base_dir = site_dir / "html"
         elif any(ext in content_type_header for ext in ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'svg', 'webp', 'ico']):
-            base_dir = self.current_site_dir / "images"
+            base_dir = site_dir / "images"
         elif any(ext in content_type_header for ext in ['pdf', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx', 'txt', 'rtf', 'csv', 'xml', 'json']):
-            base_dir = self.current_site_dir / "documents"
+            base_dir = site_dir / "documents"
         else:
-            base_dir = self.current_site_dir / "other"
+            base_dir = site_dir / "other"
         # Create subdirectories based on URL path
         if path_components and path_components[0]:
             current_dir = base_dir
@@ -337,6 +448,26 @@ class Crawler:
         
         return current_dir, file_name
 
+    def _site_dir_for(self, url: str) -> Path | None:
+        '''Directory di salvataggio del sito di un URL (nei crawl multi-dominio quella del suo dominio).'''
+        if self._domains and (domain := self._domains.get(host_key(url))):
+            return domain.site_dir
+        return self.current_site_dir
+
+    def _stream_destination(self, url: str, content_type_header: str) -> Path:
+        '''
+        Funzione: _stream_destination
+        Destinazione su disco per i contenuti binari scaricati in streaming dal fetcher.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL del contenuto
+            str content_type_header -> Il tipo di contenuto HTTP
+        Valore di ritorno:
+            Path -> Il percorso completo del file
+        '''
+        save_dir, file_name = self._get_file_path_for_url(url, content_type_header)
+        return save_dir / file_name
+
     def _save_robots_data(self, website_id: int, robots_data: RobotsData, robots_content: str) -> Optional[int]:
         """Save robots.txt data to database"""
         try:
@@ -368,21 +499,37 @@ class Crawler:
             logger.error(f"Error saving robots.txt data: {e}")
             return None
 
-    def _fetch_and_parse_robots(self, base_url: str, queue: deque) -> Optional[RobotsData]:
-        """Fetch and parse robots.txt for a given domain"""
+    def _download_robots(self, base_url: str, timeout: float = 30, retries: int | None = None) -> FetchResponse | None:
+        '''Scarica robots.txt di un sito; può essere eseguita da un thread di preparazione (vedi _start_domain_preparation).'''
         robots_url = urljoin(base_url, "/robots.txt")
         logger.info(f"Fetching robots.txt from {robots_url}")
-        
-        robots_content = self.fetcher.fetch(robots_url)
-        if not robots_content:
+        # Crawl sovrapposti sullo stesso sito condividono questo download (single-flight nel fetcher)
+        return self.fetcher.fetch_full_response(robots_url, timeout=timeout, retries=retries)
+
+    def _fetch_and_parse_robots(self, base_url: str, queue: HostFrontier, respect_robots: bool | None = None, prefetched: Future | None = None) -> Optional[RobotsData]:
+        """Fetch and parse robots.txt for a given domain (respect_robots given = skip the interactive choice;
+        prefetched = download already started by _start_domain_preparation)"""
+        robots_url = urljoin(base_url, "/robots.txt")
+        if prefetched is None:
+            robots_response = self._download_robots(base_url)
+        else:
+            try:
+                robots_response = prefetched.result()
+            except Exception as e:
+                logger.warning(f"Download di {robots_url} fallito: {e}")
+                robots_response = None
+        if not robots_response or robots_response.status_code != 200 or not robots_response.content:
             logger.warning(f"No robots.txt found at {robots_url}")
             return None
+        robots_content = robots_response.content.decode(robots_response.encoding or 'utf-8', errors='replace')
             
         robots_data = self.robots_parser.parse(robots_content, base_url)
         self.robots_parser.print_analysis(robots_data, base_url)
         
         # Interactive choice for robots.txt compliance
-        while True:
+        if respect_robots is not None:
+            self.respect_robots = respect_robots
+        while respect_robots is None:
             print(f"\n{Fore.YELLOW}Do you want to respect robots.txt rules?{Style.RESET_ALL}")
             print(f"  {Fore.YELLOW}y{Style.RESET_ALL} - Yes, follow robots.txt rules (ethical)")
             print(f"  {Fore.RED}n{Style.RESET_ALL} - No, ignore robots.txt rules and crawl restricted paths")
@@ -400,12 +547,12 @@ class Crawler:
                     if disallowed_paths:
                         print(f"\n{Fore.YELLOW}Adding {len(disallowed_paths)} restricted paths to crawl queue:{Style.RESET_ALL}")
                         for path in disallowed_paths:
-                            target_url = urljoin(base_url, path)
+                            target_url = self._normalize_url(path, base_url) or urljoin(base_url, path)
                             if path.endswith('/'):  # È una directory
                                 print(f"  {Fore.BLUE}[DIR]{Style.RESET_ALL} {target_url}")
                             else:
                                 print(f"  {Fore.MAGENTA}[FILE]{Style.RESET_ALL} {target_url}")
-                            queue.append((target_url, 0))  # Aggiungi con profondità 0 per assicurare l'esplorazione
+                            self._enqueue(queue, target_url, 0)  # Aggiungi con profondità 0 per assicurare l'esplorazione
                         
                         # Se ci sono path sensibili, evidenziali in modo speciale
                         sensitive_paths = [path for path in disallowed_paths 
@@ -433,19 +580,487 @@ class Crawler:
             
         return self.robots_parser.is_allowed(url, self.robots_data.rules)
 
-    def start_crawl(self, start_url: str, depth_limit: int = 2, politeness_delay: float = 1.0, perform_osint_on_pages: bool = False, save_to_disk: bool = True) -> dict:
+    def _seed_from_sitemaps(self, start_url: str, queue: HostFrontier, max_seeds: int = 50000, deadline: float | None = None) -> dict[str, int]:
+        '''
+        Funzione: _seed_from_sitemaps
+        Accoda gli URL del sito elencati nelle sitemap (quelle dichiarate in robots.txt, altrimenti /sitemap.xml),
+        in ordine di priority e poi di lastmod decrescenti, e stima la dimensione del crawl dal numero di URL elencati.
+        Le sitemap sono lette in streaming; in memoria restano al più max_seeds voci da ordinare.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str start_url -> L'URL di partenza del crawl
+            HostFrontier queue -> La frontiera da popolare
+            int max_seeds -> Numero massimo di URL da accodare
+            float | None deadline -> Istante (time.monotonic) oltre il quale si smette di leggere le sitemap
+        Valore di ritorno:
+            dict[str, int] -> sitemaps_read, sitemaps_failed, urls_listed, urls_in_scope, seeded, estimated_pages
+        '''
+        declared = self.robots_data.sitemaps if self.robots_data and self.robots_data.sitemaps else ["/sitemap.xml"]
+        sitemap_urls = [urljoin(start_url, sitemap) for sitemap in declared]
+        ingester = SitemapIngester(self.fetcher)
+        in_scope = UrlSeenSet()
+        candidates: list[SitemapEntry] = []
+
+        for entry in ingester.iter_entries(sitemap_urls, accept_sitemap=self._is_internal_url):
+            if deadline is not None and time.monotonic() > deadline:
+                logger.warning(f"Tempo di preparazione esaurito per {urlparse(start_url).netloc}: lettura delle sitemap interrotta")
+                break
+            url = self._normalize_url(entry.loc, start_url)
+            if not url or not self._is_internal_url(url) or not in_scope.add(url):
+                continue
+            if len(candidates) < max_seeds:
+                entry.loc = url
+                candidates.append(entry)
+                if self._incremental and entry.lastmod:
+                    self._sitemap_lastmod[url] = entry.lastmod
+
+        # Prima le pagine dichiarate più importanti, poi le più recenti (le date W3C si ordinano come stringhe)
+        candidates.sort(key=lambda e: (e.priority if e.priority is not None else 0.5, e.lastmod or ""), reverse=True)
+        # Nel crawl best-first l'ordine di estrazione lo decide il punteggio dei link
+        priorities = self.link_scorer.score_batch([(e.loc, "", 1) for e in candidates]) if self._best_first else [0.0] * len(candidates)
+        seeded = 0
+        for entry, priority in zip(candidates, priorities):
+            if queue.full:
+                logger.warning(f"Frontiera piena: {len(candidates) - seeded} URL delle sitemap non accodati")
+                break
+            if self._enqueue(queue, entry.loc, 1, priority):
+                seeded += 1
+
+        # Le pagine elencate più quelle già in coda (start URL, percorsi robots) danno una stima dal basso
+        sitemap_stats = {**ingester.stats, "urls_in_scope": len(in_scope), "seeded": seeded,
+                         "estimated_pages": len(in_scope) + len(queue) - seeded}
+        print(f"{Fore.CYAN}Sitemap: {sitemap_stats['urls_in_scope']} URL del sito in {sitemap_stats['sitemaps_read']} sitemap, "
+              f"{seeded} accodati. Stima del crawl: ~{sitemap_stats['estimated_pages']} pagine{Style.RESET_ALL}")
+        return sitemap_stats
+
+    def _next_batch(self, queue: HostFrontier, depth_limit: int, size: int, stats: dict) -> list[tuple[str, int]]:
+        '''
+        Funzione: _next_batch
+        Estrae dalla frontiera fino a `size` URL da scaricare, scartando quelli oltre il limite di profondità
+        o bloccati da robots.txt (i duplicati sono già esclusi all'accodamento da _enqueue). Nei crawl incrementali
+        salta le pagine non ancora da ricontrollare (accodandone i link salvati) e prepara i validatori per quelle
+        da ricontrollare. Per ciascun URL restituito il chiamante deve poi invocare queue.task_done.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            HostFrontier queue -> La frontiera del crawler con tuple (url, profondità)
+            int depth_limit -> Il limite massimo di profondità del crawling
+            int size -> Numero massimo di URL da estrarre
+            dict stats -> Statistiche del crawling da aggiornare
+        Valore di ritorno:
+            list[tuple[str, int]] -> Lista di tuple (url, profondità) da scaricare
+        '''
+        self._prepare_ready_domains(queue)
+        batch: list[tuple[str, int]] = []
+        while len(batch) < size and (item := queue.pop_ready()) is not None:
+            current_url, current_depth = item
+
+            if current_depth > depth_limit:
+                logger.debug(f"Raggiunto limite profondità per: {current_url}")
+                queue.task_done(current_url)
+                self._mark_done(current_url)
+                continue
+
+            domain = self._enter_domain(current_url)
+
+            # Check robots.txt rules
+            if not self._should_crawl_url(current_url):
+                logger.info(f"Skipping {current_url} (blocked by robots.txt)")
+                queue.task_done(current_url)
+                self._mark_done(current_url)
+                continue
+
+            # Budget per host: gli URL rimanenti del dominio vengono scartati, gli altri domini proseguono
+            if domain and self._budget.host_exhausted(domain.dispatched):
+                if 'budget_hit' not in domain.stats:
+                    domain.stats['budget_hit'] = 'max_pages_per_host'
+                    logger.info(f"Budget di {self._budget.max_pages_per_host} pagine raggiunto per {domain.domain}")
+                queue.task_done(current_url)
+                self._mark_done(current_url)
+                continue
+
+            if self._incremental:
+                history = self._load_page_history(current_url)
+                action = self.refresh_policy.decide(history, utc_now(), self._sitemap_lastmod.pop(current_url, None))
+                if action == "skip":
+                    logger.info(f"Pagina '{current_url}' non ancora da ricontrollare: uso i link salvati")
+                    stats['incremental']['skipped'] += 1
+                    queue.task_done(current_url)
+                    self._expand_stored_links(history.page_id, current_depth, queue, depth_limit)
+                    self._mark_done(current_url)
+                    continue
+                self._histories[current_url] = history
+                if action == "revalidate" and (validators := history.conditional_headers()):
+                    self._revalidate[current_url] = validators
+
+            print(f"{Fore.YELLOW}Crawling{Style.RESET_ALL}: {current_url} (Profondità: {current_depth})")
+            batch.append((current_url, current_depth))
+            if domain:
+                domain.dispatched += 1
+        return batch
+
+    @staticmethod
+    def _page_base_url(current_url: str, page_response: FetchResponse | None) -> str:
+        '''
+        Funzione: _page_base_url
+        URL rispetto a cui risolvere i link di una pagina: quello effettivo della risposta (dopo i redirect),
+        non la forma canonica usata come chiave, che può differire nel path (es. slash finale).
+        Parametri formali:
+            str current_url -> URL (canonico) della pagina
+            FetchResponse | None page_response -> La risposta scaricata
+        Valore di ritorno:
+            str -> L'URL base per i link relativi
+        '''
+        return (page_response.url if page_response and page_response.url else None) or current_url
+
+    def _analyze_response(self, current_url: str, page_response: FetchResponse | None) -> PageResult:
+        '''
+        Funzione: _analyze_response
+        Analizza una risposta testuale con analyze_content: parsing, impronta SimHash e, in modalità OSINT,
+        estrazione di email, telefoni e tecnologie.
+        Non accede al database, quindi può essere eseguita dai worker del crawl concorrente.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str current_url -> URL della pagina
+            FetchResponse | None page_response -> La risposta scaricata
+        Valore di ritorno:
+            PageResult -> Il risultato dell'analisi (is_text False se non applicabile)
+        '''
+        if not page_response or not page_response.content:
+            return PageResult()
+        return analyze_content(self.parser, self._page_base_url(current_url, page_response), page_response.content,
+                               page_response.encoding, page_response.headers, self._osint_domain(current_url))
+
+    def _osint_domain(self, url: str) -> str | None:
+        '''Dominio della pagina per il filtro delle email se il crawl estrae entità OSINT, altrimenti None.'''
+        return urlparse(url).netloc if self._extract_osint else None
+
+    def _needs_analysis(self, page_response: FetchResponse | None) -> bool:
+        '''Indica se una risposta va analizzata (contenuto in memoria, non una 304 di un crawl incrementale).'''
+        return bool(page_response and page_response.content and page_response.status_code != 304)
+
+    def _fetch_and_analyze(self, current_url: str, destination, conditional_headers: dict[str, str] | None = None) -> tuple[FetchResponse | None, PageResult]:
+        '''
+        Funzione: _fetch_and_analyze
+        Lavoro di un worker del crawl concorrente: download e parsing di un URL.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str current_url -> URL da scaricare
+            destination -> Destinazione su disco dei contenuti binari (vedi WebFetcher.fetch_full_response)
+            dict[str, str] | None conditional_headers -> Validatori salvati per una GET condizionale (crawl incrementale)
+        Valore di ritorno:
+            tuple[FetchResponse | None, PageResult] -> (risposta, risultato di _analyze_response)
+        '''
+        page_response = self.fetcher.fetch_full_response(current_url, destination=destination, conditional_headers=conditional_headers)
+        return page_response, self._analyze_response(current_url, page_response)
+
+    def _process_page(self, current_url: str, current_depth: int, page_response: FetchResponse | None, queue: HostFrontier, stats: dict, osint_findings_summary: dict, depth_limit: int, perform_osint_on_pages: bool, save_to_disk: bool, analysis: PageResult | None = None) -> None:
+        '''
+        Funzione: _process_page
+        Elabora una pagina scaricata con _handle_page; nei crawl multi-dominio attiva prima il contesto del
+        dominio della pagina e ne aggiorna le statistiche (contatori di DOMAIN_COUNTERS).
+        Parametri formali: come _handle_page
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        domain = self._enter_domain(current_url)
+        if domain is None:
+            self._handle_page(current_url, current_depth, page_response, queue, stats, osint_findings_summary,
+                              depth_limit, perform_osint_on_pages, save_to_disk, analysis)
+        else:
+            before = [stats.get(counter, 0) for counter in DOMAIN_COUNTERS]
+            try:
+                self._handle_page(current_url, current_depth, page_response, queue, stats, osint_findings_summary,
+                                  depth_limit, perform_osint_on_pages, save_to_disk, analysis)
+            finally:
+                for counter, value in zip(DOMAIN_COUNTERS, before):
+                    domain.stats[counter] += stats.get(counter, 0) - value
+        self._stats_tick(stats, queue)
+
+    def _emit(self, event: CrawlEvent) -> None:
+        '''Consegna un evento al consumatore del crawl, se presente (vedi iter_events).'''
+        if self._on_event:
+            self._on_event(event)
+
+    def _stats_tick(self, stats: dict, queue: HostFrontier) -> None:
+        '''Emette un evento StatsTick con l'avanzamento del crawl, al più uno ogni STATS_TICK_SECONDS secondi.'''
+        now = time.monotonic()
+        if not self._on_event or now - self._tick_at < STATS_TICK_SECONDS:
+            return
+        self._tick_at = now
+        snapshot = {counter: stats.get(counter, 0) for counter in DOMAIN_COUNTERS}
+        snapshot.update(queued=len(queue), elapsed_seconds=round(now - self._started_at, 1))
+        self._emit(StatsTick(snapshot))
+
+    def _found_entity(self, osint_findings_summary: dict, page_url: str, entity_type: str, entity: Any, profile_details: dict) -> None:
+        '''
+        Funzione: _found_entity
+        Registra un'entità OSINT trovata. Se il crawl ha un consumatore di eventi l'entità gli viene consegnata
+        come EntityFound e nel riepilogo resta solo il conteggio per tipo; altrimenti viene aggiunta al riepilogo.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            dict osint_findings_summary -> Riepilogo OSINT da aggiornare
+            str page_url -> Pagina in cui è stata trovata l'entità
+            str entity_type -> Tipo dell'entità (email, phone_numbers_found, technologies, social_profile)
+            Any entity -> L'entità
+            dict profile_details -> Dettagli o profilo dell'entità
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        counts = osint_findings_summary["entity_counts"]
+        counts[entity_type] = counts.get(entity_type, 0) + 1
+        if self._on_event:
+            self._emit(EntityFound(page_url, entity_type, entity, profile_details))
+        elif entity_type == "technologies":
+            osint_findings_summary["page_technologies"][page_url] = entity
+        else:
+            osint_findings_summary["entities_profiled"].append({
+                "page_url": page_url,
+                "entity_type": entity_type,
+                "entity": entity,
+                "profile_details": profile_details
+            })
+
+    @staticmethod
+    def _response_size(page_response: FetchResponse | None) -> int:
+        '''Byte scaricati per una risposta: il corpo in memoria o il file scritto in streaming.'''
+        if not page_response:
+            return 0
+        if page_response.content:
+            return len(page_response.content)
+        if page_response.file_path:
+            try:
+                return Path(page_response.file_path).stat().st_size
+            except OSError:
+                return 0
+        return 0
+
+    def _enter_domain(self, url: str) -> DomainCrawl | None:
+        '''
+        Funzione: _enter_domain
+        Nei crawl multi-dominio attiva il contesto del dominio di un URL (dominio base, robots.txt, directory
+        di salvataggio, impronte SimHash), usato dai metodi che lavorano su un sito alla volta. Va chiamata solo da questo thread.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL da elaborare
+        Valore di ritorno:
+            DomainCrawl | None -> Il dominio attivo, None nei crawl di un solo sito
+        '''
+        if not self._domains:
+            return None
+        domain = self._domains.get(host_key(url))
+        if domain is not None and domain is not self._active_domain:
+            self.base_domain = domain.domain
+            self.robots_data = domain.robots_data
+            self.respect_robots = domain.respect_robots
+            self.current_site_dir = domain.site_dir
+            self.simhash_index = domain.simhash_index
+            self._active_domain = domain
+        return domain
+
+    def _handle_page(self, current_url: str, current_depth: int, page_response: FetchResponse | None, queue: HostFrontier, stats: dict, osint_findings_summary: dict, depth_limit: int, perform_osint_on_pages: bool, save_to_disk: bool, analysis: PageResult | None = None) -> None:
+        '''
+        Funzione: _handle_page
+        Elabora una pagina scaricata: salvataggio su disco, parsing, salvataggio nel database,
+        accodamento dei link interni e analisi OSINT.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str current_url -> URL della pagina
+            int current_depth -> Profondità della pagina nel crawling
+            FetchResponse | None page_response -> La risposta scaricata (None se il download è fallito)
+            HostFrontier queue -> La frontiera del crawler in cui accodare i nuovi link
+            dict stats -> Statistiche del crawling da aggiornare
+            dict osint_findings_summary -> Riepilogo OSINT da aggiornare
+            int depth_limit -> Il limite massimo di profondità del crawling
+            bool perform_osint_on_pages -> Se True, esegue la profilazione OSINT sulla pagina
+            bool save_to_disk -> Se True, salva il file su disco
+            PageResult | None analysis -> Risultato di _analyze_response già calcolato da un worker o processo (None = calcolalo qui)
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        stats['urls_visited'] += 1
+        size = self._response_size(page_response)
+        stats['bytes_downloaded'] += size
+        if self._on_event:
+            self._emit(PageFetched(current_url, current_depth, page_response.status_code if page_response else None, size,
+                                   page_response.headers.get('Content-Type', '') if page_response else ""))
+        history = self._histories.pop(current_url, None)
+
+        if page_response and page_response.status_code == 304 and history:
+            # Revalidazione riuscita: la pagina non è cambiata, se ne seguono i link salvati
+            logger.info(f"Pagina '{current_url}' non modificata (304)")
+            stats['incremental']['unchanged'] += 1
+            self._record_unchanged(history)
+            self._expand_stored_links(history.page_id, current_depth, queue, depth_limit)
+            return
+
+        if page_response and page_response.file_path:
+            # Contenuto binario già scritto su disco in streaming dal fetcher
+            stats['pages_saved'] += 1
+            logger.info(f"Pagina '{current_url}' salvata in '{page_response.file_path}'")
+            return
+
+        if not page_response or not page_response.content:
+            logger.warning(f"Nessun contenuto scaricato per {current_url}. Status: {page_response.status_code if page_response else 'N/A'}")
+            stats['errors'] += 1
+            self._emit(CrawlError(current_url, f"Nessun contenuto scaricato (status: {page_response.status_code if page_response else 'N/A'})"))
+            return
+
+        page_content_bytes = page_response.content
+        content_type_header = page_response.headers.get('Content-Type', '').lower()
+
+        # Save file to disk only in download mode
+        if save_to_disk and not perform_osint_on_pages:
+            try:
+                save_dir, file_name = self._get_file_path_for_url(current_url, content_type_header)
+                save_path = save_dir / file_name
+                save_path.parent.mkdir(parents=True, exist_ok=True)
+
+                with open(save_path, 'wb') as f:
+                    f.write(page_content_bytes)
+                stats['pages_saved'] += 1
+                logger.info(f"Pagina '{current_url}' salvata in '{save_path}'")
+
+            except Exception as e:
+                logger.error(f"Errore salvataggio {current_url} in {save_path if 'save_path' in locals() else 'N/A'}: {e}", exc_info=True)
+                stats['errors'] += 1
+                self._emit(CrawlError(current_url, f"Errore salvataggio su disco: {e}"))
+
+        page_id = None
+        if analysis is None:
+            analysis = self._analyze_response(current_url, page_response)
+        parsed_data, fingerprint = analysis.parsed, analysis.fingerprint
+
+        # Pagine quasi identiche a una già vista (versioni stampabili, ordinamenti, varianti di sessione):
+        # vengono salvate ma i loro link, già raggiunti dall'originale, non vengono espansi
+        near_duplicate_of = None
+        if fingerprint is not None:
+            near_duplicate_of = self.simhash_index.find(fingerprint)
+            if near_duplicate_of:
+                stats['near_duplicates'] += 1
+                logger.info(f"Pagina '{current_url}' quasi duplicata di '{near_duplicate_of}': link non espansi")
+            else:
+                self.simhash_index.add(fingerprint, current_url)
+        if analysis.is_text and self._on_event:
+            self._emit(PageParsed(current_url, parsed_data.get("title") or "", len(parsed_data.get("links") or []), near_duplicate_of))
+
+        # Save to websites database only in download mode
+        if analysis.is_text and not perform_osint_on_pages:
+            try:
+                # Storico delle modifiche: l'intervallo di ricontrollo si adatta a quanto spesso la pagina cambia
+                if history is None:
+                    history = self._load_page_history(current_url)
+                body_hash = content_hash(page_content_bytes)
+                changed = history is None or history.content_hash != body_hash
+                if 'incremental' in stats:
+                    stats['incremental']['new' if history is None else 'changed' if changed else 'unchanged'] += 1
+                page_id = self._save_page_info(
+                    url=current_url,
+                    title=parsed_data.get("title", ""),
+                    status_code=page_response.status_code,
+                    content_length=len(page_content_bytes),
+                    content_type=content_type_header,
+                    fingerprint=fingerprint,
+                    body_hash=body_hash,
+                    etag=page_response.headers.get('ETag'),
+                    last_modified=page_response.headers.get('Last-Modified'),
+                    refresh_interval=self.refresh_policy.next_interval(history.refresh_interval, changed) if history else None,
+                    changed=changed
+                )
+
+                if page_id and parsed_data.get("metadata"):
+                    self._save_metadata_info(page_id, parsed_data["metadata"])
+
+            except Exception as e_save:
+                logger.warning(f"Errore salvataggio nel database per {current_url}: {e_save}")
+
+        # Process links for both modes (OSINT and Download)
+        if parsed_data and "links" in parsed_data and current_depth < depth_limit:
+            base_url = self._page_base_url(current_url, page_response) # la forma canonica è solo la chiave della pagina
+            new_links: list[tuple[str, str, int]] = []
+            for link_info in parsed_data["links"]:
+                if not (link_url := link_info.get("url")):
+                    continue
+
+                if not (normalized_link := self._normalize_url(link_url, base_url)):
+                    continue
+
+                is_internal = self._is_internal_url(normalized_link)
+                
+                # In download mode, save link info to database
+                if not perform_osint_on_pages and page_id:
+                    self._save_link_info(page_id, normalized_link, link_info.get("text", ""), is_internal)
+
+                # For both modes, add internal links to queue
+                if is_internal and not near_duplicate_of and normalized_link not in self.seen_urls:
+                    new_links.append((normalized_link, link_info.get("text", ""), current_depth + 1))
+
+            # I link nuovi della pagina sono valutati in un unico lotto (crawl best-first)
+            priorities = self.link_scorer.score_batch(new_links) if self._best_first else [0.0] * len(new_links)
+            for (link_url, _, link_depth), priority in zip(new_links, priorities):
+                if self._enqueue(queue, link_url, link_depth, priority) and self._on_event:
+                    self._emit(LinkDiscovered(link_url, current_url, link_depth, priority))
+
+        # Process page content for OSINT mode (entità e tecnologie già estratte da _analyze_response)
+        if perform_osint_on_pages and analysis.osint is not None and self.osint_extractor:
+            print(f"    {Fore.MAGENTA}Avvio OSINT per pagina: {current_url}{Style.RESET_ALL}")
+
+            try:
+                filtered_emails = analysis.osint["emails"]
+                filtered_phones = analysis.osint["phones"]
+                if filtered_emails or filtered_phones:
+                    # Misura l'efficacia dell'ordine di visita: dopo quanti download compaiono i contatti
+                    stats['contact_pages'] = stats.get('contact_pages', 0) + 1
+                    stats.setdefault('first_contact_at', stats['urls_visited'])
+
+                for email in filtered_emails:
+                    if email not in self.already_profiled_in_session:
+                        print(f"      {Fore.BLUE}Profilazione email trovata: {email}{Style.RESET_ALL}")
+                        email_profile_result = self.osint_extractor.profile_email(email)
+                        self._found_entity(osint_findings_summary, current_url, "email", email, email_profile_result)
+                        self.already_profiled_in_session.add(email)
+                    else:
+                        logger.debug(f"Email {email} già profilata in questa sessione.")
+
+                if filtered_phones:
+                    self._found_entity(osint_findings_summary, current_url, "phone_numbers_found", list(filtered_phones),
+                                       {"message": "Numeri di telefono estratti dalla pagina."})
+
+                if page_tech := analysis.osint["technologies"]:
+                    self._found_entity(osint_findings_summary, current_url, "technologies", page_tech, {})
+
+            except Exception as e_osint:
+                logger.error(f"Errore durante l'analisi OSINT per {current_url}: {e_osint}", exc_info=True)
+
+    def start_crawl(self, start_url: str, depth_limit: int = 2, politeness_delay: float = 1.0, perform_osint_on_pages: bool = False, save_to_disk: bool = True, concurrency: int = 1, seed_from_sitemaps: bool = False, incremental: bool = False, best_first: bool | None = None, max_pages: int | None = None, parse_processes: int = 0, max_pages_per_host: int | None = None, max_bytes: int | None = None, max_seconds: float | None = None, max_error_rate: float | None = None) -> dict:
         '''
         Funzione: start_crawl
         Avvia il processo di crawling web a partire da un URL dato, con limite di profondità e opzioni per modalità.
+        Lo stato del crawl viene salvato periodicamente nel database: se interrotto può essere ripreso con resume_crawl.
         Parametri formali:
             self -> Riferimento all'istanza della classe
             str start_url -> L'URL da cui iniziare il crawling
             int depth_limit -> Il limite massimo di profondità del crawling
-            float politeness_delay -> Il ritardo in secondi tra le richieste per rispettare la politeness
+            float politeness_delay -> Il ritardo minimo in secondi tra le richieste allo stesso host
             bool perform_osint_on_pages -> Se True, esegue la profilazione OSINT su ogni pagina scaricata
             bool save_to_disk -> Se True, salva i file su disco nella struttura downloaded_tree
+            int concurrency -> Numero di worker che scaricano e analizzano pagine in parallelo (1 = crawl sequenziale)
+            bool seed_from_sitemaps -> Se True accoda (a profondità 1) gli URL delle sitemap del sito e stima la dimensione del crawl
+            bool incremental -> Se True riscarica solo le pagine nuove o da ricontrollare secondo lo storico delle modifiche
+                                (intervallo adattivo, lastmod delle sitemap, ETag/Last-Modified, hash del contenuto);
+                                solo in modalità download, dove le pagine sono salvate nel database
+            bool | None best_first -> Se True visita prima gli URL più promettenti per l'OSINT (contatti, chi siamo, team,
+                                      note legali) invece che in ampiezza; None = attivo solo in modalità OSINT
+            int | None max_pages -> Numero massimo di pagine da scaricare (None = nessun limite)
+            int parse_processes -> Numero di processi per parsing ed estrazione (0 = nei worker di download); con
+                                   parse_processes > 0 i worker scaricano soltanto e il lavoro CPU va su più core
+            int | None max_pages_per_host -> Numero massimo di pagine per host (None = nessun limite)
+            int | None max_bytes -> Byte massimi da scaricare (None = nessun limite)
+            float | None max_seconds -> Durata massima del crawl in secondi (None = nessun limite)
+            float | None max_error_rate -> Frazione massima di pagine con errore, es. 0.5 (None = nessun limite)
+                                           Esaurito un limite (vedi CrawlBudget) il crawl completa i download in corso e termina
         Valore di ritorno:
-            dict -> Dizionario contenente statistiche riassuntive del crawling
+            dict -> Dizionario contenente statistiche riassuntive del crawling (crawl_id identifica il crawl per resume_crawl;
+                    budget_hit indica il limite che ha fermato il crawl)
         '''
         stats = {
             'urls_visited': 0,
@@ -453,13 +1068,13 @@ class Crawler:
             'download_path': None,
             'errors': 0,
             'robots_txt': None,
-            'restricted_paths_crawled': 0
-        }
-        osint_findings_summary = {
-            "entities_profiled": [],
-            "page_technologies": {}
+            'restricted_paths_crawled': 0,
+            'near_duplicates': 0,
+            'bytes_downloaded': 0
         }
 
+        start_url = self._normalize_url(start_url, start_url) or start_url
+        self._domains, self._active_domain = {}, None
         self.base_domain = urlparse(start_url).netloc
         if not self.base_domain:
             logger.error(f"URL di partenza non valido, impossibile estrarre base_domain: {start_url}")
@@ -478,211 +1093,686 @@ class Crawler:
 
         print(f"\n{Fore.CYAN}Starting crawl of {start_url} (Mode: {'OSINT' if perform_osint_on_pages else 'Download'})")
 
-        queue = deque([(start_url, 0)])
-        self.visited_urls.clear()
-
-        # Fetch and parse robots.txt
-        self.robots_data = self._fetch_and_parse_robots(start_url, queue)
-        if self.robots_data:
-            stats['robots_txt'] = self.robots_data.to_dict()
-            if self.robots_data.crawl_delay > politeness_delay:
-                logger.info(f"Adjusting politeness delay to match robots.txt crawl-delay: {self.robots_data.crawl_delay}s")
-                politeness_delay = self.robots_data.crawl_delay
-
-        # Initialize appropriate database schema based on mode
-        if perform_osint_on_pages:
-            self.db_manager.init_schema("osint")
-        else:
-            self.db_manager.init_schema("websites")
-
-        while queue:
-            current_url, current_depth = queue.popleft()
+        options = {
+            'depth_limit': depth_limit,
+            'politeness_delay': politeness_delay,
+            'perform_osint_on_pages': perform_osint_on_pages,
+            'save_to_disk': save_to_disk,
+            'concurrency': concurrency,
+            'seed_from_sitemaps': seed_from_sitemaps,
+            'incremental': incremental,
+            'best_first': perform_osint_on_pages if best_first is None else best_first,
+            'max_pages': max_pages,
+            'max_pages_per_host': max_pages_per_host,
+            'max_bytes': max_bytes,
+            'max_seconds': max_seconds,
+            'max_error_rate': max_error_rate,
+            'parse_processes': max(0, parse_processes),
+            'respect_robots': None
+        }
+        # Lo stato del crawl vive nel database websites anche in modalità OSINT
+        self.db_manager.init_schema("websites")
+        try:
+            self._checkpoint = CrawlCheckpoint.create(self.db_manager, start_url, options)
+            stats['crawl_id'] = self._checkpoint.crawl_id
+        except Exception as e:
+            logger.error(f"Impossibile registrare il crawl nel database, non sarà riprendibile: {e}")
+            self._checkpoint = None
 
-            if current_url in self.visited_urls:
-                continue
+        queue = self._new_frontier(options)
+        self.seen_urls.clear()
+        self._enqueue(queue, start_url, 0)
 
-            if current_depth > depth_limit:
-                logger.debug(f"Raggiunto limite profondità per: {current_url}")
-                continue
+        return self._run_crawl(start_url, queue, stats, options)
 
-            # Check robots.txt rules
-            if not self._should_crawl_url(current_url):
-                logger.info(f"Skipping {current_url} (blocked by robots.txt)")
-                continue
+    def crawl_many(self, seeds: str | Path | Iterable[str], depth_limit: int = 2, politeness_delay: float = 1.0, perform_osint_on_pages: bool = False, save_to_disk: bool = True, concurrency: int = 8, per_host_limit: int = 2, max_pages_per_host: int | None = None, max_pages: int | None = None, max_bytes: int | None = None, max_seconds: float | None = None, max_error_rate: float | None = None, seed_from_sitemaps: bool = False, incremental: bool = False, best_first: bool | None = None, parse_processes: int = 0, respect_robots: bool = True, prepare_timeout: float = 10.0) -> dict:
+        '''
+        Funzione: crawl_many
+        Esegue in un'unica sessione il crawl di più siti a partire da una lista di seed. Tutti i domini
+        condividono la frontiera e i worker (limite di concorrenza globale); la frontiera alterna gli host
+        e non assegna a un host più di per_host_limit download alla volta, quindi un host lento non blocca
+        gli altri. Politeness, robots.txt, sitemap, directory di salvataggio, budget e statistiche sono per dominio.
+        I link tra domini diversi non vengono seguiti: ogni dominio è esplorato a partire dai propri seed.
+        Il crawl è riprendibile con resume_crawl come quelli di start_crawl.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str | Path | Iterable[str] seeds -> File con un URL per riga, testo con un URL per riga o iterabile di URL (vedi load_seeds)
+            int depth_limit -> Il limite massimo di profondità del crawling
+            float politeness_delay -> Il ritardo minimo in secondi tra le richieste allo stesso host
+            bool perform_osint_on_pages -> Se True, esegue la profilazione OSINT su ogni pagina scaricata
+            bool save_to_disk -> Se True, salva i file su disco (una directory per dominio)
+            int concurrency -> Numero di worker che scaricano in parallelo, per tutti i domini insieme
+            int per_host_limit -> Download massimi in corso verso lo stesso host
+            int | None max_pages_per_host -> Pagine massime da scaricare per dominio (None = nessun limite)
+            int | None max_pages -> Pagine massime da scaricare in totale (None = nessun limite)
+            int | None max_bytes, float | None max_seconds, float | None max_error_rate -> Altri limiti del crawl (vedi start_crawl)
+            bool seed_from_sitemaps -> Se True accoda gli URL delle sitemap di ogni dominio
+            bool incremental -> Se True riscarica solo le pagine nuove o da ricontrollare (vedi start_crawl)
+            bool | None best_first -> Ordine di visita best-first (vedi start_crawl)
+            int parse_processes -> Numero di processi per parsing ed estrazione (vedi start_crawl)
+            bool respect_robots -> Se True rispetta robots.txt (nessuna scelta interattiva per ogni dominio)
+            float prepare_timeout -> Secondi massimi per preparare un dominio (download di robots.txt, lettura delle sitemap);
+                                     i domini sono preparati in parallelo e le loro pagine partono appena il dominio è pronto
+        Valore di ritorno:
+            dict -> Statistiche riassuntive del crawling; stats['domains'] contiene quelle di ogni dominio
+        '''
+        stats = {
+            'urls_visited': 0,
+            'pages_saved': 0,
+            'download_path': None,
+            'errors': 0,
+            'robots_txt': None,
+            'restricted_paths_crawled': 0,
+            'near_duplicates': 0,
+            'bytes_downloaded': 0
+        }
+        seed_urls = [url for seed in load_seeds(seeds) if (url := self._normalize_url(seed, seed)) and urlparse(url).netloc]
+        if not seed_urls:
+            logger.error("Nessun URL di partenza valido per il crawl multi-dominio")
+            stats['errors'] += 1
+            return stats
 
-            print(f"{Fore.YELLOW}Crawling{Style.RESET_ALL}: {current_url} (Profondità: {current_depth})")
-            self.visited_urls.add(current_url)
-            stats['urls_visited'] += 1
+        options = {
+            'depth_limit': depth_limit,
+            'politeness_delay': politeness_delay,
+            'perform_osint_on_pages': perform_osint_on_pages,
+            'save_to_disk': save_to_disk,
+            'concurrency': max(1, concurrency),
+            'per_host_limit': max(1, per_host_limit),
+            'seed_from_sitemaps': seed_from_sitemaps,
+            'incremental': incremental,
+            'best_first': perform_osint_on_pages if best_first is None else best_first,
+            'max_pages': max_pages,
+            'max_pages_per_host': max_pages_per_host,
+            'max_bytes': max_bytes,
+            'max_seconds': max_seconds,
+            'max_error_rate': max_error_rate,
+            'parse_processes': max(0, parse_processes),
+            'respect_robots': respect_robots,
+            'prepare_timeout': prepare_timeout,
+            'seeds': seed_urls
+        }
+        self._setup_domains(seed_urls, options, stats)
+        print(f"\n{Fore.CYAN}Starting crawl of {len(seed_urls)} seeds on {len(self._domains)} domains (Mode: {'OSINT' if perform_osint_on_pages else 'Download'})")
 
-            time.sleep(politeness_delay)
-            page_response = self.fetcher.fetch_full_response(current_url)
+        self.db_manager.init_schema("websites")
+        try:
+            self._checkpoint = CrawlCheckpoint.create(self.db_manager, seed_urls[0], options)
+            stats['crawl_id'] = self._checkpoint.crawl_id
+        except Exception as e:
+            logger.error(f"Impossibile registrare il crawl nel database, non sarà riprendibile: {e}")
+            self._checkpoint = None
 
-            if not page_response or not page_response.content:
-                logger.warning(f"Nessun contenuto scaricato per {current_url}. Status: {page_response.status_code if page_response else 'N/A'}")
-                stats['errors'] += 1
-                continue
+        queue = self._new_frontier(options)
+        self.seen_urls.clear()
+        for url in seed_urls:
+            self._enqueue(queue, url, 0)
 
-            page_content_bytes = page_response.content
-            page_content_text = None
-            content_type_header = page_response.headers.get('Content-Type', '').lower()
+        return self._run_crawl(seed_urls[0], queue, stats, options)
 
-            # Save file to disk only in download mode
-            if save_to_disk and not perform_osint_on_pages:
-                try:
-                    save_dir, file_name = self._get_file_path_for_url(current_url, content_type_header)
-                    save_path = save_dir / file_name
-                    save_path.parent.mkdir(parents=True, exist_ok=True)
+    def _setup_domains(self, seed_urls: list[str], options: dict, stats: dict, saved_domains: dict[str, dict] | None = None) -> None:
+        '''
+        Funzione: _setup_domains
+        Raggruppa per dominio i seed di un crawl multi-dominio e ne prepara lo stato (DomainCrawl) e le directory.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            list[str] seed_urls -> I seed già normalizzati
+            dict options -> Opzioni del crawl (vedi crawl_many)
+            dict stats -> Statistiche del crawling (download_path = directory comune di download)
+            dict[str, dict] | None saved_domains -> Statistiche per dominio di un crawl ripreso
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        self._domains, self._active_domain = {}, None
+        for url in seed_urls:
+            key = host_key(url)
+            if key in self._domains:
+                self._domains[key].seeds.append(url)
+            else:
+                self._domains[key] = DomainCrawl(key, [url])
+
+        for domain in self._domains.values():
+            saved = (saved_domains or {}).get(domain.domain)
+            if saved:
+                domain.stats.update(saved)
+                domain.dispatched = saved.get('urls_visited', 0)
+            if options['save_to_disk']:
+                if saved and saved.get('download_path'):
+                    domain.site_dir = Path(saved['download_path'])
+                    domain.site_dir.mkdir(parents=True, exist_ok=True)
+                else:
+                    self._setup_site_directories(domain.domain)
+                    domain.site_dir = self.current_site_dir
+                domain.stats['download_path'] = str(domain.site_dir) if domain.site_dir else None
+        if options['save_to_disk'] and self.base_dirs.get("downloaded_tree"):
+            stats['download_path'] = str(self.base_dirs["downloaded_tree"])
+        # Le statistiche dei domini fanno parte di quelle del crawl, quindi anche dei checkpoint
+        stats['domains'] = {domain.domain: domain.stats for domain in self._domains.values()}
+
+    def resume_crawl(self, crawl_id: int) -> dict:
+        '''
+        Funzione: resume_crawl
+        Riprende un crawl interrotto dall'ultimo checkpoint, con le opzioni originali: gli URL già completati
+        non vengono riscaricati, quelli in coda o in lavorazione al momento dell'interruzione sì.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            int crawl_id -> ID del crawl restituito da start_crawl (stats['crawl_id'])
+        Valore di ritorno:
+            dict -> Dizionario contenente statistiche riassuntive del crawling (cumulative con la parte già eseguita)
+        '''
+        self.db_manager.init_schema("websites")
+        loaded = CrawlCheckpoint.load(self.db_manager, crawl_id)
+        if not loaded:
+            logger.error(f"Crawl {crawl_id} non trovato nel database")
+            return {'urls_visited': 0, 'pages_saved': 0, 'download_path': None, 'errors': 1, 'robots_txt': None, 'restricted_paths_crawled': 0}
+        checkpoint, row = loaded
+        if row['status'] == 'completed':
+            logger.info(f"Crawl {crawl_id} già completato, niente da riprendere")
+            return row['stats']
+
+        start_url = row['start_url']
+        options = checkpoint.options
+        saved_stats = row['stats']
+        stats = {
+            'urls_visited': saved_stats.get('urls_visited', 0),
+            'pages_saved': saved_stats.get('pages_saved', 0),
+            'download_path': saved_stats.get('download_path'),
+            'errors': saved_stats.get('errors', 0),
+            'robots_txt': None,
+            'restricted_paths_crawled': saved_stats.get('restricted_paths_crawled', 0),
+            'near_duplicates': saved_stats.get('near_duplicates', 0),
+            'bytes_downloaded': saved_stats.get('bytes_downloaded', 0),
+            'crawl_id': crawl_id
+        }
+        for key in ('incremental', 'contact_pages', 'first_contact_at'):
+            if key in saved_stats:
+                stats[key] = saved_stats[key]
 
-                    with open(save_path, 'wb') as f:
-                        f.write(page_content_bytes)
-                    stats['pages_saved'] += 1
-                    logger.info(f"Pagina '{current_url}' salvata in '{save_path}'")
+        self._domains, self._active_domain = {}, None
+        self.base_domain = urlparse(start_url).netloc
+        if options.get('seeds'):
+            self._setup_domains(options['seeds'], options, stats, saved_stats.get('domains'))
+        elif options['save_to_disk']:
+            if stats['download_path']:
+                self.current_site_dir = Path(stats['download_path'])
+                self.current_site_dir.mkdir(parents=True, exist_ok=True)
+            else:
+                self._setup_site_directories(self.base_domain)
+                stats['download_path'] = str(self.current_site_dir) if self.current_site_dir else None
+
+        self._checkpoint = checkpoint
+        self.seen_urls.clear()
+        for url in checkpoint.done_urls():
+            self.seen_urls.add(url)
+        done_count = len(self.seen_urls)
+        queue = self._new_frontier(options)
+        pending = [(url, depth) for url, depth in checkpoint.pending() if self.seen_urls.add(url)]
+        # Le priorità non sono salvate nel checkpoint: si ricalcolano dal path
+        priorities = self.link_scorer.score_batch([(url, "", depth) for url, depth in pending]) if self._best_first else [0.0] * len(pending)
+        for item, priority in zip(pending, priorities):
+            queue.append(item, priority)
+
+        print(f"\n{Fore.CYAN}Resuming crawl {crawl_id} of {start_url}: {done_count} URLs done, {len(queue)} pending")
+        return self._run_crawl(start_url, queue, stats, options)
+
+    def iter_events(self, crawl: Callable[..., dict], *args, max_pending: int = 1000, **kwargs) -> Iterator[CrawlEvent]:
+        '''
+        Funzione: iter_events
+        Esegue un crawl restituendone l'avanzamento come flusso di eventi tipizzati (vedi scraper.events):
+        PageFetched, PageParsed, LinkDiscovered, EntityFound, CrawlError, StatsTick e infine CrawlFinished con le
+        statistiche. Le entità OSINT arrivano solo come eventi (il riepilogo finale ne contiene i conteggi), così la
+        memoria non cresce con il numero di entità trovate. Se si smette di leggere il crawl viene interrotto
+        e resta riprendibile con resume_crawl.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            Callable[..., dict] crawl -> Il metodo di crawl da eseguire (start_crawl, crawl_many o resume_crawl)
+            int max_pending -> Eventi massimi in attesa di essere letti (oltre, il crawl attende il consumatore)
+            *args, **kwargs -> Argomenti del metodo di crawl
+        Valore di ritorno:
+            Iterator[CrawlEvent] -> Gli eventi del crawl
+        '''
+        stream = EventStream(max_pending)
+        return stream.iterate(lambda: self._crawl_with_events(stream.emit, crawl, *args, **kwargs))
 
-                except Exception as e:
-                    logger.error(f"Errore salvataggio {current_url} in {save_path if 'save_path' in locals() else 'N/A'}: {e}", exc_info=True)
-                    stats['errors'] += 1
+    def aiter_events(self, crawl: Callable[..., dict], *args, max_pending: int = 1000, **kwargs) -> AsyncIterator[CrawlEvent]:
+        '''Come iter_events, ma come iteratore asincrono (per le API web): il crawl gira in un thread separato.'''
+        stream = EventStream(max_pending)
+        return stream.aiterate(lambda: self._crawl_with_events(stream.emit, crawl, *args, **kwargs))
 
-            parsed_data = {}
-            page_id = None
+    def _crawl_with_events(self, on_event: Callable[[CrawlEvent], None], crawl: Callable[..., dict], *args, **kwargs) -> dict:
+        self._on_event = on_event
+        try:
+            return crawl(*args, **kwargs)
+        finally:
+            self._on_event = None
 
-            if any(ct in content_type_header for ct in ['html', 'xml', 'text', 'json']):
-                try:
-                    encoding_to_try = page_response.encoding if page_response.encoding else 'utf-8'
-                    page_content_text = page_content_bytes.decode(encoding_to_try, errors='replace')
-                    parsed_data = self.parser.parse(page_content_text, current_url)
-
-                    # Save to websites database only in download mode
-                    if not perform_osint_on_pages:
-                        page_id = self._save_page_info(
-                            url=current_url,
-                            title=parsed_data.get("title", ""),
-                            status_code=page_response.status_code,
-                            content_length=len(page_content_bytes),
-                            content_type=content_type_header
-                        )
+    def _new_frontier(self, options: dict) -> HostFrontier:
+        '''
+        Funzione: _new_frontier
+        Crea la frontiera di un crawl: una coda per host, così i worker non si accumulano sullo stesso host
+        mentre altri sono liberi; con best_first le code sono ordinate per punteggio (vedi LinkScorer).
+        Oltre la parte in memoria gli URL vanno su disco, quindi nessun link viene scartato.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            dict options -> Opzioni del crawl (vedi start_crawl)
+        Valore di ritorno:
+            HostFrontier -> La frontiera vuota
+        '''
+        self._best_first = bool(options.get('best_first'))
+        self.link_scorer = LinkScorer()
+        frontier_class = PriorityFrontier if self._best_first else HostFrontier
+        per_host_limit = options.get('per_host_limit') or max(1, options['concurrency'])
+        return frontier_class(self.fetcher.scheduler, per_host_limit=per_host_limit, spill=True)
 
-                        if page_id and parsed_data.get("metadata"):
-                            self._save_metadata_info(page_id, parsed_data["metadata"])
+    def _enqueue(self, queue: HostFrontier, url: str, depth: int, priority: float = 0.0) -> bool:
+        '''
+        Funzione: _enqueue
+        Accoda un URL nella frontiera, se non è già stato visto e non è una trappola per crawler (vedi
+        CrawlTrapDetector; il seed è sempre ammesso), e lo registra nel checkpoint del crawl.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            HostFrontier queue -> La frontiera del crawler
+            str url -> L'URL da accodare
+            int depth -> La sua profondità
+            float priority -> Priorità dell'URL (usata dalla frontiera best-first)
+        Valore di ritorno:
+            bool -> True se accodato, False se già visto, se è una trappola o se la frontiera è piena
+        '''
+        if url in self.seen_urls:
+            return False
+        if depth > 0 and (trap := self.trap_detector.check(url)):
+            logger.debug(f"URL scartato come trappola per crawler ({trap}): {url}")
+            return False
+        if not queue.append((url, depth), priority):
+            logger.warning(f"Coda crawler piena, link ignorato: {url}")
+            return False
+        self.seen_urls.add(url)
+        if self._checkpoint:
+            self._checkpoint.enqueued(url, depth)
+        return True
 
-                except Exception as e_parse_decode:
-                    logger.warning(f"Errore decodifica/parsing contenuto per {current_url} (Content-Type: {content_type_header}): {e_parse_decode}")
+    def _dispatch_slots(self, stats: dict, free_slots: int, in_flight: int) -> int:
+        '''
+        Funzione: _dispatch_slots
+        Calcola quanti download avviare ora nel crawl concorrente, entro i worker liberi e il budget del crawl.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            dict stats -> Statistiche correnti del crawl
+            int free_slots -> Worker liberi
+            int in_flight -> Pagine già avviate e non ancora contate
+        Valore di ritorno:
+            int -> Download da avviare (0 se un limite del budget è esaurito)
+        '''
+        if self._budget.exhausted(stats, in_flight):
+            return 0
+        pages_left = self._budget.pages_left(stats, in_flight)
+        return free_slots if pages_left is None else min(free_slots, pages_left)
 
-            # Process links for both modes (OSINT and Download)
-            if parsed_data and "links" in parsed_data and current_depth < depth_limit:
-                for link_info in parsed_data["links"]:
-                    if not (link_url := link_info.get("url")):
-                        continue
+    def _mark_done(self, url: str, stats: dict | None = None) -> None:
+        '''
+        Funzione: _mark_done
+        Registra nel checkpoint un URL completato (o scartato) ed esegue il checkpoint periodico.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL completato
+            dict | None stats -> Statistiche correnti (None = non tentare il checkpoint ora)
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        if not self._checkpoint:
+            return
+        self._checkpoint.done(url)
+        if stats is not None:
+            self._checkpoint.maybe_flush(stats)
 
-                    if not (normalized_link := self._normalize_url(link_url, current_url)):
+    def _run_pipelined(self, queue: HostFrontier, stats: dict, options: dict, osint_findings_summary: dict, destination) -> None:
+        '''
+        Funzione: _run_pipelined
+        Ciclo del crawl con download e analisi separati: i thread scaricano (lavoro di I/O), un pool di processi
+        esegue parsing, SimHash ed estrazione OSINT (lavoro CPU, limitato dal GIL se fatto nei thread).
+        Ai processi va solo il corpo della risposta e tornano solo i PageResult compatti; database, accodamento
+        dei link e profilazione restano su questo thread. Se i processi sono tutti occupati si smette di
+        scaricare finché non si liberano, così le risposte in attesa di analisi non si accumulano in memoria.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            HostFrontier queue -> La frontiera già popolata
+            dict stats -> Statistiche del crawling da aggiornare
+            dict options -> Opzioni del crawl (vedi start_crawl)
+            dict osint_findings_summary -> Riepilogo OSINT da aggiornare
+            destination -> Destinazione su disco dei contenuti binari (vedi WebFetcher.fetch_full_response)
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        depth_limit = options['depth_limit']
+        perform_osint_on_pages = options['perform_osint_on_pages']
+        save_to_disk = options['save_to_disk']
+        fetch_workers = max(1, options['concurrency'])
+        parse_processes = options['parse_processes']
+        max_parsing = 2 * parse_processes # un lavoro in esecuzione e uno pronto per ogni processo
+
+        fetching: dict[Future, tuple[str, int]] = {}
+        parsing: dict[Future, tuple[str, int, FetchResponse]] = {}
+        # spawn: i processi non ereditano lock, connessioni e thread del processo principale
+        with ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="crawler") as fetch_pool, \
+             ProcessPoolExecutor(max_workers=parse_processes, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=init_parse_worker, initargs=(self.parser,)) as parse_pool:
+            try:
+                while queue or fetching or parsing:
+                    slots = fetch_workers - len(fetching) if len(parsing) < max_parsing else 0
+                    slots = self._dispatch_slots(stats, slots, len(fetching) + len(parsing))
+                    for current_url, current_depth in self._next_batch(queue, depth_limit, slots, stats):
+                        future = fetch_pool.submit(self.fetcher.fetch_full_response, current_url, destination=destination,
+                                                   conditional_headers=self._revalidate.pop(current_url, None))
+                        fetching[future] = (current_url, current_depth)
+                    if not fetching and not parsing:
+                        if slots <= 0:
+                            break # budget del crawl esaurito
                         continue
 
-                    is_internal = self._is_internal_url(normalized_link)
-                    
-                    # In download mode, save link info to database
-                    if not perform_osint_on_pages and page_id:
-                        self._save_link_info(page_id, normalized_link, link_info.get("text", ""), is_internal)
-
-                    # For both modes, add internal links to queue
-                    if is_internal and normalized_link not in self.visited_urls:
-                        if len(queue) < 2000:
-                            queue.append((normalized_link, current_depth + 1))
+                    done, _ = wait([*fetching, *parsing], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future in fetching:
+                            current_url, current_depth = fetching.pop(future)
+                            queue.task_done(current_url)
+                            try:
+                                page_response = future.result()
+                            except Exception as e_worker:
+                                logger.error(f"Errore del worker per {current_url}: {e_worker}", exc_info=True)
+                                page_response = None
+                            if self._needs_analysis(page_response):
+                                job = parse_pool.submit(analyze_in_worker, self._page_base_url(current_url, page_response),
+                                                        page_response.content, page_response.encoding,
+                                                        page_response.headers, self._osint_domain(current_url))
+                                parsing[job] = (current_url, current_depth, page_response)
+                                continue
+                            analysis = PageResult()
                         else:
-                            logger.warning(f"Coda crawler piena, link ignorato: {normalized_link}")
+                            current_url, current_depth, page_response = parsing.pop(future)
+                            try:
+                                analysis = future.result()
+                            except Exception as e_parse:
+                                logger.error(f"Errore del processo di parsing per {current_url}: {e_parse}", exc_info=True)
+                                analysis = PageResult()
+                        self._process_page(
+                            current_url, current_depth, page_response, queue, stats, osint_findings_summary,
+                            depth_limit, perform_osint_on_pages, save_to_disk, analysis=analysis
+                        )
+                        self._mark_done(current_url, stats)
+            finally:
+                # Su interruzione non si attendono i download e le analisi in coda nei pool
+                for future in [*fetching, *parsing]:
+                    future.cancel()
 
-            # Process page content for OSINT mode
-            if perform_osint_on_pages and page_content_text and self.osint_extractor:
-                print(f"    {Fore.MAGENTA}Avvio OSINT per pagina: {current_url}{Style.RESET_ALL}")
+    def _prepare_site(self, start_url: str, queue: HostFrontier, stats: dict, options: dict, seed_sitemaps: bool, prefetched: Future | None = None) -> None:
+        '''
+        Funzione: _prepare_site
+        Prepara il crawl di un sito: politeness dell'host, robots.txt (con il suo crawl-delay) e, se richiesto,
+        accodamento degli URL delle sitemap, lette al massimo per options['prepare_timeout'] secondi.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str start_url -> L'URL di partenza del sito
+            HostFrontier queue -> La frontiera del crawl
+            dict stats -> Statistiche del sito da aggiornare (robots_txt, sitemaps)
+            dict options -> Opzioni del crawl (vedi start_crawl)
+            bool seed_sitemaps -> Se True accoda gli URL delle sitemap
+            Future | None prefetched -> Download di robots.txt già avviato (vedi _start_domain_preparation)
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        politeness_delay = options['politeness_delay']
+        # La politeness è applicata per host dallo scheduler del fetcher (nessuna attesa aggiuntiva qui)
+        self.fetcher.scheduler.set_min_delay(self.base_domain, politeness_delay)
 
-                try:
-                    page_emails = extract_emails(page_content_text)
-                    page_phones = extract_phone_numbers(page_content_text)
-                    filtered_emails = filter_emails(page_emails, self.base_domain, logger)
-                    filtered_phones = filter_phone_numbers(page_phones)
-
-                    for email in filtered_emails:
-                        if email not in self.already_profiled_in_session:
-                            print(f"      {Fore.BLUE}Profilazione email trovata: {email}{Style.RESET_ALL}")
-                            email_profile_result = self.osint_extractor.profile_email(email)
-                            osint_findings_summary["entities_profiled"].append({
-                                "page_url": current_url,
-                                "entity_type": "email",
-                                "entity": email,
-                                "profile_details": email_profile_result
-                            })
-                            self.already_profiled_in_session.add(email)
-                        else:
-                            logger.debug(f"Email {email} già profilata in questa sessione.")
+        # Fetch and parse robots.txt (in ripresa si riusa la scelta fatta all'avvio)
+        self.robots_data = self._fetch_and_parse_robots(start_url, queue, respect_robots=options['respect_robots'], prefetched=prefetched)
+        options['respect_robots'] = self.respect_robots
+        if self.robots_data:
+            stats['robots_txt'] = self.robots_data.to_dict()
+            if self.robots_data.crawl_delay > politeness_delay:
+                logger.info(f"Adjusting politeness delay to match robots.txt crawl-delay: {self.robots_data.crawl_delay}s")
+                self.fetcher.scheduler.set_min_delay(self.base_domain, self.robots_data.crawl_delay)
 
-                    if filtered_phones:
-                        osint_findings_summary["entities_profiled"].append({
-                            "page_url": current_url,
-                            "entity_type": "phone_numbers_found",
-                            "entity": list(filtered_phones),
-                            "profile_details": {"message": "Numeri di telefono estratti dalla pagina."}
-                        })
+        if seed_sitemaps:
+            deadline = time.monotonic() + options['prepare_timeout'] if options.get('prepare_timeout') else None
+            stats['sitemaps'] = self._seed_from_sitemaps(start_url, queue, deadline=deadline)
 
-                    # Detect technologies
-                    page_tech = {}
-                    soup_from_parser = BeautifulSoup(page_content_text, 'html.parser')
+    def _start_domain_preparation(self, domains: list[DomainCrawl], queue: HostFrontier, options: dict, seed_sitemaps: bool) -> None:
+        '''
+        Funzione: _start_domain_preparation
+        Avvia in parallelo il download di robots.txt di tutti i domini di un crawl multi-dominio, ciascuno entro
+        options['prepare_timeout'] secondi, e sospende i loro host nella frontiera. Ogni dominio viene poi preparato
+        da _prepare_ready_domains appena il suo download termina: un host lento o irraggiungibile non ritarda gli altri.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            list[DomainCrawl] domains -> I domini del crawl
+            HostFrontier queue -> La frontiera del crawl
+            dict options -> Opzioni del crawl (vedi crawl_many)
+            bool seed_sitemaps -> Se True ogni dominio accoda gli URL delle proprie sitemap
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        self._prep_options = {'options': options, 'seed_sitemaps': seed_sitemaps}
+        self._prep_pool = ThreadPoolExecutor(max_workers=min(8, len(domains)), thread_name_prefix="crawl-prep")
+        timeout = options.get('prepare_timeout') or 10
+        for domain in domains:
+            queue.pause_host(domain.domain)
+            domain.preparing = self._prep_pool.submit(self._download_robots, domain.start_url, timeout, 1) # un solo tentativo entro il tempo di preparazione
+
+    def _prepare_ready_domains(self, queue: HostFrontier) -> None:
+        '''
+        Funzione: _prepare_ready_domains
+        Prepara (regole di robots.txt, politeness, sitemap) i domini il cui robots.txt è stato scaricato e ne riprende
+        l'host nella frontiera. Se nessun host è servibile attende brevemente il prossimo download, invece di ciclare a vuoto.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            HostFrontier queue -> La frontiera del crawl
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        waiting = [domain for domain in self._domains.values() if domain.preparing is not None]
+        if not waiting:
+            return
+        if not queue.has_ready():
+            wait([domain.preparing for domain in waiting], timeout=0.05, return_when=FIRST_COMPLETED)
+        for domain in waiting:
+            if not domain.preparing.done():
+                continue
+            prefetched, domain.preparing = domain.preparing, None
+            self._enter_domain(domain.start_url)
+            self._prepare_site(domain.start_url, queue, domain.stats, self._prep_options['options'],
+                               self._prep_options['seed_sitemaps'], prefetched=prefetched)
+            domain.robots_data, domain.respect_robots = self.robots_data, self.respect_robots
+            queue.resume_host(domain.domain)
+
+    def _stop_domain_preparation(self) -> None:
+        '''Chiude il pool di preparazione dei domini (i download di robots.txt non ancora avviati vengono annullati).'''
+        if self._prep_pool is not None:
+            self._prep_pool.shutdown(wait=False, cancel_futures=True)
+            self._prep_pool = None
+        for domain in self._domains.values():
+            domain.preparing = None
+
+    def _run_crawl(self, start_url: str, queue: HostFrontier, stats: dict, options: dict) -> dict:
+        '''
+        Funzione: _run_crawl
+        Esegue il crawl vero e proprio (robots.txt, ciclo sulla frontiera, riepilogo OSINT), comune a
+        start_crawl e resume_crawl. In caso di interruzione (Ctrl+C o errore) salva un checkpoint finale.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str start_url -> L'URL di partenza
+            HostFrontier queue -> La frontiera già popolata
+            dict stats -> Statistiche del crawling da aggiornare
+            dict options -> Opzioni del crawl (vedi start_crawl)
+        Valore di ritorno:
+            dict -> Dizionario contenente statistiche riassuntive del crawling
+        '''
+        depth_limit = options['depth_limit']
+        perform_osint_on_pages = options['perform_osint_on_pages']
+        save_to_disk = options['save_to_disk']
+        concurrency = options['concurrency']
+        parse_processes = options.get('parse_processes', 0)
+        # Con un consumatore di eventi le entità gli vengono consegnate man mano: nel riepilogo solo i conteggi
+        osint_findings_summary = {"entity_counts": {}} if self._on_event else {
+            "entities_profiled": [],
+            "page_technologies": {},
+            "entity_counts": {}
+        }
 
-                    tech_frameworks = detect_framework(soup_from_parser, page_response.headers, page_content_text, current_url)
-                    tech_js = detect_js_libraries(soup_from_parser, page_content_text)
-                    tech_analytics = detect_analytics(page_content_text)
+        # Statistiche di canonicalizzazione solo per i siti del crawl (i link esterni non vengono scaricati)
+        domains = list(self._domains.values())
+        self.canonicalizer.reset_stats({domain.domain for domain in domains} or {self.base_domain})
+        for seed in [url for domain in domains for url in domain.seeds] or [start_url]:
+            self.canonicalizer.canonicalize(seed) # i seed contano come URL già noti
+        self.simhash_index = SimHashIndex()
+        self.trap_detector.reset()
+        # Il limite per host di un crawl di un solo sito vale come limite totale; la scadenza parte ora (anche in ripresa)
+        self._budget = CrawlBudget.from_options(options, single_host=not domains)
+        self._budget.start()
+        started_at = self._started_at = self._tick_at = time.monotonic()
+        self._extract_osint = perform_osint_on_pages and self.osint_extractor is not None
+
+        # Il crawl incrementale si basa sulle pagine salvate nel database websites (non in modalità OSINT)
+        self._incremental = bool(options.get('incremental')) and not perform_osint_on_pages
+        self._sitemap_lastmod.clear()
+        self._histories.clear()
+        self._revalidate.clear()
+        if self._incremental:
+            stats.setdefault('incremental', {'new': 0, 'changed': 0, 'unchanged': 0, 'skipped': 0})
+
+        seed_sitemaps = bool(options.get('seed_from_sitemaps')) and not options.get('sitemaps_seeded') and depth_limit >= 1
+        if domains:
+            # Ogni dominio ha la propria politeness, il proprio robots.txt e le proprie sitemap: i robots.txt si
+            # scaricano in parallelo e ogni dominio viene preparato quando il suo è pronto (vedi _next_batch)
+            self._start_domain_preparation(domains, queue, options, seed_sitemaps)
+        else:
+            self._prepare_site(start_url, queue, stats, options, seed_sitemaps)
+        # Le sitemap si leggono una volta sola: in ripresa gli URL accodati sono già nel checkpoint
+        options['sitemaps_seeded'] = options.get('sitemaps_seeded') or bool(options.get('seed_from_sitemaps'))
 
-                    if tech_frameworks and tech_frameworks != "Unknown" and tech_frameworks != []: page_tech["framework_cms"] = tech_frameworks
-                    if tech_js: page_tech["js_libraries"] = tech_js
-                    if tech_analytics: page_tech["analytics"] = tech_analytics
+        # Initialize appropriate database schema based on mode
+        if perform_osint_on_pages:
+            self.db_manager.init_schema("osint")
+        else:
+            self.db_manager.init_schema("websites")
 
-                    if page_tech:
-                        osint_findings_summary["page_technologies"][current_url] = page_tech
+        # In modalità download i file binari vanno su disco a chunk, senza passare dalla memoria
+        destination = self._stream_destination if save_to_disk and not perform_osint_on_pages else None
 
-                except Exception as e_osint:
-                    logger.error(f"Errore durante l'analisi OSINT per {current_url}: {e_osint}", exc_info=True)
+        try:
+            if concurrency <= 1 and parse_processes <= 0:
+                while queue and not self._budget.exhausted(stats):
+                    for current_url, current_depth in self._next_batch(queue, depth_limit, 1, stats):
+                        page_response = self.fetcher.fetch_full_response(
+                            current_url, destination=destination, conditional_headers=self._revalidate.pop(current_url, None)
+                        )
+                        queue.task_done(current_url)
+                        self._process_page(
+                            current_url, current_depth, page_response, queue, stats, osint_findings_summary,
+                            depth_limit, perform_osint_on_pages, save_to_disk
+                        )
+                        self._mark_done(current_url, stats)
+            elif parse_processes <= 0:
+                # I worker scaricano e analizzano; salvataggio nel database, accodamento dei link e OSINT
+                # restano su questo thread (le connessioni SQLite non sono condivisibili tra thread)
+                with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="crawler") as pool:
+                    pending: dict[Future, tuple[str, int]] = {}
+                    try:
+                        while queue or pending:
+                            slots = self._dispatch_slots(stats, concurrency - len(pending), len(pending))
+                            for current_url, current_depth in self._next_batch(queue, depth_limit, slots, stats):
+                                future = pool.submit(self._fetch_and_analyze, current_url, destination, self._revalidate.pop(current_url, None))
+                                pending[future] = (current_url, current_depth)
+                            if not pending:
+                                if slots <= 0:
+                                    break # budget del crawl esaurito
+                                continue
+
+                            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                current_url, current_depth = pending.pop(future)
+                                queue.task_done(current_url)
+                                try:
+                                    page_response, analysis = future.result()
+                                except Exception as e_worker:
+                                    logger.error(f"Errore del worker per {current_url}: {e_worker}", exc_info=True)
+                                    page_response, analysis = None, None
+                                self._process_page(
+                                    current_url, current_depth, page_response, queue, stats, osint_findings_summary,
+                                    depth_limit, perform_osint_on_pages, save_to_disk, analysis=analysis
+                                )
+                                self._mark_done(current_url, stats)
+                    finally:
+                        # Su interruzione non si attendono i download in coda nel pool
+                        for future in pending:
+                            future.cancel()
+            else:
+                self._run_pipelined(queue, stats, options, osint_findings_summary, destination)
+        except BaseException:
+            self._stop_domain_preparation()
+            queue.close()
+            if self._checkpoint:
+                self._checkpoint.flush(stats, status="interrupted")
+                logger.warning(f"Crawl {self._checkpoint.crawl_id} interrotto: riprendibile con resume_crawl({self._checkpoint.crawl_id})")
+            raise
+
+        # I download avviati sono già stati completati e salvati: il crawl si ferma qui in modo ordinato
+        if queue and (budget_hit := self._budget.exhausted(stats)):
+            stats['budget_hit'] = budget_hit
+            logger.info(f"Limite del crawl raggiunto ({budget_hit}): {len(queue)} URL in coda non visitati")
+        self._stop_domain_preparation()
+        stats['elapsed_seconds'] = round(time.monotonic() - started_at, 1)
+        stats['frontier'] = queue.get_stats()
+        stats['traps'] = self.trap_detector.get_stats()
+        queue.close()
 
         if perform_osint_on_pages:
-            # Cerca profili social per il dominio/brand alla fine del crawling
-            try:
-                from scraper.utils.osint_sources import find_brand_social_profiles
+            # Cerca profili social per ogni dominio/brand alla fine del crawling
+            for site_domain, site_url in [(domain.domain, domain.start_url) for domain in domains] or [(self.base_domain, start_url)]:
+                try:
+                    from scraper.utils.osint_sources import find_brand_social_profiles
                 
-                # Pulizia del nome del dominio per la ricerca social
-                clean_brand = self.base_domain.lower()
-                clean_brand = clean_brand.replace('www.', '')
+                    # Pulizia del nome del dominio per la ricerca social
+                    clean_brand = site_domain.lower()
+                    clean_brand = clean_brand.replace('www.', '')
                 
-                # Rimuovi estensioni comuni dei domini
-                common_tlds = ['.com', '.it', '.org', '.net', '.edu', '.gov', '.io', '.co.uk', '.eu', '.info', '.biz']
-                for tld in common_tlds:
-                    if clean_brand.endswith(tld):
-                        clean_brand = clean_brand[:-len(tld)]
-                        break
+                    # Rimuovi estensioni comuni dei domini
+                    common_tlds = ['.com', '.it', '.org', '.net', '.edu', '.gov', '.io', '.co.uk', '.eu', '.info', '.biz']
+                    for tld in common_tlds:
+                        if clean_brand.endswith(tld):
+                            clean_brand = clean_brand[:-len(tld)]
+                            break
                 
-                # Prendi solo la prima parte del dominio
-                clean_brand = clean_brand.split('.')[0]
+                    # Prendi solo la prima parte del dominio
+                    clean_brand = clean_brand.split('.')[0]
                 
-                print(f"\n{Fore.CYAN}Ricerca profili social per il brand '{clean_brand}' (dominio: {self.base_domain})...{Style.RESET_ALL}")
-                social_results = find_brand_social_profiles(clean_brand, logger, self.base_dirs)
+                    print(f"\n{Fore.CYAN}Ricerca profili social per il brand '{clean_brand}' (dominio: {site_domain})...{Style.RESET_ALL}")
+                    social_results = find_brand_social_profiles(clean_brand, logger, self.base_dirs)
                 
-                if social_results and not social_results.get("error"):
-                    profiles = social_results.get("profiles", {})
-                    if profiles:
-                        print(f"{Fore.YELLOW}✓ Trovati {len(profiles)} possibili profili social{Style.RESET_ALL}")
+                    if social_results and not social_results.get("error"):
+                        profiles = social_results.get("profiles", {})
+                        if profiles:
+                            print(f"{Fore.YELLOW}✓ Trovati {len(profiles)} possibili profili social{Style.RESET_ALL}")
                         
-                        # Aggiungi ogni profilo trovato alla lista delle entità
-                        for platform, data in profiles.items():
-                            osint_findings_summary["entities_profiled"].append({
-                                "page_url": start_url,
-                                "entity_type": "social_profile",
-                                "entity": data.get("username", clean_brand),
-                                "profile_details": {
+                            # Aggiungi ogni profilo trovato alla lista delle entità
+                            for platform, data in profiles.items():
+                                self._found_entity(osint_findings_summary, site_url, "social_profile", data.get("username", clean_brand), {
                                     "platform": platform,
                                     "url": data.get("url"),
                                     "confidence": f"{data.get('confidence', 1.0) * 100:.1f}%"
-                                }
-                            })
-                    else:
-                        print(f"{Fore.YELLOW}Nessun profilo social trovato per '{clean_brand}'{Style.RESET_ALL}")
-            except Exception as e:
-                logger.error(f"Errore durante la ricerca dei profili social per {self.base_domain}: {e}", exc_info=True)
+                                })
+                        else:
+                            print(f"{Fore.YELLOW}Nessun profilo social trovato per '{clean_brand}'{Style.RESET_ALL}")
+                except Exception as e:
+                    logger.error(f"Errore durante la ricerca dei profili social per {site_domain}: {e}", exc_info=True)
             
             stats['osint_summary'] = osint_findings_summary
 
+        stats['connections'] = self.fetcher.get_connection_stats()
+        stats['cache'] = self.fetcher.get_cache_stats()
+        stats['politeness'] = self.fetcher.scheduler.get_stats()
+        stats['circuit_breaker'] = self.fetcher.circuit_breaker.get_stats()
+        stats['downloads'] = self.fetcher.get_download_stats()
+        stats['canonicalization'] = self.canonicalizer.get_stats()
+        if self._checkpoint:
+            self._checkpoint.flush(stats, status="completed")
         return stats
\ No newline at end of file
@@ -0,0 +1,73 @@
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+from scraper.simhash import SimHashIndex
+from scraper.utils.robots_parser import RobotsData
+
+# Contatori delle statistiche del crawl che vengono ripartiti anche per dominio
+DOMAIN_COUNTERS = ("urls_visited", "pages_saved", "errors", "near_duplicates", "restricted_paths_crawled", "contact_pages",
+                   "bytes_downloaded")
+
+
+def load_seeds(source: str | Path | Iterable[str]) -> list[str]:
+    '''
+    Funzione: load_seeds
+    Legge la lista degli URL di partenza di un crawl multi-dominio: da un file (un URL per riga), da un testo
+    con un URL per riga o da un iterabile. Righe vuote e commenti (#) sono ignorati; agli URL senza schema
+    viene aggiunto https://.
+    Parametri formali:
+        str | Path | Iterable[str] source -> Percorso del file, testo o iterabile di URL
+    Valore di ritorno:
+        list[str] -> Gli URL, nell'ordine originale e senza ripetizioni
+    '''
+    if isinstance(source, Path) or (isinstance(source, str) and "\n" not in source and Path(source).is_file()):
+        lines: Iterable[str] = Path(source).read_text(encoding="utf-8").splitlines()
+    elif isinstance(source, str):
+        lines = source.splitlines()
+    else:
+        lines = source
+
+    seeds: list[str] = []
+    for line in lines:
+        url = line.split("#", 1)[0].strip()
+        if not url:
+            continue
+        if "://" not in url:
+            url = "https://" + url
+        if url not in seeds:
+            seeds.append(url)
+    return seeds
+
+
+@dataclass
+class DomainCrawl:
+    '''
+    Funzione: DomainCrawl
+    Stato di un dominio in un crawl multi-dominio (vedi Crawler.crawl_many): seed, robots.txt, directory
+    di salvataggio, pagine avviate (per il budget del dominio) e statistiche proprie.
+    Parametri formali:
+        str domain -> Il dominio (netloc in minuscolo)
+        list[str] seeds -> Gli URL di partenza del dominio (il primo è quello principale)
+        Path | None site_dir -> Directory di salvataggio dei contenuti del dominio
+        RobotsData | None robots_data -> Regole di robots.txt del dominio
+        bool respect_robots -> Se le regole di robots.txt vanno rispettate
+        int dispatched -> Pagine già passate ai worker per il download
+        Future | None preparing -> Download di robots.txt in corso: finché non termina il dominio non è preparato
+        SimHashIndex simhash_index -> Impronte delle pagine del dominio (i quasi duplicati si cercano nello stesso sito)
+        dict stats -> Statistiche del dominio (contatori di DOMAIN_COUNTERS, robots_txt, sitemaps, budget_hit)
+    '''
+    domain: str
+    seeds: list[str]
+    site_dir: Path | None = None
+    robots_data: RobotsData | None = None
+    respect_robots: bool = True
+    dispatched: int = 0
+    preparing: Future | None = None
+    simhash_index: SimHashIndex = field(default_factory=SimHashIndex)
+    stats: dict[str, Any] = field(default_factory=lambda: {counter: 0 for counter in DOMAIN_COUNTERS})
+
+    @property
+    def start_url(self) -> str:
+        return self.seeds[0]
@@ -0,0 +1,199 @@
+import asyncio
+import queue
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Callable, ClassVar, Iterator
+
+# Secondi tra due eventi StatsTick
+STATS_TICK_SECONDS = 1.0
+
+
+@dataclass
+class CrawlEvent:
+    '''
+    Funzione: CrawlEvent
+    Evento emesso dal crawler durante un crawl (vedi Crawler.iter_events). kind identifica il tipo di evento.
+    '''
+    kind: ClassVar[str] = "event"
+
+    def to_dict(self) -> dict[str, Any]:
+        '''Rappresentazione serializzabile in JSON dell'evento, con il tipo nel campo "event".'''
+        return {"event": self.kind, **asdict(self)}
+
+
+@dataclass
+class PageFetched(CrawlEvent):
+    '''Pagina scaricata (status_code None se il download è fallito).'''
+    kind: ClassVar[str] = "page_fetched"
+    url: str
+    depth: int
+    status_code: int | None
+    size: int
+    content_type: str = ""
+
+
+@dataclass
+class PageParsed(CrawlEvent):
+    '''Pagina testuale analizzata: titolo, link trovati e pagina di cui è quasi duplicata.'''
+    kind: ClassVar[str] = "page_parsed"
+    url: str
+    title: str
+    links: int
+    near_duplicate_of: str | None = None
+
+
+@dataclass
+class LinkDiscovered(CrawlEvent):
+    '''Link nuovo accodato nella frontiera.'''
+    kind: ClassVar[str] = "link_discovered"
+    url: str
+    source_url: str
+    depth: int
+    priority: float = 0.0
+
+
+@dataclass
+class EntityFound(CrawlEvent):
+    '''Entità OSINT trovata: email (con il profilo), numeri di telefono, tecnologie della pagina, profili social.'''
+    kind: ClassVar[str] = "entity_found"
+    page_url: str
+    entity_type: str
+    entity: Any
+    profile_details: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class CrawlError(CrawlEvent):
+    '''Errore su una pagina (download fallito, salvataggio non riuscito).'''
+    kind: ClassVar[str] = "error"
+    url: str
+    message: str
+
+
+@dataclass
+class StatsTick(CrawlEvent):
+    '''Avanzamento periodico del crawl: contatori principali, URL in coda e secondi trascorsi.'''
+    kind: ClassVar[str] = "stats"
+    stats: dict[str, Any]
+
+
+@dataclass
+class CrawlFinished(CrawlEvent):
+    '''Ultimo evento di un crawl: le statistiche finali restituite dal metodo di crawl.'''
+    kind: ClassVar[str] = "finished"
+    stats: dict[str, Any]
+
+
+class CrawlCancelled(BaseException):
+    '''
+    Sollevata nel thread del crawl quando il consumatore degli eventi smette di leggerli. Come KeyboardInterrupt
+    non deriva da Exception, quindi non viene intercettata dalla gestione degli errori delle singole pagine.
+    '''
+
+
+_END = object()
+
+
+class EventStream:
+    '''
+    Funzione: EventStream
+    Esegue un crawl in un thread e ne consegna gli eventi in ordine a un consumatore, come iteratore o
+    come iteratore asincrono. La coda degli eventi è limitata: se il consumatore è lento il crawl attende
+    (la memoria non cresce con il crawl); se il consumatore smette di leggere il crawl viene interrotto
+    con CrawlCancelled e resta riprendibile dal checkpoint.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        int max_pending -> Eventi massimi in attesa di essere letti
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, max_pending: int = 1000):
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        self._closed = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def emit(self, event: CrawlEvent) -> None:
+        '''Accoda un evento (dal thread del crawl), attendendo se la coda è piena.'''
+        self._put(event)
+
+    def _put(self, item) -> None:
+        while True:
+            if self._closed.is_set():
+                raise CrawlCancelled("Il consumatore degli eventi ha smesso di leggerli")
+            try:
+                self._queue.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                continue
+
+    def _start(self, crawl: Callable[[], dict]) -> None:
+        def run():
+            try:
+                outcome = (_END, crawl(), None)
+            except CrawlCancelled:
+                return
+            except BaseException as e:
+                outcome = (_END, None, e)
+            try:
+                self._put(outcome)
+            except CrawlCancelled:
+                pass
+
+        self._thread = threading.Thread(target=run, name="crawl-events", daemon=True)
+        self._thread.start()
+
+    def _next(self):
+        while True:
+            try:
+                return self._queue.get(timeout=0.2)
+            except queue.Empty:
+                if self._closed.is_set():
+                    return (_END, None, CrawlCancelled("Stream chiuso"))
+
+    def _unpack(self, item) -> CrawlEvent:
+        if isinstance(item, tuple) and item and item[0] is _END:
+            _, stats, error = item
+            if error is not None:
+                raise error
+            return CrawlFinished(stats)
+        return item
+
+    def _close(self) -> None:
+        self._closed.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def iterate(self, crawl: Callable[[], dict]) -> Iterator[CrawlEvent]:
+        '''
+        Funzione: iterate
+        Avvia il crawl e ne restituisce gli eventi man mano che vengono emessi.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            Callable[[], dict] crawl -> Il crawl da eseguire (che emette gli eventi con emit); restituisce le statistiche
+        Valore di ritorno:
+            Iterator[CrawlEvent] -> Gli eventi del crawl, terminati da CrawlFinished (le eccezioni del crawl sono rilanciate)
+        '''
+        self._start(crawl)
+        try:
+            while True:
+                event = self._unpack(self._next())
+                yield event
+                if isinstance(event, CrawlFinished):
+                    return
+        finally:
+            self._close()
+
+    async def aiterate(self, crawl: Callable[[], dict]) -> AsyncIterator[CrawlEvent]:
+        '''Come iterate, ma come iteratore asincrono: l'attesa degli eventi non blocca il loop degli eventi.'''
+        self._start(crawl)
+        try:
+            while True:
+                event = self._unpack(await asyncio.to_thread(self._next))
+                yield event
+                if isinstance(event, CrawlFinished):
+                    return
+        finally:
+            self._closed.set()
+            if self._thread is not None:
+                await asyncio.to_thread(self._thread.join)
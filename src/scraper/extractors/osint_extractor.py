@@ -39,13 +39,14 @@ class OSINTExtractor:
         dict[str, str] | None api_keys -> Dizionario contenente le API keys per i vari servizi OSINT
         Path | str | None data_dir -> Percorso della directory per i file di output
         dict[str, Path] | None dirs -> Dizionario contenente i percorsi delle directory del progetto
+        WebFetcher | None fetcher -> Fetcher (con pool di connessioni) da riutilizzare, se None ne crea uno con cache
     Valore di ritorno:
         None -> Il costruttore non restituisce un valore esplicito
     '''
-    def __init__(self, api_keys: dict[str, str] | None = None, data_dir: Path | str | None = None, dirs: dict[str, Path] | None = None):
+    def __init__(self, api_keys: dict[str, str] | None = None, data_dir: Path | str | None = None, dirs: dict[str, Path] | None = None, fetcher: WebFetcher | None = None):
         self.db = DatabaseManager.get_instance()
         self.db.init_schema("osint")
-        self.fetcher = WebFetcher(cache_dir=".osint_cache")
+        self.fetcher = fetcher or WebFetcher(cache_dir=".osint_cache")
         self.parser = WebParser()
         self.api_keys = api_keys or {}
         self.logger = logging.getLogger("osint.extractor")
@@ -1,15 +1,57 @@
-import hashlib
 import logging
 import os
-import random
+import threading
 import time
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple, NamedTuple,  Union
+from typing import Any, Callable, Dict, Optional, Tuple, NamedTuple,  Union
+from urllib.parse import urlparse, urlsplit, urlunsplit
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scraper.cache import DEFAULT_CACHE_TTL, CacheEntry, ResponseCache
+from scraper.retry import CircuitBreaker, RetryPolicy
+from scraper.scheduler import HostScheduler, parse_retry_after
+from scraper.utils.charset import detect_encoding
+from scraper.warc import ArchivedResponse, MirrorDirectory, WarcArchive, WarcWriter
 
 logger = logging.getLogger("scraper.fetcher")
 
+# Dimensione massima del corpo per tipo di contenuto (prefisso del Content-Type, vince il più lungo)
+DEFAULT_MAX_BYTES_BY_TYPE: dict[str, int] = {
+    "text/": 10 * 1024 * 1024,
+    "application/xhtml": 10 * 1024 * 1024,
+    "application/json": 10 * 1024 * 1024,
+    "application/xml": 20 * 1024 * 1024,
+    "image/": 20 * 1024 * 1024,
+    "application/pdf": 100 * 1024 * 1024,
+    "": 50 * 1024 * 1024, # qualsiasi altro tipo
+}
+# Modalità del fetcher: rete, rete con registrazione WARC, replay da archivio senza rete
+FETCH_MODES = ("live", "record", "replay")
+# Tipi che vengono analizzati dal parser e quindi tenuti in memoria
+INLINE_CONTENT_TYPES = ("html", "xml", "text", "json")
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class _InFlightFetch:
+    '''
+    Funzione: _InFlightFetch
+    Download in corso condiviso tra chiamanti concorrenti dello stesso URL (single-flight).
+    '''
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: "FetchResponse | None" = None
+        self.error: BaseException | None = None
+
+
 class FetchResponse(NamedTuple): 
     '''
     Funzione: FetchResponse
@@ -23,6 +65,9 @@ class FetchResponse(NamedTuple):
         headers: requests.structures.CaseInsensitiveDict -> Intestazioni della risposta
         url: str -> URL della richiesta
         encoding: str | None -> Codifica del contenuto, None se non specificata
+        encoding_source: str | None -> Come è stata determinata la codifica ("header", "bom", "meta", "detected", "default")
+        from_cache: bool -> True se la risposta è stata servita dalla cache su disco
+        file_path: str | None -> Percorso del file su cui il corpo è stato scritto in streaming (content è None)
 
     Valore di ritorno:
         None -> Il costruttore non restituisce un valore esplicito
@@ -32,16 +77,36 @@ class FetchResponse(NamedTuple):
     headers: requests.structures.CaseInsensitiveDict
     url: str
     encoding: str | None
+    from_cache: bool = False
+    file_path: str | None = None
+    encoding_source: str | None = None
 
 class WebFetcher:
     '''
     Funzione: WebFetcher
     Recupera contenuti web con gestione di errori, retry e politeness.
+    Le richieste passano da una requests.Session con un pool di connessioni keep-alive per host,
+    così le pagine dello stesso sito riutilizzano la connessione TCP/TLS già aperta.
+    La politeness è gestita per host da un HostScheduler: host diversi non si attendono a vicenda.
     Parametri formali:
         self -> Riferimento all'istanza della classe
         str | None cache_dir -> Directory per la cache delle pagine (None per disabilitare)
         str | None user_agent -> User-Agent personalizzato che identifica il crawler
-        tuple[float, float] delay_range -> Range (min, max) di attesa tra le richieste in secondi
+        tuple[float, float] delay_range -> Range (min, max) di attesa tra le richieste allo stesso host in secondi: min è il
+                                           ritardo minimo per host, fino a max - min secondi di attesa casuale in più
+        int pool_connections -> Numero di pool per host mantenuti in memoria
+        int pool_maxsize -> Numero massimo di connessioni aperte per singolo host (per ogni thread che usa il fetcher)
+        bool pool_block -> Se True, attende una connessione libera invece di aprirne di nuove oltre pool_maxsize
+        bool keep_alive -> Se False, chiude la connessione dopo ogni risposta (header Connection: close)
+        int pool_retries -> Tentativi a livello di connessione (errori di connect) gestiti dal pool
+        int cache_max_bytes -> Dimensione massima della cache su disco (compressa), oltre la quale si eliminano le voci LRU
+        float | None cache_ttl -> Età massima in secondi delle voci in cache senza Cache-Control/Expires (None = nessuna scadenza)
+        RetryPolicy | None retry_policy -> Politica di retry (status/eccezioni da ritentare, backoff, Retry-After)
+        CircuitBreaker | None circuit_breaker -> Circuit breaker per host, evita di insistere su host irraggiungibili
+        dict[str, int] | None max_bytes_by_type -> Limiti di dimensione per prefisso di Content-Type (sovrascrivono i predefiniti)
+        str mode -> "live" (rete), "record" (rete + archiviazione WARC di ogni risposta) o "replay" (nessuna rete)
+        str | None warc_path -> In record: directory dei file WARC. In replay: file/directory .warc.gz oppure
+                                URL file:// di un mirror locale (<root>/<host>/<percorso>)
     Valore di ritorno:
         None -> Il costruttore non restituisce un valore esplicito
     '''
@@ -51,103 +116,362 @@ class WebFetcher:
         cache_dir: str | None = None, # param opzionale che può essere stringa o none
         user_agent: str | None = None,
         delay_range: tuple[float, float] = (1.0, 3.0),
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        pool_retries: int = 1,
+        cache_max_bytes: int = 200 * 1024 * 1024,
+        cache_ttl: float | None = DEFAULT_CACHE_TTL,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        max_bytes_by_type: dict[str, int] | None = None,
+        mode: str = "live",
+        warc_path: str | None = None,
     ):
+        if mode not in FETCH_MODES:
+            raise ValueError(f"Modalità del fetcher non valida: {mode} (attese: {', '.join(FETCH_MODES)})")
+        if mode != "live" and not warc_path:
+            raise ValueError(f"La modalità {mode} richiede warc_path")
+
         self.headers = {
             "User-Agent": user_agent or "Browsint/1.0 Research Bot",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.5",
         }
+        if not keep_alive:
+            self.headers["Connection"] = "close"
 
         self.delay_range = delay_range
-        self.last_request_time: float = 0.0
+        self.scheduler = HostScheduler(default_delay=delay_range[0], jitter=max(0.0, delay_range[1] - delay_range[0]))
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.max_bytes_by_type = {**DEFAULT_MAX_BYTES_BY_TYPE, **(max_bytes_by_type or {})}
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._session_options = (pool_connections, pool_maxsize, pool_block, pool_retries)
+        self._local = threading.local() # sessione HTTP del thread corrente (vedi session)
+        self._sessions: list[requests.Session] = []
+        self._sessions_lock = threading.Lock()
+
+        # Statistiche di riutilizzo delle connessioni, per host
+        self._stats_lock = threading.Lock()
+        self._connection_stats: dict[str, dict[str, int]] = {}
+        self._download_stats = {"streamed_files": 0, "streamed_bytes": 0, "aborted_oversized": 0, "coalesced": 0}
+
+        # Download in corso, per chiave normalizzata: i chiamanti concorrenti dello stesso URL ne condividono il risultato
+        self._inflight_lock = threading.Lock()
+        self._inflight: dict[tuple[str, bool, bool, bool], _InFlightFetch] = {}
 
         self.cache_enabled = cache_dir is not None
+        self.cache: ResponseCache | None = None
         if self.cache_enabled:
             self.cache_dir = Path(cache_dir)
-            os.makedirs(self.cache_dir, exist_ok=True)
+            self.cache = ResponseCache(self.cache_dir, max_bytes=cache_max_bytes, ttl=cache_ttl)
             logger.info(f"Cache attivata in {self.cache_dir}")
 
-    def _get_cache_path(self, url: str) -> Path:
+        self.mode = mode
+        self.recorder: WarcWriter | None = None
+        self.replay_source: WarcArchive | MirrorDirectory | None = None
+        if mode == "record":
+            self.recorder = WarcWriter(warc_path)
+        elif mode == "replay":
+            if warc_path.startswith("file://"):
+                self.replay_source = MirrorDirectory(warc_path, max_bytes=self.max_bytes_for)
+            else:
+                self.replay_source = WarcArchive(warc_path)
+            logger.info(f"Fetcher in modalità replay da {warc_path}: nessuna richiesta di rete")
+
+    @property
+    def session(self) -> requests.Session:
+        '''
+        Funzione: session
+        Sessione HTTP del thread corrente. requests.Session non è thread-safe: ogni thread che usa il fetcher
+        (worker del crawler, pool di AsyncWebFetcher) ha la propria sessione con il proprio pool di connessioni.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            requests.Session -> La sessione del thread corrente
+        '''
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._build_session(*self._session_options)
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def _build_session(self, pool_connections: int, pool_maxsize: int, pool_block: bool, pool_retries: int) -> requests.Session:
         '''
-        Funzione: _get_cache_path
-        Genera un percorso file univoco per l'URL nella cache.
+        Funzione: _build_session
+        Crea una sessione HTTP con un adapter a pool di connessioni per http e https.
         Parametri formali:
             self -> Riferimento all'istanza della classe
-            str url -> L'URL per cui generare il percorso cache
+            int pool_connections -> Numero di pool per host mantenuti in memoria
+            int pool_maxsize -> Numero massimo di connessioni per host
+            bool pool_block -> Se True, blocca quando il pool dell'host è esaurito
+            int pool_retries -> Tentativi di riconnessione gestiti da urllib3
         Valore di ritorno:
-            Path -> Percorso completo del file di cache
+            requests.Session -> La sessione configurata
         '''
-        url_hash = hashlib.md5(url.encode()).hexdigest() # formatta l'url in un hash md5
-        return self.cache_dir / f"{url_hash}.html"
+        session = requests.Session()
+        session.headers.update(self.headers)
+
+        # Solo errori di connessione: i retry sugli status HTTP restano in fetch_full_response
+        retry = Retry(total=pool_retries, connect=pool_retries, read=0, status=0, redirect=None, raise_on_status=False)
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=retry,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
 
-    def _check_cache(self, url: str) -> str | None:
+    def _record_connection(self, url: str, response: requests.Response) -> None:
         '''
-        Funzione: _check_cache
-        Verifica se l'URL è in cache e restituisce il contenuto testuale.
+        Funzione: _record_connection
+        Registra se la risposta è stata servita da una connessione nuova o riutilizzata dal pool.
         Parametri formali:
             self -> Riferimento all'istanza della classe
-            str url -> L'URL da cercare in cache
+            str url -> L'URL richiesto
+            requests.Response response -> La risposta ancora in streaming (connessione non rilasciata)
         Valore di ritorno:
-            Optional[str] -> Il contenuto della pagina se presente in cache, altrimenti None
+            None -> La funzione non restituisce un valore
         '''
-        if not self.cache_enabled:
-            return None
+        host = urlparse(response.url or url).netloc
+        connection = getattr(response.raw, "connection", None)
 
-        cache_path = self._get_cache_path(url)
-        if cache_path.exists():
-            logger.debug(f"Cache hit per {url}")
+        reused = False
+        if connection is not None:
+            reused = getattr(connection, "_browsint_used", False)
             try:
-                with open(cache_path, encoding="utf-8") as f:
-                    return f.read()
-            except Exception as e:
-                logger.warning(f"Errore lettura cache per {url}: {e}")
+                connection._browsint_used = True
+            except AttributeError:
+                pass
 
-        return None
+        with self._stats_lock:
+            host_stats = self._connection_stats.setdefault(host, {"requests": 0, "new_connections": 0, "reused_connections": 0})
+            host_stats["requests"] += 1
+            if reused:
+                host_stats["reused_connections"] += 1
+            else:
+                host_stats["new_connections"] += 1
 
-    def _save_to_cache(self, url: str, content: str) -> bool:
+    def get_connection_stats(self) -> dict[str, Any]:
+        '''
+        Funzione: get_connection_stats
+        Restituisce i contatori di riutilizzo delle connessioni, totali e per host.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            dict[str, Any] -> Dizionario con requests, new_connections, reused_connections, reuse_ratio e per_host
+        '''
+        with self._stats_lock:
+            per_host = {host: dict(values) for host, values in self._connection_stats.items()}
+
+        total_requests = sum(h["requests"] for h in per_host.values())
+        total_new = sum(h["new_connections"] for h in per_host.values())
+        total_reused = sum(h["reused_connections"] for h in per_host.values())
+        return {
+            "requests": total_requests,
+            "new_connections": total_new,
+            "reused_connections": total_reused,
+            "reuse_ratio": (total_reused / total_requests) if total_requests else 0.0,
+            "per_host": per_host,
+        }
+
+    def get_download_stats(self) -> dict[str, int]:
+        '''
+        Funzione: get_download_stats
+        Restituisce i contatori dei download: file scritti in streaming, byte, corpi interrotti perché troppo grandi
+        e richieste servite condividendo un download già in corso.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            dict[str, int] -> Dizionario con streamed_files, streamed_bytes, aborted_oversized e coalesced
+        '''
+        with self._stats_lock:
+            return dict(self._download_stats)
+
+    def max_bytes_for(self, content_type: str) -> int:
+        '''
+        Funzione: max_bytes_for
+        Restituisce il limite di dimensione per un Content-Type (prefisso più lungo tra quelli configurati).
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str content_type -> Il Content-Type della risposta
+        Valore di ritorno:
+            int -> Il numero massimo di byte accettati
+        '''
+        content_type = content_type.split(";")[0].strip().lower()
+        prefix = max((p for p in self.max_bytes_by_type if content_type.startswith(p)), key=len)
+        return self.max_bytes_by_type[prefix]
+
+    def _read_body(self, response: requests.Response, url: str, destination: Callable[[str, str], Path] | None,
+                   max_bytes: int | None = None, stream_inline: bool = False) -> tuple[bytes | None, Path | None]:
+        '''
+        Funzione: _read_body
+        Legge il corpo di una risposta aperta in streaming rispettando il limite del suo Content-Type.
+        I contenuti da analizzare (HTML, XML, testo, JSON) restano in memoria, salvo stream_inline; gli altri,
+        se è indicata una destinazione, vengono scritti su disco un chunk alla volta.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            requests.Response response -> La risposta, con il corpo non ancora letto
+            str url -> L'URL richiesto
+            Callable[[str, str], Path] | None destination -> Funzione (url, content_type) -> percorso del file
+            int | None max_bytes -> Limite di dimensione al posto di quello del Content-Type
+            bool stream_inline -> Se True anche HTML, XML, testo e JSON vanno sulla destinazione
+        Valore di ritorno:
+            tuple[bytes | None, Path | None] -> (corpo in memoria, None) oppure (None, file scritto)
+        '''
+        content_type = response.headers.get("Content-Type", "").lower()
+        limit = max_bytes if max_bytes is not None else self.max_bytes_for(content_type)
+
+        declared = response.headers.get("Content-Length", "")
+        if declared.isdigit() and int(declared) > limit:
+            raise _BodyTooLarge(f"Content-Length {declared} oltre il limite di {limit} byte")
+
+        stream_to_disk = (
+            destination is not None
+            and 200 <= response.status_code < 300
+            and (stream_inline or (content_type and not any(t in content_type for t in INLINE_CONTENT_TYPES)))
+        )
+        received = 0
+
+        if not stream_to_disk:
+            body = bytearray()
+            for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                received += len(chunk)
+                if received > limit:
+                    raise _BodyTooLarge(f"corpo oltre il limite di {limit} byte")
+                body += chunk
+            return bytes(body), None
+
+        path = Path(destination(url, content_type))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        part_path = path.with_name(path.name + ".part")
+        try:
+            with open(part_path, "wb") as f:
+                for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                    received += len(chunk)
+                    if received > limit:
+                        raise _BodyTooLarge(f"corpo oltre il limite di {limit} byte")
+                    f.write(chunk)
+            os.replace(part_path, path)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+
+        with self._stats_lock:
+            self._download_stats["streamed_files"] += 1
+            self._download_stats["streamed_bytes"] += received
+        logger.info(f"{url} scritto in streaming su '{path}' ({received} byte)")
+        return None, path
+
+    def close(self) -> None:
+        '''
+        Funzione: close
+        Chiude le sessioni HTTP di tutti i thread e le loro connessioni keep-alive.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._local = threading.local()
+        if self.recorder:
+            self.recorder.close()
+
+    def __enter__(self) -> "WebFetcher":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _response_from_entry(self, entry: CacheEntry) -> FetchResponse:
+        '''
+        Funzione: _response_from_entry
+        Converte una voce della cache in FetchResponse.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            CacheEntry entry -> La voce letta dalla cache
+        Valore di ritorno:
+            FetchResponse -> La risposta marcata come proveniente dalla cache
+        '''
+        return FetchResponse(
+            status_code=entry.status_code,
+            content=entry.content,
+            headers=requests.structures.CaseInsensitiveDict(entry.headers),
+            url=entry.url,
+            encoding=entry.encoding,
+            encoding_source=entry.encoding_source,
+            from_cache=True,
+        )
+
+    def _save_to_cache(self, url: str, response: FetchResponse) -> bool:
         '''
         Funzione: _save_to_cache
-        Salva il contenuto testuale nella cache.
+        Salva nella cache una risposta completa (solo status 2xx con contenuto).
         Parametri formali:
             self -> Riferimento all'istanza della classe
-            str url -> L'URL associato al contenuto
-            str content -> Il contenuto HTML da salvare
+            str url -> L'URL richiesto (chiave della cache)
+            FetchResponse response -> La risposta da salvare
         Valore di ritorno:
             bool -> True se il salvataggio è avvenuto con successo, False altrimenti
         '''
-        if not self.cache_enabled:
+        if not self.cache_enabled or response.content is None:
             return False
-
-        try:
-            cache_path = self._get_cache_path(url)
-            with open(cache_path, "w", encoding="utf-8") as f:
-                f.write(content)
-            return True
-        except Exception as e:
-            logger.warning(f"Impossibile salvare in cache {url}: {e}")
+        if not 200 <= response.status_code < 300:
             return False
+        if "no-store" in response.headers.get("Cache-Control", "").lower():
+            return False
+
+        return self.cache.put(
+            url, response.status_code, dict(response.headers), response.url, response.content,
+            response.encoding, response.encoding_source
+        )
 
-    def _respect_politeness(self) -> None:
+    def clear_cache(self) -> None:
         '''
-        Funzione: _respect_politeness
-        Attende per rispettare le politiche di politeness (ritardo tra richieste).
+        Funzione: clear_cache
+        Svuota la cache delle risposte su disco.
         Parametri formali:
             self -> Riferimento all'istanza della classe
         Valore di ritorno:
             None -> La funzione non restituisce un valore
         '''
-        current_time = time.time()
-        elapsed = current_time - self.last_request_time
+        if self.cache_enabled:
+            self.cache.clear()
 
-        min_delay = self.delay_range[0]
-        if elapsed < min_delay:
-            sleep_time = min_delay - elapsed
-            logger.debug(f"Attesa di {sleep_time:.2f}s per politeness")
-            time.sleep(sleep_time)
+    def get_cache_stats(self) -> dict[str, Any]:
+        '''
+        Funzione: get_cache_stats
+        Restituisce i contatori della cache (hit, miss, byte serviti/salvati, eliminazioni).
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            dict[str, Any] -> I contatori della cache, vuoto se la cache è disattivata
+        '''
+        return self.cache.get_stats() if self.cache_enabled else {}
 
-        self.last_request_time = time.time()
+    def _respect_politeness(self, url: str) -> None:
+        '''
+        Funzione: _respect_politeness
+        Attende il turno dell'host dell'URL secondo lo scheduler di politeness (ritardo tra richieste allo stesso host).
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL che si sta per richiedere
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        self.scheduler.wait(url)
 
-    def fetch(self, url: str, force_download: bool = False, timeout: int = 30, retries: int = 3) -> str | None:
+    def fetch(self, url: str, force_download: bool = False, timeout: int = 30, retries: int | None = None) -> str | None:
         '''
         Funzione: fetch
         Recupera il contenuto testuale di un URL, con opzioni di cache, timeout e retry.
@@ -156,7 +480,7 @@ class WebFetcher:
             str url -> L'URL da scaricare
             bool force_download -> Forzare il download anche se presente in cache
             int timeout -> Timeout della richiesta in secondi
-            int retries -> Numero di tentativi in caso di errore
+            int | None retries -> Numero di tentativi in caso di errore (None = quello della retry policy)
         Valore di ritorno:
             str | None -> Il contenuto testuale della pagina o None in caso di fallimento
         '''
@@ -171,44 +495,259 @@ class WebFetcher:
                 return None
         return None
 
-    def fetch_full_response(self, url: str, force_download: bool = False, timeout: int = 30, retries: int = 3) -> FetchResponse | None:
+    @staticmethod
+    def _flight_key(url: str, force_download: bool, destination: Callable[[str, str], Path] | None,
+                    conditional: bool = False, body_options: tuple = ()) -> tuple:
+        '''
+        Funzione: _flight_key
+        Chiave con cui riconoscere download concorrenti equivalenti: URL senza frammento, con schema e host
+        in minuscolo, più le opzioni che cambiano il risultato.
+        Parametri formali:
+            str url -> L'URL richiesto
+            bool force_download -> Se il download ignora la cache
+            Callable | None destination -> Destinazione su disco dei contenuti binari
+            bool conditional -> Se la richiesta porta validatori del chiamante (può ricevere un 304 senza corpo)
+            tuple body_options -> Opzioni di lettura del corpo (max_bytes, stream_inline)
+        Valore di ritorno:
+            tuple -> La chiave del download
+        '''
+        parts = urlsplit(url.strip())
+        normalized = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+        return normalized, force_download, destination is not None, conditional, body_options
+
+    def fetch_full_response(
+        self,
+        url: str,
+        force_download: bool = False,
+        timeout: int = 30,
+        retries: int | None = None,
+        respect_politeness: bool = True,
+        destination: Callable[[str, str], Path] | None = None,
+        conditional_headers: dict[str, str] | None = None,
+        max_bytes: int | None = None,
+        stream_inline: bool = False,
+    ) -> FetchResponse | None:
         '''
         Funzione: fetch_full_response
         Recupera il contenuto completo (status, content, headers, etc.) di un URL.
+        Se lo stesso URL è già in download da un altro thread, attende quel download e ne condivide il
+        risultato invece di inviare una seconda richiesta (single-flight).
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL da scaricare
+            bool force_download -> Forzare il download (ignora cache)
+            int timeout -> Timeout della richiesta in secondi
+            int | None retries -> Numero massimo di tentativi (None = quello della retry policy)
+            bool respect_politeness -> Se False salta l'attesa per host tra richieste (la gestisce il chiamante)
+            Callable[[str, str], Path] | None destination -> Destinazione su disco dei contenuti binari (vedi _fetch_uncoalesced)
+            dict[str, str] | None conditional_headers -> Validatori salvati dal chiamante (vedi _fetch_uncoalesced)
+            int | None max_bytes -> Limite di dimensione del corpo al posto di quello del Content-Type (vedi max_bytes_for)
+            bool stream_inline -> Se True e destination è indicata, anche HTML/XML/testo/JSON vanno su disco
+        Valore di ritorno:
+            FetchResponse | None -> Un oggetto FetchResponse contenente i dati della risposta, o None in caso di fallimento
+        '''
+        key = self._flight_key(url, force_download, destination, bool(conditional_headers), (max_bytes, stream_inline))
+        with self._inflight_lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _InFlightFetch()
+                self._inflight[key] = flight
+
+        if not leader:
+            with self._stats_lock:
+                self._download_stats["coalesced"] += 1
+            logger.debug(f"Download di {url} già in corso: attendo il risultato condiviso")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._fetch_uncoalesced(url, force_download, timeout, retries, respect_politeness, destination,
+                                                    conditional_headers, max_bytes, stream_inline)
+            if self.recorder and flight.result is not None:
+                self._record_warc(url, flight.result)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _record_warc(self, url: str, response: FetchResponse) -> None:
+        '''
+        Funzione: _record_warc
+        Archivia una risposta nel WARC in registrazione (anche se servita dalla cache, così il replay è completo).
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL richiesto
+            FetchResponse response -> La risposta da archiviare
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        try:
+            self.recorder.write_response(url, response.status_code, dict(response.headers), response.url, response.content, response.file_path)
+        except OSError as e:
+            logger.warning(f"Impossibile archiviare {url} nel WARC: {e}")
+
+    def _response_from_archive(self, archived: ArchivedResponse) -> FetchResponse:
+        '''
+        Funzione: _response_from_archive
+        Converte una risposta letta da un archivio WARC, un mirror o un file locale in FetchResponse.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            ArchivedResponse archived -> La risposta archiviata
+        Valore di ritorno:
+            FetchResponse -> La risposta, con codifica rilevata come per i download dalla rete
+        '''
+        headers = requests.structures.CaseInsensitiveDict(archived.headers)
+        encoding, encoding_source = detect_encoding(archived.content, headers.get("Content-Type", ""))
+        return FetchResponse(
+            status_code=archived.status_code,
+            content=archived.content,
+            headers=headers,
+            url=archived.url,
+            encoding=encoding,
+            encoding_source=encoding_source,
+        )
+
+    def _fetch_uncoalesced(
+        self,
+        url: str,
+        force_download: bool,
+        timeout: int,
+        retries: int | None,
+        respect_politeness: bool,
+        destination: Callable[[str, str], Path] | None,
+        conditional_headers: dict[str, str] | None = None,
+        max_bytes: int | None = None,
+        stream_inline: bool = False,
+    ) -> FetchResponse | None:
+        '''
+        Funzione: _fetch_uncoalesced
+        Esegue il download vero e proprio per fetch_full_response.
+        I tentativi seguono la retry policy; se il circuito dell'host è aperto la richiesta fallisce subito.
+        Il corpo è letto a chunk e i corpi oltre il limite del loro Content-Type vengono interrotti.
         Parametri formali:
             self -> Riferimento all'istanza della classe
             str url -> L'URL da scaricare
             bool force_download -> Forzare il download (ignora cache)
             int timeout -> Timeout della richiesta in secondi
-            int retries -> Numero di tentativi in caso di errore
+            int | None retries -> Numero massimo di tentativi (None = quello della retry policy)
+            bool respect_politeness -> Se False salta l'attesa per host tra richieste (la gestisce il chiamante)
+            Callable[[str, str], Path] | None destination -> Se indicata, i contenuti binari (non HTML/XML/testo/JSON)
+                                                             vengono scritti in streaming sul file restituito da
+                                                             destination(url, content_type) invece che in memoria
+            dict[str, str] | None conditional_headers -> If-None-Match / If-Modified-Since salvati dal chiamante (es. nello
+                                                         storico delle pagine), usati se la cache non ha validatori propri;
+                                                         se il server risponde 304 si restituisce la risposta 304 senza corpo
+            int | None max_bytes -> Limite di dimensione del corpo al posto di quello del Content-Type
+            bool stream_inline -> Se True e destination è indicata, anche HTML/XML/testo/JSON vanno su disco
         Valore di ritorno:
             FetchResponse | None -> Un oggetto FetchResponse contenente i dati della risposta, o None in caso di fallimento
         '''
-        self._respect_politeness()
+        if urlsplit(url).scheme == "file":
+            # I file locali si leggono solo dal mirror di replay, entro la sua radice (mai in live o record)
+            if not isinstance(self.replay_source, MirrorDirectory):
+                logger.warning(f"URL file:// rifiutato: servito solo in replay da un mirror locale ({url})")
+                return None
+            archived = self.replay_source.get_file(url)
+            return self._response_from_archive(archived) if archived else None
+
+        if self.mode == "replay":
+            archived = self.replay_source.get(url)
+            if archived is None:
+                logger.warning(f"{url} non presente nell'archivio di replay (o oltre il limite di dimensione)")
+                return None
+            return self._response_from_archive(archived)
+
+        stale_entry: CacheEntry | None = None
+        request_headers: dict[str, str] = {}
+        if not force_download and self.cache_enabled:
+            entry, fresh = self.cache.lookup(url)
+            if fresh:
+                return self._response_from_entry(entry)
+            if entry is not None:
+                # Voce scaduta ma con ETag/Last-Modified: GET condizionale, il corpo arriva solo se cambiato
+                stale_entry = entry
+                request_headers = entry.conditional_headers()
+        if not request_headers and conditional_headers:
+            request_headers = dict(conditional_headers)
+
+        policy = self.retry_policy
+        max_attempts = retries if retries is not None else policy.max_attempts
         attempt = 0
-        while attempt < retries:
+        last_response: FetchResponse | None = None
+        while attempt < max_attempts:
+            if not self.circuit_breaker.allow(url):
+                logger.warning(f"Circuito aperto per {urlparse(url).netloc}: download di {url} saltato")
+                return last_response
+            if respect_politeness:
+                self._respect_politeness(url)
+
+            attempt += 1
+            retry_after = None
             try:
-                logger.info(f"Download completo {url} (tentativo {attempt+1}/{retries})")
-                response = requests.get(url, headers=self.headers, timeout=timeout, stream=True, allow_redirects=True)
+                logger.info(f"Download completo {url} (tentativo {attempt}/{max_attempts})")
+                started = time.monotonic()
+                response = self.session.get(url, timeout=timeout, stream=True, allow_redirects=True, headers=request_headers)
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                self.scheduler.record_response(url, response.status_code, time.monotonic() - started, retry_after)
+                self._record_connection(url, response)
+                # L'host ha risposto: esito registrato prima di leggere il corpo (anche se poi viene scartato)
+                if response.status_code >= 500:
+                    self.circuit_breaker.record_failure(url)
+                else:
+                    self.circuit_breaker.record_success(url)
 
-                content_bytes = response.content
+                try:
+                    content_bytes, file_path = self._read_body(response, url, destination, max_bytes, stream_inline)
+                except _BodyTooLarge as e:
+                    response.close()
+                    with self._stats_lock:
+                        self._download_stats["aborted_oversized"] += 1
+                    logger.warning(f"Download di {url} interrotto: {e}")
+                    return None
 
-                return FetchResponse(
+                if response.status_code == 304 and stale_entry is not None:
+                    logger.info(f"Contenuto non modificato (304), servito dalla cache: {url}")
+                    return self._response_from_entry(self.cache.refresh(url, stale_entry, response.headers))
+
+                encoding, encoding_source = detect_encoding(content_bytes, response.headers.get("Content-Type", ""))
+                fetch_response = FetchResponse(
                     status_code=response.status_code,
                     content=content_bytes,
                     headers=response.headers,
                     url=response.url,
-                    encoding=response.apparent_encoding
+                    encoding=encoding,
+                    file_path=str(file_path) if file_path else None,
+                    encoding_source=encoding_source,
                 )
+                if not policy.should_retry_status(response.status_code) or attempt >= max_attempts:
+                    self._save_to_cache(url, fetch_response)
+                    return fetch_response
+                last_response = fetch_response
+                logger.warning(f"Status {response.status_code} per {url}, nuovo tentativo")
 
             except requests.RequestException as e:
                 logger.warning(f"Errore durante il download completo di {url}: {e}")
+                if not policy.should_retry_exception(e):
+                    return last_response
+                self.circuit_breaker.record_failure(url)
+            finally:
+                # Una prova half-open finita senza esito (errore non dovuto all'host) non blocca il circuito
+                self.circuit_breaker.release_probe(url)
 
-            attempt += 1
-            if attempt < retries:
-                sleep_time = random.uniform(2, 5) * attempt
+            if attempt < max_attempts:
+                sleep_time = policy.compute_delay(attempt, retry_after)
+                if sleep_time is None:
+                    logger.warning(f"Retry-After di {retry_after:.0f}s per {url} oltre il limite, rinuncio")
+                    return last_response
                 logger.debug(f"Attendo {sleep_time:.2f} secondi prima di riprovare")
                 time.sleep(sleep_time)
 
-        logger.error(f"Impossibile scaricare (completo) {url} dopo {retries} tentativi")
-        return None
\ No newline at end of file
+        logger.error(f"Impossibile scaricare (completo) {url} dopo {attempt} tentativi")
+        return last_response
\ No newline at end of file
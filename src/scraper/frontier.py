@@ -0,0 +1,322 @@
+import heapq
+import itertools
+import logging
+import os
+import sqlite3
+import tempfile
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Iterator
+
+from scraper.scheduler import HostScheduler, host_key
+
+logger = logging.getLogger("scraper.frontier")
+
+# Inserimenti accumulati in memoria prima di essere scritti in blocco nel file di overflow
+SPILL_BATCH = 512
+
+
+class FrontierSpill:
+    '''
+    Funzione: FrontierSpill
+    Overflow su disco della frontiera: tabella SQLite in un file temporaneo, scritta solo in coda
+    (inserimenti a blocchi di SPILL_BATCH) e letta a blocchi nell'ordine di inserimento o di priorità.
+    Il file non ha journal né sync: è eliminato alla chiusura e non deve sopravvivere a un crash
+    (lo stato riprendibile del crawl è nel checkpoint).
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        bool by_priority -> Se True la lettura restituisce prima gli URL con priorità più alta
+        str | Path | None directory -> Directory del file temporaneo (None = quella di sistema)
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, by_priority: bool = False, directory: str | Path | None = None):
+        self.by_priority = by_priority
+        fd, self.path = tempfile.mkstemp(prefix="browsint_frontier_", suffix=".db", dir=directory)
+        os.close(fd)
+        self._conn = sqlite3.connect(self.path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = OFF")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.execute("CREATE TABLE spill (seq INTEGER PRIMARY KEY, url TEXT NOT NULL, depth INTEGER NOT NULL, priority REAL NOT NULL)")
+        if by_priority:
+            self._conn.execute("CREATE INDEX spill_priority ON spill (priority DESC, seq)")
+        self._order = "priority DESC, seq" if by_priority else "seq"
+        self._pending: list[tuple[str, int, float]] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, item: tuple[str, int], priority: float = 0.0) -> None:
+        self._pending.append((item[0], item[1], priority))
+        self._size += 1
+        if len(self._pending) >= SPILL_BATCH:
+            self._write()
+
+    def _write(self) -> None:
+        if self._pending:
+            with self._conn:
+                self._conn.executemany("INSERT INTO spill (url, depth, priority) VALUES (?, ?, ?)", self._pending)
+            self._pending.clear()
+
+    def pop_many(self, count: int) -> list[tuple[tuple[str, int], float]]:
+        '''
+        Funzione: pop_many
+        Rimuove e restituisce fino a count URL, nell'ordine della frontiera.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            int count -> Numero massimo di URL da leggere
+        Valore di ritorno:
+            list[tuple[tuple[str, int], float]] -> Coppie ((url, profondità), priorità)
+        '''
+        self._write()
+        rows = self._conn.execute(f"SELECT seq, url, depth, priority FROM spill ORDER BY {self._order} LIMIT ?", (count,)).fetchall()
+        if rows:
+            with self._conn:
+                self._conn.executemany("DELETE FROM spill WHERE seq = ?", [(row[0],) for row in rows])
+        self._size -= len(rows)
+        return [((url, depth), priority) for _, url, depth, priority in rows]
+
+    def __iter__(self) -> Iterator[tuple[str, int]]:
+        self._write()
+        for url, depth in self._conn.execute(f"SELECT url, depth FROM spill ORDER BY {self._order}"):
+            yield url, depth
+
+    def close(self) -> None:
+        self._conn.close()
+        Path(self.path).unlink(missing_ok=True)
+
+
+class HostFrontier:
+    '''
+    Funzione: HostFrontier
+    Frontiera del crawler con una coda FIFO per ogni host. L'estrazione sceglie, tra gli host con URL
+    in attesa e sotto il limite di richieste in corso, quello che lo scheduler di politeness può servire
+    prima; a parità di attesa gli host sono serviti a turno. Gli host sospesi (pause_host) restano in coda
+    ma non vengono serviti finché non sono ripresi (es. un dominio di cui si sta ancora leggendo robots.txt).
+    Con spill=True la frontiera non scarta mai URL: oltre max_size in memoria i nuovi URL vanno in un
+    file di overflow su disco (FrontierSpill) e, finché questo non si svuota, anche i successivi, così
+    l'ordine di accodamento è preservato; la parte in memoria viene ricaricata a blocchi dal file
+    quando scende sotto la metà.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        HostScheduler | None scheduler -> Scheduler di politeness da consultare per scegliere l'host
+        int | None per_host_limit -> Massimo di URL dello stesso host in lavorazione contemporaneamente (None = nessun limite)
+        int max_size -> Numero massimo di URL in attesa in memoria (oltre, append li scarta o li sposta su disco)
+        bool spill -> Se True gli URL oltre max_size vanno su disco invece di essere scartati
+        str | Path | None spill_dir -> Directory del file di overflow (None = directory temporanea di sistema)
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+    _by_priority = False # ordine di lettura del file di overflow
+
+    def __init__(self, scheduler: HostScheduler | None = None, per_host_limit: int | None = None, max_size: int = 2000,
+                 spill: bool = False, spill_dir: str | Path | None = None):
+        self.scheduler = scheduler
+        self.per_host_limit = per_host_limit
+        self.max_size = max_size
+        self.spill = spill
+        self.spill_dir = spill_dir
+        self._queues: "OrderedDict[str, deque[tuple[str, int]]]" = OrderedDict()
+        self._in_flight: dict[str, int] = {}
+        self._paused: set[str] = set()
+        self._size = 0
+        self._spill: FrontierSpill | None = None
+        self.dropped = 0
+        self.spilled = 0
+
+    def __len__(self) -> int:
+        return self._size + (len(self._spill) if self._spill else 0)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self) -> Iterator[tuple[str, int]]:
+        for queue in self._queues.values():
+            yield from queue
+        if self._spill:
+            yield from self._spill
+
+    @property
+    def full(self) -> bool:
+        return not self.spill and self._size >= self.max_size
+
+    def append(self, item: tuple[str, int], priority: float = 0.0) -> bool:
+        '''
+        Funzione: append
+        Accoda un URL nella coda del suo host.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            tuple[str, int] item -> Coppia (url, profondità)
+            float priority -> Priorità dell'URL (ignorata qui: le code sono FIFO; vedi PriorityFrontier)
+        Valore di ritorno:
+            bool -> True se l'URL è stato accodato, False se la frontiera è piena
+        '''
+        if (self._spill and len(self._spill)) or self._size >= self.max_size:
+            if not self.spill:
+                self.dropped += 1
+                return False
+            if self._spill is None:
+                self._spill = FrontierSpill(by_priority=self._by_priority, directory=self.spill_dir)
+                logger.info(f"Frontiera oltre {self.max_size} URL in memoria: overflow su {self._spill.path}")
+            self._spill.push(item, priority)
+            self.spilled += 1
+            return True
+        self._push(host_key(item[0]), item, priority)
+        self._size += 1
+        return True
+
+    def _refill(self) -> None:
+        # Ricarica dal disco gli URL più vecchi (o più prioritari) quando la parte in memoria si svuota
+        if not self._spill or not len(self._spill) or self._size >= self.max_size // 2:
+            return
+        for item, priority in self._spill.pop_many(self.max_size - self._size):
+            self._push(host_key(item[0]), item, priority)
+            self._size += 1
+
+    def _push(self, host: str, item: tuple[str, int], priority: float) -> None:
+        self._queues.setdefault(host, deque()).append(item)
+
+    def _pop_from(self, host: str) -> tuple[str, int]:
+        return self._queues[host].popleft()
+
+    def _choose_host(self, hosts: list[str]) -> str:
+        if self.scheduler is not None and len(hosts) > 1:
+            # min è stabile: a parità di attesa vince il primo host nell'ordine di rotazione
+            return min(hosts, key=self.scheduler.ready_in)
+        return hosts[0]
+
+    def _eligible_hosts(self) -> list[str]:
+        return [
+            host for host, queue in self._queues.items()
+            if queue and host not in self._paused
+            and (self.per_host_limit is None or self._in_flight.get(host, 0) < self.per_host_limit)
+        ]
+
+    def pause_host(self, host: str) -> None:
+        '''Sospende l'estrazione degli URL di un host (che restano in coda e possono ancora essere accodati).'''
+        self._paused.add(host_key(host))
+
+    def resume_host(self, host: str) -> None:
+        '''Riprende l'estrazione degli URL di un host sospeso con pause_host.'''
+        self._paused.discard(host_key(host))
+
+    def has_ready(self) -> bool:
+        '''Indica se pop_ready restituirebbe ora un URL (in memoria).'''
+        self._refill()
+        return bool(self._eligible_hosts())
+
+    def pop_ready(self) -> tuple[str, int] | None:
+        '''
+        Funzione: pop_ready
+        Estrae il prossimo URL da lavorare rispettando il limite per host.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            tuple[str, int] | None -> (url, profondità), o None se nessun host può essere servito ora
+        '''
+        self._refill()
+        hosts = self._eligible_hosts()
+        if not hosts:
+            return None
+        host = self._choose_host(hosts)
+
+        queue = self._queues[host]
+        item = self._pop_from(host)
+        self._size -= 1
+        self._queues.move_to_end(host) # rotazione: l'host appena servito passa in fondo
+        if not queue:
+            del self._queues[host]
+        self._in_flight[host] = self._in_flight.get(host, 0) + 1
+        return item
+
+    def task_done(self, url: str) -> None:
+        '''
+        Funzione: task_done
+        Segnala che la lavorazione di un URL estratto è terminata (libera uno slot del suo host).
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL estratto in precedenza
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        host = host_key(url)
+        remaining = self._in_flight.get(host, 0) - 1
+        if remaining > 0:
+            self._in_flight[host] = remaining
+        else:
+            self._in_flight.pop(host, None)
+
+    def host_sizes(self) -> dict[str, int]:
+        return {host: len(queue) for host, queue in self._queues.items()}
+
+    def get_stats(self) -> dict[str, int]:
+        '''
+        Funzione: get_stats
+        Restituisce le statistiche della frontiera.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            dict[str, int] -> in_memory, on_disk (URL in attesa), spilled (totale finito su disco), dropped (scartati)
+        '''
+        return {
+            "in_memory": self._size,
+            "on_disk": len(self._spill) if self._spill else 0,
+            "spilled": self.spilled,
+            "dropped": self.dropped,
+        }
+
+    def close(self) -> None:
+        '''Elimina il file di overflow, se creato (gli URL ancora su disco vengono persi).'''
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+
+class PriorityFrontier(HostFrontier):
+    '''
+    Funzione: PriorityFrontier
+    Frontiera best-first: come HostFrontier mantiene una coda per host e il limite di richieste in corso,
+    ma ogni coda è un heap ordinato per priorità (a parità di priorità vale l'ordine di accodamento).
+    Tra gli host serviti prima dallo scheduler di politeness si sceglie quello con l'URL più prioritario.
+    L'overflow su disco è riletto per priorità: un URL molto promettente finito su disco attende però
+    che la parte in memoria scenda sotto la metà.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        HostScheduler | None scheduler -> Scheduler di politeness da consultare per scegliere l'host
+        int | None per_host_limit -> Massimo di URL dello stesso host in lavorazione contemporaneamente (None = nessun limite)
+        int max_size -> Numero massimo di URL in attesa in memoria (vedi HostFrontier)
+        bool spill -> Se True gli URL oltre max_size vanno su disco invece di essere scartati
+        str | Path | None spill_dir -> Directory del file di overflow (None = directory temporanea di sistema)
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+    _by_priority = True
+
+    def __init__(self, scheduler: HostScheduler | None = None, per_host_limit: int | None = None, max_size: int = 2000,
+                 spill: bool = False, spill_dir: str | Path | None = None):
+        super().__init__(scheduler, per_host_limit, max_size, spill, spill_dir)
+        self._queues: "OrderedDict[str, list[tuple[float, int, tuple[str, int]]]]" = OrderedDict()
+        self._sequence = itertools.count()
+
+    def __iter__(self) -> Iterator[tuple[str, int]]:
+        for heap in self._queues.values():
+            for _, _, item in heap:
+                yield item
+        if self._spill:
+            yield from self._spill
+
+    def _push(self, host: str, item: tuple[str, int], priority: float) -> None:
+        heapq.heappush(self._queues.setdefault(host, []), (-priority, next(self._sequence), item))
+
+    def _pop_from(self, host: str) -> tuple[str, int]:
+        return heapq.heappop(self._queues[host])[2]
+
+    def _choose_host(self, hosts: list[str]) -> str:
+        if self.scheduler is not None and len(hosts) > 1:
+            waits = {host: self.scheduler.ready_in(host) for host in hosts}
+            soonest = min(waits.values())
+            hosts = [host for host in hosts if waits[host] <= soonest]
+        # La testa di ogni heap è l'URL più prioritario dell'host (priorità salvata con segno opposto)
+        return min(hosts, key=lambda host: self._queues[host][0][:2])
@@ -0,0 +1,73 @@
+import math
+import re
+from urllib.parse import urlsplit
+
+from scraper.utils.contact_pages import CONTACT_PAGE_PATHS, contact_keywords
+
+# Parole utili soprattutto nel testo dei link ("Contattaci", "Scrivici una mail", "Our people")
+EXTRA_KEYWORDS = ("contatt", "scrivi", "mail", "phone", "telefon", "people", "persone", "leadership", "sede")
+_EXTENSION_RE = re.compile(r"\.[a-z0-9]{1,5}$")
+
+
+class LinkScorer:
+    '''
+    Funzione: LinkScorer
+    Assegna una priorità ai link per il crawl best-first in modalità OSINT: favorisce le pagine che di
+    solito contengono contatti (i percorsi di fetch_website_contacts e le loro parole chiave, nel path o
+    nel testo del link), penalizza la profondità e, per equità tra le sezioni del sito (primo segmento
+    del path), le sezioni da cui sono già stati accodati molti URL (blog, archivi, cataloghi), con
+    penalità logaritmica.
+    Tutte le parole chiave sono in un'unica espressione regolare, applicata a un lotto di link alla volta.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        float exact_weight -> Bonus per un path uguale a un percorso di contatti noto (es. /chi-siamo)
+        float path_weight -> Bonus per ogni parola chiave distinta nel path
+        float anchor_weight -> Bonus per ogni parola chiave distinta nel testo del link
+        float depth_weight -> Penalità per livello di profondità
+        float section_weight -> Penalità per log2(1 + URL già accodati dalla stessa sezione)
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, exact_weight: float = 6.0, path_weight: float = 4.0, anchor_weight: float = 3.0,
+                 depth_weight: float = 1.0, section_weight: float = 1.0):
+        self.exact_weight = exact_weight
+        self.path_weight = path_weight
+        self.anchor_weight = anchor_weight
+        self.depth_weight = depth_weight
+        self.section_weight = section_weight
+        keywords = sorted(set(contact_keywords()) | set(EXTRA_KEYWORDS), key=len, reverse=True)
+        # Parola chiave all'inizio di un token: "contact" trova "contacts", "chi" non trova "archivio"
+        self._keyword_re = re.compile(r"(?<![a-z0-9])(?:" + "|".join(map(re.escape, keywords)) + ")")
+        self._exact_paths = {path for path in CONTACT_PAGE_PATHS if path}
+        self._section_counts: dict[str, int] = {}
+
+    def score_batch(self, links: list[tuple[str, str, int]]) -> list[float]:
+        '''
+        Funzione: score_batch
+        Calcola la priorità di un lotto di link (più alta = da scaricare prima) e aggiorna i contatori per sezione.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            list[tuple[str, str, int]] links -> Terne (url, testo del link, profondità)
+        Valore di ritorno:
+            list[float] -> Le priorità, nello stesso ordine dei link
+        '''
+        find_keywords = self._keyword_re.findall
+        scores = []
+        for url, anchor_text, depth in links:
+            path = urlsplit(url).path.lower().rstrip("/")
+            score = -self.depth_weight * depth
+            if _EXTENSION_RE.sub("", path) in self._exact_paths:
+                score += self.exact_weight
+            score += self.path_weight * len(set(find_keywords(path)))
+            if anchor_text:
+                score += self.anchor_weight * len(set(find_keywords(anchor_text.lower())))
+
+            # Sezione = primo segmento del path; le pagine di primo livello non appartengono a una sezione
+            if path.count("/") > 1:
+                section = path.split("/", 2)[1]
+                already_queued = self._section_counts.get(section, 0)
+                score -= self.section_weight * math.log2(1 + already_queued)
+                self._section_counts[section] = already_queued + 1
+            scores.append(score)
+        return scores
@@ -0,0 +1,169 @@
+import logging
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Mapping
+
+from bs4 import BeautifulSoup
+
+from scraper.fetcher import FetchResponse
+from scraper.parser import ExtractedData, WebParser
+from scraper.simhash import simhash
+from scraper.utils.extractors import extract_emails, extract_phone_numbers, filter_emails, filter_phone_numbers
+from scraper.utils.web_analysis import analyze_technologies
+
+logger = logging.getLogger("scraper.page_pipeline")
+
+TEXT_CONTENT_TYPES = ("html", "xml", "text", "json")
+# Tecnologie registrate per ogni pagina di un crawl OSINT
+PAGE_TECHNOLOGY_KEYS = ("framework_cms", "js_libraries", "analytics")
+
+
+class PageAnalysis:
+    '''
+    Funzione: PageAnalysis
+    Analisi di una pagina costruita da una sola risposta: il corpo viene decodificato una volta e l'albero
+    BeautifulSoup costruito una volta, poi parser, estrattori di email e telefoni e rilevamento delle
+    tecnologie lavorano sugli stessi oggetti. Ogni parte è calcolata solo quando viene richiesta e poi riusata.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        str url -> URL della pagina
+        bytes content -> Il corpo della risposta
+        str | None encoding -> Codifica rilevata dal fetcher (None = utf-8)
+        Mapping[str, str] headers -> Intestazioni della risposta
+        WebParser | None parser -> Il parser da usare (None = regole predefinite)
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, url: str, content: bytes, encoding: str | None, headers: Mapping[str, str], parser: WebParser | None = None):
+        self.url = url
+        self.content = content or b""
+        self.encoding = encoding or 'utf-8'
+        self.headers = headers
+        self.parser = parser or WebParser()
+
+    @classmethod
+    def from_response(cls, url: str, response: FetchResponse, parser: WebParser | None = None) -> "PageAnalysis":
+        '''Crea l'analisi di una pagina dalla risposta del fetcher.'''
+        return cls(url, response.content, response.encoding, response.headers, parser)
+
+    @property
+    def is_text(self) -> bool:
+        '''Se la risposta ha un corpo testuale (HTML, XML, testo, JSON) da analizzare.'''
+        content_type_header = self.headers.get('Content-Type', '').lower()
+        return bool(self.content) and any(ct in content_type_header for ct in TEXT_CONTENT_TYPES)
+
+    @cached_property
+    def text(self) -> str:
+        try:
+            return self.content.decode(self.encoding, errors='replace')
+        except LookupError:
+            logger.warning(f"Codifica sconosciuta '{self.encoding}' per {self.url}, uso utf-8")
+            return self.content.decode('utf-8', errors='replace')
+
+    @cached_property
+    def soup(self) -> BeautifulSoup:
+        return BeautifulSoup(self.text, 'html.parser')
+
+    @cached_property
+    def parsed(self) -> ExtractedData:
+        # content_length è la dimensione del corpo ricevuto: il testo non viene ricodificato per misurarlo
+        return self.parser.parse_soup(self.soup, self.url, len(self.content))
+
+    @cached_property
+    def fingerprint(self) -> int | None:
+        return simhash(self.parsed.get("content"))
+
+    @cached_property
+    def emails(self) -> set[str]:
+        return extract_emails(self.text)
+
+    @cached_property
+    def phones(self) -> set[str]:
+        return extract_phone_numbers(self.text)
+
+    @cached_property
+    def technologies(self) -> dict[str, Any]:
+        '''Tecnologie della pagina (come detect_technologies, ma senza scaricarla di nuovo).'''
+        try:
+            return analyze_technologies(self.soup, self.headers, self.text, self.url)
+        except Exception as e:
+            logger.warning(f"Errore nel rilevamento delle tecnologie per {self.url}: {e}")
+            return {}
+
+    def page_technologies(self) -> dict[str, Any]:
+        '''Le tecnologie registrate per ogni pagina di un crawl (framework/CMS, librerie JS, analytics).'''
+        return {key: self.technologies[key] for key in PAGE_TECHNOLOGY_KEYS if key in self.technologies}
+
+
+@dataclass
+class PageResult:
+    '''
+    Funzione: PageResult
+    Risultato compatto dell'analisi di una pagina: è ciò che torna dai processi di parsing, quindi
+    non contiene né il corpo né il testo estratto, solo quanto serve al crawler.
+    Parametri formali:
+        bool is_text -> Se la risposta era testuale ed è stata analizzata
+        dict parsed -> Dati del parser (ExtractedData) senza il campo "content"
+        int | None fingerprint -> Impronta SimHash del testo estratto
+        dict | None osint -> emails, phones (già filtrati) e technologies, se richiesti
+    '''
+    is_text: bool = False
+    parsed: dict[str, Any] = field(default_factory=dict)
+    fingerprint: int | None = None
+    osint: dict[str, Any] | None = None
+
+
+def analyze_content(parser: WebParser, url: str, content: bytes, encoding: str | None, headers: Mapping[str, str],
+                    osint_domain: str | None = None) -> PageResult:
+    '''
+    Funzione: analyze_content
+    Decodifica e analizza una risposta testuale (HTML, XML, testo, JSON) con PageAnalysis: parsing, impronta
+    SimHash e, se richiesto, estrazione di email, telefoni e tecnologie da un solo parsing. Non usa rete né
+    database, quindi può essere eseguita in un thread o in un processo separato.
+    Parametri formali:
+        WebParser parser -> Il parser da usare
+        str url -> URL della pagina
+        bytes content -> Il corpo della risposta
+        str | None encoding -> Codifica rilevata dal fetcher (None = utf-8)
+        Mapping[str, str] headers -> Intestazioni della risposta
+        str | None osint_domain -> Dominio del crawl per filtrare le email; None = nessuna estrazione OSINT
+    Valore di ritorno:
+        PageResult -> Il risultato compatto (is_text False se la risposta non è testuale o non è analizzabile)
+    '''
+    page = PageAnalysis(url, content, encoding, headers, parser)
+    if not page.is_text:
+        return PageResult()
+    try:
+        parsed = dict(page.parsed)
+        fingerprint = page.fingerprint
+    except Exception as e:
+        logger.warning(f"Errore decodifica/parsing contenuto per {url} (Content-Type: {headers.get('Content-Type', '')}): {e}")
+        return PageResult()
+
+    parsed.pop("content", None)
+    osint = None
+    if osint_domain is not None:
+        # Email, telefoni e tecnologie dallo stesso testo e dallo stesso albero usati dal parser
+        osint = {
+            "emails": sorted(filter_emails(page.emails, osint_domain, logger)),
+            "phones": sorted(filter_phone_numbers(page.phones)),
+            "technologies": page.page_technologies(),
+        }
+    return PageResult(True, parsed, fingerprint, osint)
+
+
+# Parser del processo di parsing, impostato una volta per processo da init_parse_worker
+_worker_parser: WebParser | None = None
+
+
+def init_parse_worker(parser: WebParser) -> None:
+    '''Inizializzatore dei processi del pool di parsing: riceve (una volta sola) il parser configurato.'''
+    global _worker_parser
+    _worker_parser = parser
+
+
+def analyze_in_worker(url: str, content: bytes, encoding: str | None, headers: dict[str, str],
+                      osint_domain: str | None = None) -> PageResult:
+    '''Esegue analyze_content in un processo del pool di parsing (vedi init_parse_worker).'''
+    return analyze_content(_worker_parser or WebParser(), url, content, encoding, headers, osint_domain)
@@ -75,7 +75,7 @@ class WebParser:
     def __init__(self, extraction_rules: dict[str, dict[str, Any]] | None = None) -> None:
         self.extraction_rules = extraction_rules or {}
 
-    def parse(self, html: str, url: str, encoding: str = "utf-8") -> ExtractedData:
+    def parse(self, html: str, url: str, encoding: str = "utf-8", content_length: int | None = None) -> ExtractedData:
         '''
         Funzione: parse
         Analizza il contenuto HTML di una pagina e estrae le informazioni rilevanti.
@@ -83,42 +83,50 @@ class WebParser:
             self -> Riferimento all'istanza della classe
             str html -> Contenuto HTML da analizzare
             str url -> URL di origine (necessario per risolvere link relativi e determinare interni/esterni)
-            str encoding -> Codifica del testo HTML
+            str encoding -> Codifica del testo HTML (usata per calcolare content_length se non indicato)
+            int | None content_length -> Lunghezza in byte del corpo originale, se nota (evita di ricodificare il testo)
         Valore di ritorno:
             ExtractedData -> Dizionario contenente i dati estratti dalla pagina
         '''
         
         if not html:
             logger.warning("HTML vuoto, impossibile effettuare il parsing")
-            return {
-                "url": url,
-                "error": "HTML vuoto",
-                "title": "",
-                "description": "",
-                "content": "",
-                "links": [],
-                "metadata": {},
-                "content_length": 0,
-                "lang": None,
-                "canonical_url": None,
-                "image_count": 0,
-                "css_count": 0,
-                "js_count": 0,
-                "internal_links_count": 0,
-                "external_links_count": 0
-            }
+            return self._empty_result(url, "HTML vuoto")
 
         try:
+            if content_length is None:
+                content_length = len(html.encode(encoding))
             # Parse the HTML content with BeautifulSoup
-            soup = BeautifulSoup(html, "html.parser", from_encoding=encoding)
+            soup = BeautifulSoup(html, "html.parser")
+        except UnicodeError:
+            logger.error(f"Errore di codifica per {url}")
+            return self._empty_result(url, "Errore di codifica")
+        except Exception as e:
+            logger.error(f"Errore durante il parsing di {url}: {e}")
+            return self._empty_result(url, str(e))
 
+        return self.parse_soup(soup, url, content_length)
+
+    def parse_soup(self, soup: BeautifulSoup, url: str, content_length: int) -> ExtractedData:
+        '''
+        Funzione: parse_soup
+        Estrae le informazioni di una pagina da un albero BeautifulSoup già costruito, così che parser,
+        estrattori e rilevamento delle tecnologie condividano un solo parsing (vedi PageAnalysis).
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            BeautifulSoup soup -> Albero della pagina
+            str url -> URL di origine (necessario per risolvere link relativi e determinare interni/esterni)
+            int content_length -> Lunghezza in byte del corpo della pagina
+        Valore di ritorno:
+            ExtractedData -> Dizionario contenente i dati estratti dalla pagina
+        '''
+        try:
             # Extract basic data
             links = self._extract_links(soup, url)
             internal_links_count = sum(1 for link in links if link["is_internal"])
             external_links_count = len(links) - internal_links_count
 
             # Extract new metadata
-            content_length = len(html.encode(encoding))
             lang_attr = soup.html.get('lang') if soup.html else None
             
             canonical_link = soup.find("link", attrs={"rel": "canonical"})
@@ -152,44 +160,30 @@ class WebParser:
 
             return data
 
-        except UnicodeDecodeError:
-            logger.error(f"Errore di codifica per {url}")
-            return {
-                "url": url,
-                "error": "Errore di codifica",
-                "title": "",
-                "description": "",
-                "content": "",
-                "links": [],
-                "metadata": {},
-                "content_length": 0,
-                "lang": None,
-                "canonical_url": None,
-                "image_count": 0,
-                "css_count": 0,
-                "js_count": 0,
-                "internal_links_count": 0,
-                "external_links_count": 0
-            }
         except Exception as e:
             logger.error(f"Errore durante il parsing di {url}: {e}")
-            return {
-                "url": url,
-                "error": str(e),
-                "title": "",
-                "description": "",
-                "content": "",
-                "links": [],
-                "metadata": {},
-                "content_length": 0,
-                "lang": None,
-                "canonical_url": None,
-                "image_count": 0,
-                "css_count": 0,
-                "js_count": 0,
-                "internal_links_count": 0,
-                "external_links_count": 0
-            }
+            return self._empty_result(url, str(e))
+
+    @staticmethod
+    def _empty_result(url: str, error: str) -> ExtractedData:
+        '''Risultato del parsing di una pagina non analizzabile, con il motivo in "error".'''
+        return {
+            "url": url,
+            "error": error,
+            "title": "",
+            "description": "",
+            "content": "",
+            "links": [],
+            "metadata": {},
+            "content_length": 0,
+            "lang": None,
+            "canonical_url": None,
+            "image_count": 0,
+            "css_count": 0,
+            "js_count": 0,
+            "internal_links_count": 0,
+            "external_links_count": 0
+        }
 
     def _extract_title(self, soup: BeautifulSoup) -> str:
         '''
@@ -0,0 +1,154 @@
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+# Limiti dell'intervallo di ricontrollo di una pagina (secondi)
+REFRESH_MIN_SECONDS = 3600.0
+REFRESH_MAX_SECONDS = 30 * 86400.0
+REFRESH_INITIAL_SECONDS = 86400.0
+
+
+def content_hash(content: bytes) -> str:
+    '''
+    Funzione: content_hash
+    Calcola l'hash del contenuto scaricato, usato per riconoscere le pagine non cambiate tra due crawl.
+    Parametri formali:
+        bytes content -> Il corpo della risposta
+    Valore di ritorno:
+        str -> SHA-256 esadecimale
+    '''
+    return hashlib.sha256(content).hexdigest()
+
+
+def parse_timestamp(value: str | datetime | None) -> datetime | None:
+    '''
+    Funzione: parse_timestamp
+    Converte in datetime UTC (senza fuso) un timestamp SQLite ("YYYY-MM-DD HH:MM:SS", o già convertito in
+    datetime dalla connessione) o una data W3C delle sitemap ("2024-05-01", "2024-05-01T10:00:00+02:00", "...Z").
+    Parametri formali:
+        str | datetime | None value -> Il timestamp
+    Valore di ritorno:
+        datetime | None -> Il timestamp in UTC, o None se assente o non valido
+    '''
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+@dataclass
+class PageHistory:
+    '''
+    Funzione: PageHistory
+    Storico di controllo di una pagina già scaricata, letto dalla tabella pages.
+    Parametri formali:
+        int page_id -> ID della pagina
+        str | None content_hash -> Hash del contenuto all'ultimo download
+        str | None etag -> ETag dell'ultima risposta
+        str | None last_modified -> Last-Modified dell'ultima risposta
+        float | None refresh_interval -> Intervallo di ricontrollo corrente in secondi
+        str | datetime | None next_check -> Timestamp (UTC) dal quale la pagina va ricontrollata
+        str | datetime | None last_checked -> Timestamp (UTC) dell'ultimo controllo
+    '''
+    page_id: int
+    content_hash: str | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    refresh_interval: float | None = None
+    next_check: str | datetime | None = None
+    last_checked: str | datetime | None = None
+
+    @classmethod
+    def from_row(cls, row: dict[str, Any]) -> "PageHistory":
+        return cls(row["id"], row["content_hash"], row["etag"], row["last_modified"],
+                   row["refresh_interval"], row["next_check"], row["last_checked"])
+
+    def conditional_headers(self) -> dict[str, str]:
+        '''
+        Funzione: conditional_headers
+        Costruisce le intestazioni per una GET condizionale dai validatori salvati (come CacheEntry.conditional_headers).
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            dict[str, str] -> If-None-Match / If-Modified-Since, vuoto se la pagina non aveva validatori
+        '''
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass(frozen=True)
+class RefreshPolicy:
+    '''
+    Funzione: RefreshPolicy
+    Politica di ricontrollo adattiva: ogni pagina ha un proprio intervallo che si riduce quando la pagina
+    risulta cambiata e cresce quando risulta uguale, entro [min_interval, max_interval]. Le pagine che
+    cambiano spesso vengono quindi ricontrollate spesso, quelle statiche sempre più di rado.
+    Parametri formali:
+        float min_interval -> Intervallo minimo in secondi
+        float max_interval -> Intervallo massimo in secondi
+        float initial_interval -> Intervallo assegnato alle pagine senza storico
+        float factor -> Fattore di riduzione/crescita dell'intervallo
+    '''
+    min_interval: float = REFRESH_MIN_SECONDS
+    max_interval: float = REFRESH_MAX_SECONDS
+    initial_interval: float = REFRESH_INITIAL_SECONDS
+    factor: float = 2.0
+
+    def next_interval(self, previous: float | None, changed: bool) -> float:
+        '''
+        Funzione: next_interval
+        Calcola il nuovo intervallo di ricontrollo di una pagina dopo un controllo.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            float | None previous -> Intervallo precedente (None = pagina senza storico)
+            bool changed -> Se il contenuto è cambiato rispetto al controllo precedente
+        Valore di ritorno:
+            float -> Il nuovo intervallo in secondi
+        '''
+        if previous is None:
+            return self.initial_interval
+        interval = previous / self.factor if changed else previous * self.factor
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def decide(self, history: PageHistory | None, now: datetime, sitemap_lastmod: str | None = None) -> str:
+        '''
+        Funzione: decide
+        Decide cosa fare di una pagina in un crawl incrementale.
+        Il lastmod della sitemap, se presente, prevale sull'intervallo: una pagina modificata dopo l'ultimo
+        controllo viene riscaricata anche se non ancora scaduta, una non modificata viene saltata anche se scaduta.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            PageHistory | None history -> Lo storico della pagina (None = mai scaricata)
+            datetime now -> Istante corrente (UTC senza fuso)
+            str | None sitemap_lastmod -> Data di ultima modifica dichiarata nella sitemap
+        Valore di ritorno:
+            str -> "fetch" (download completo), "revalidate" (GET condizionale con i validatori salvati) o "skip"
+        '''
+        if history is None:
+            return "fetch"
+        last_checked = parse_timestamp(history.last_checked)
+        lastmod = parse_timestamp(sitemap_lastmod)
+        if lastmod is not None and last_checked is not None:
+            return "fetch" if lastmod > last_checked else "skip"
+        next_check = parse_timestamp(history.next_check)
+        if next_check is not None and next_check > now:
+            return "skip"
+        return "revalidate"
+
+
+def utc_now() -> datetime:
+    '''Istante corrente in UTC senza fuso, confrontabile con i timestamp SQLite (CURRENT_TIMESTAMP).'''
+    return datetime.now(timezone.utc).replace(tzinfo=None)
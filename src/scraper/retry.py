@@ -0,0 +1,225 @@
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import requests
+
+from scraper.scheduler import host_key
+
+logger = logging.getLogger("scraper.retry")
+
+
+@dataclass
+class RetryPolicy:
+    '''
+    Funzione: RetryPolicy
+    Definisce quando e dopo quanto ripetere una richiesta fallita: status ed eccezioni da ritentare,
+    backoff esponenziale con tetto massimo e jitter, rispetto dell'header Retry-After.
+    Parametri formali:
+        int max_attempts -> Numero massimo di tentativi (incluso il primo)
+        frozenset[int] retry_statuses -> Status HTTP per cui ritentare
+        tuple[type[Exception], ...] retry_exceptions -> Eccezioni per cui ritentare
+        float backoff_base -> Attesa di base in secondi (raddoppia ad ogni tentativo)
+        float backoff_max -> Attesa massima tra due tentativi
+        bool jitter -> Se True l'attesa è scelta a caso tra 0 e il backoff ("full jitter")
+        float max_retry_after -> Retry-After più lungo accettato; oltre si rinuncia a ritentare
+    '''
+    max_attempts: int = 3
+    retry_statuses: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+    retry_exceptions: tuple[type[Exception], ...] = (
+        requests.ConnectionError,
+        requests.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+    )
+    backoff_base: float = 1.0
+    backoff_max: float = 30.0
+    jitter: bool = True
+    max_retry_after: float = 120.0
+
+    def should_retry_status(self, status_code: int) -> bool:
+        return status_code in self.retry_statuses
+
+    def should_retry_exception(self, error: Exception) -> bool:
+        return isinstance(error, self.retry_exceptions)
+
+    def compute_delay(self, attempt: int, retry_after: float | None = None) -> float | None:
+        '''
+        Funzione: compute_delay
+        Calcola l'attesa prima del prossimo tentativo.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            int attempt -> Numero del tentativo appena fallito (da 1)
+            float | None retry_after -> Attesa richiesta dal server tramite Retry-After, se presente
+        Valore di ritorno:
+            float | None -> Secondi di attesa, o None se il Retry-After supera max_retry_after (non ritentare)
+        '''
+        if retry_after is not None and retry_after > self.max_retry_after:
+            return None
+
+        backoff = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        if self.jitter:
+            backoff = random.uniform(0, backoff)
+        if retry_after is not None:
+            return max(retry_after, backoff)
+        return backoff
+
+
+@dataclass
+class CircuitState:
+    '''
+    Funzione: CircuitState
+    Stato del circuit breaker per un singolo host.
+    Parametri formali:
+        int consecutive_failures -> Fallimenti consecutivi osservati
+        float | None opened_at -> Istante (time.monotonic) di apertura del circuito, None se chiuso
+        bool probing -> True mentre una richiesta di prova (half-open) è in corso
+        int | None probe_owner -> Thread che sta eseguendo la richiesta di prova
+        int trips -> Numero di volte in cui il circuito si è aperto
+        int rejected -> Richieste rifiutate senza contattare l'host
+    '''
+    consecutive_failures: int = 0
+    opened_at: float | None = None
+    probing: bool = False
+    probe_owner: int | None = None
+    trips: int = 0
+    rejected: int = 0
+
+
+class CircuitBreaker:
+    '''
+    Funzione: CircuitBreaker
+    Circuit breaker per host: dopo failure_threshold fallimenti consecutivi (errori di connessione,
+    timeout, 5xx) il circuito si apre e le richieste verso quell'host falliscono subito. Trascorso
+    reset_timeout viene lasciata passare una sola richiesta di prova: se riesce il circuito si chiude,
+    altrimenti resta aperto per un altro periodo. Se la prova termina senza esito (vedi release_probe)
+    la richiesta successiva diventa la nuova prova.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        int failure_threshold -> Fallimenti consecutivi che aprono il circuito
+        float reset_timeout -> Secondi dopo i quali si tenta una richiesta di prova
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._hosts: dict[str, CircuitState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host: str) -> CircuitState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = CircuitState()
+            self._hosts[host] = state
+        return state
+
+    def allow(self, url: str) -> bool:
+        '''
+        Funzione: allow
+        Indica se è consentito inviare una richiesta all'host dell'URL.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL (o l'host) da contattare
+        Valore di ritorno:
+            bool -> True se la richiesta può partire, False se il circuito è aperto
+        '''
+        with self._lock:
+            state = self._state(host_key(url))
+            if state.opened_at is None:
+                return True
+            if not state.probing and time.monotonic() - state.opened_at >= self.reset_timeout:
+                state.probing = True # half-open: passa una sola richiesta di prova
+                state.probe_owner = threading.get_ident()
+                return True
+            state.rejected += 1
+            return False
+
+    def record_success(self, url: str) -> None:
+        '''
+        Funzione: record_success
+        Registra una risposta valida dall'host e chiude il circuito.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL (o l'host) contattato
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        key = host_key(url)
+        with self._lock:
+            state = self._state(key)
+            if state.opened_at is not None:
+                logger.info(f"Circuito chiuso per {key}: l'host risponde di nuovo")
+            state.consecutive_failures = 0
+            state.opened_at = None
+            state.probing = False
+            state.probe_owner = None
+
+    def record_failure(self, url: str) -> None:
+        '''
+        Funzione: record_failure
+        Registra un fallimento dell'host e apre il circuito al raggiungimento della soglia.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL (o l'host) contattato
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        key = host_key(url)
+        with self._lock:
+            state = self._state(key)
+            state.consecutive_failures += 1
+            if state.probing or (state.opened_at is None and state.consecutive_failures >= self.failure_threshold):
+                if state.opened_at is None:
+                    state.trips += 1
+                    logger.warning(f"Circuito aperto per {key} dopo {state.consecutive_failures} fallimenti consecutivi")
+                state.opened_at = time.monotonic()
+                state.probing = False
+                state.probe_owner = None
+
+    def release_probe(self, url: str) -> None:
+        '''
+        Funzione: release_probe
+        Libera la richiesta di prova del thread corrente se è terminata senza registrare un esito (es. errore
+        non dovuto all'host): il circuito resta aperto e la richiesta successiva può fare da nuova prova.
+        Non fa nulla se il thread corrente non sta eseguendo la prova.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL (o l'host) contattato
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        with self._lock:
+            state = self._hosts.get(host_key(url))
+            if state is not None and state.probing and state.probe_owner == threading.get_ident():
+                state.probing = False
+                state.probe_owner = None
+
+    def is_open(self, url: str) -> bool:
+        with self._lock:
+            state = self._hosts.get(host_key(url))
+            return state is not None and state.opened_at is not None
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        '''
+        Funzione: get_stats
+        Restituisce lo stato del circuito per ogni host che ha registrato almeno un fallimento.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            dict[str, dict[str, Any]] -> Per host: open, consecutive_failures, trips, rejected
+        '''
+        with self._lock:
+            return {
+                host: {
+                    "open": state.opened_at is not None,
+                    "consecutive_failures": state.consecutive_failures,
+                    "trips": state.trips,
+                    "rejected": state.rejected,
+                }
+                for host, state in self._hosts.items()
+                if state.trips or state.consecutive_failures
+            }
@@ -0,0 +1,229 @@
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any
+from urllib.parse import urlparse
+
+logger = logging.getLogger("scraper.scheduler")
+
+# Status con cui un server chiede esplicitamente di rallentare
+BACKOFF_STATUSES = {429, 503}
+
+
+def host_key(url: str) -> str:
+    '''
+    Funzione: host_key
+    Restituisce la chiave (netloc in minuscolo) con cui lo scheduler identifica l'host di un URL.
+    Parametri formali:
+        str url -> L'URL (o direttamente un netloc)
+    Valore di ritorno:
+        str -> Il netloc in minuscolo
+    '''
+    netloc = urlparse(url).netloc if "://" in url else url
+    return netloc.lower()
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    '''
+    Funzione: parse_retry_after
+    Interpreta l'header Retry-After, espresso in secondi o come data HTTP.
+    Parametri formali:
+        str | None value -> Il valore dell'header
+    Valore di ritorno:
+        float | None -> I secondi di attesa richiesti, o None se l'header è assente o non valido
+    '''
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class HostState:
+    '''
+    Funzione: HostState
+    Stato di politeness di un singolo host.
+    Parametri formali:
+        float delay -> Ritardo corrente tra due richieste consecutive
+        float min_delay -> Ritardo minimo (politeness configurata o Crawl-delay di robots.txt)
+        float next_allowed -> Istante (time.monotonic) dal quale è consentita la prossima richiesta
+        float | None latency -> Media mobile dei tempi di risposta osservati
+        int requests -> Richieste programmate verso l'host
+        int backoffs -> Rallentamenti dovuti a risposte 429/503
+        float waited -> Secondi totali di attesa imposti
+    '''
+    delay: float
+    min_delay: float
+    next_allowed: float = 0.0
+    latency: float | None = None
+    requests: int = 0
+    backoffs: int = 0
+    waited: float = 0.0
+
+
+class HostScheduler:
+    '''
+    Funzione: HostScheduler
+    Gestisce la politeness per host: ogni host ha il proprio istante di prossima richiesta consentita,
+    quindi richieste verso host diversi non si attendono a vicenda. Il ritardo di ciascun host si adatta
+    alla latenza osservata (server lenti -> richieste più distanziate) e raddoppia in caso di 429/503,
+    senza mai scendere sotto il minimo configurato o il Crawl-delay di robots.txt. A ogni slot si aggiunge
+    un'attesa casuale tra 0 e jitter secondi, così le richieste non arrivano a intervalli regolari.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        float default_delay -> Ritardo minimo predefinito tra richieste allo stesso host
+        float jitter -> Attesa casuale massima aggiunta al ritardo di ogni richiesta
+        float max_delay -> Ritardo massimo raggiungibile con il backoff
+        float backoff_factor -> Fattore moltiplicativo del ritardo dopo una risposta 429/503
+        float latency_factor -> Rapporto desiderato tra ritardo e latenza media del server
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, default_delay: float = 1.0, max_delay: float = 60.0, backoff_factor: float = 2.0, latency_factor: float = 1.0, jitter: float = 0.0):
+        self.default_delay = default_delay
+        self.jitter = max(0.0, jitter)
+        self.max_delay = max_delay
+        self.backoff_factor = backoff_factor
+        self.latency_factor = latency_factor
+        self._hosts: dict[str, HostState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = HostState(delay=self.default_delay, min_delay=self.default_delay)
+            self._hosts[host] = state
+        return state
+
+    def set_min_delay(self, host: str, min_delay: float) -> None:
+        '''
+        Funzione: set_min_delay
+        Imposta il ritardo minimo per un host (es. politeness richiesta dall'utente o Crawl-delay di robots.txt).
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str host -> L'host (o un URL dell'host)
+            float min_delay -> Il ritardo minimo in secondi
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        with self._lock:
+            state = self._state(host_key(host))
+            state.min_delay = min(max(0.0, min_delay), self.max_delay)
+            state.delay = max(state.delay, state.min_delay)
+
+    def reserve(self, host: str) -> float:
+        '''
+        Funzione: reserve
+        Prenota il prossimo slot libero per l'host e restituisce quanto attendere prima di usarlo.
+        Più chiamanti concorrenti sullo stesso host ricevono slot distanziati del ritardo corrente.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str host -> L'host (o un URL dell'host)
+        Valore di ritorno:
+            float -> Secondi da attendere prima di inviare la richiesta
+        '''
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(host_key(host))
+            slot = max(now, state.next_allowed)
+            state.next_allowed = slot + state.delay + (random.uniform(0.0, self.jitter) if self.jitter else 0.0)
+            state.requests += 1
+            wait = slot - now
+            state.waited += wait
+        return wait
+
+    def ready_in(self, host: str) -> float:
+        '''
+        Funzione: ready_in
+        Restituisce quanti secondi mancano al prossimo slot libero dell'host, senza prenotarlo.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str host -> L'host (o un URL dell'host)
+        Valore di ritorno:
+            float -> Secondi di attesa (0 se l'host è servibile subito)
+        '''
+        with self._lock:
+            state = self._hosts.get(host_key(host))
+            if state is None:
+                return 0.0
+            return max(0.0, state.next_allowed - time.monotonic())
+
+    def wait(self, host: str) -> float:
+        '''
+        Funzione: wait
+        Attende (bloccando il thread corrente) il proprio turno per l'host.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str host -> L'host (o un URL dell'host)
+        Valore di ritorno:
+            float -> Secondi effettivamente attesi
+        '''
+        wait = self.reserve(host)
+        if wait > 0:
+            logger.debug(f"Attesa di {wait:.2f}s per politeness verso {host_key(host)}")
+            time.sleep(wait)
+        return wait
+
+    def record_response(self, host: str, status_code: int, latency: float, retry_after: float | None = None) -> None:
+        '''
+        Funzione: record_response
+        Aggiorna il ritardo dell'host in base alla risposta ricevuta: backoff su 429/503 (rispettando
+        Retry-After), altrimenti avvicina il ritardo alla latenza osservata.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str host -> L'host (o un URL dell'host)
+            int status_code -> Codice di stato HTTP della risposta
+            float latency -> Tempo di risposta in secondi
+            float | None retry_after -> Attesa richiesta dal server tramite Retry-After, se presente
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        key = host_key(host)
+        with self._lock:
+            state = self._state(key)
+            state.latency = latency if state.latency is None else 0.7 * state.latency + 0.3 * latency
+
+            if status_code in BACKOFF_STATUSES:
+                state.backoffs += 1
+                state.delay = min(self.max_delay, max(state.delay * self.backoff_factor, retry_after or 0.0, 0.5))
+                pause = min(self.max_delay, retry_after) if retry_after is not None else state.delay
+                state.next_allowed = max(state.next_allowed, time.monotonic() + pause)
+                logger.warning(f"{key} ha risposto {status_code}: ritardo portato a {state.delay:.2f}s")
+                return
+
+            # Media tra ritardo corrente e obiettivo: recupera gradualmente dopo un backoff
+            target = state.latency * self.latency_factor
+            state.delay = min(self.max_delay, max(state.min_delay, (state.delay + target) / 2))
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        '''
+        Funzione: get_stats
+        Restituisce lo stato di politeness di ogni host contattato.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            dict[str, dict[str, Any]] -> Per ogni host: delay, min_delay, latency, requests, backoffs, waited
+        '''
+        with self._lock:
+            return {
+                host: {
+                    "delay": round(state.delay, 3),
+                    "min_delay": state.min_delay,
+                    "latency": round(state.latency, 3) if state.latency is not None else None,
+                    "requests": state.requests,
+                    "backoffs": state.backoffs,
+                    "waited": round(state.waited, 3),
+                }
+                for host, state in self._hosts.items()
+            }
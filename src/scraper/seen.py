@@ -0,0 +1,168 @@
+import hashlib
+import logging
+import math
+from array import array
+from bisect import bisect_left
+from heapq import merge
+from typing import Iterable
+
+logger = logging.getLogger("scraper.seen")
+
+# Fingerprint accumulati in un set prima di essere fusi nei blocchi ordinati
+MERGE_THRESHOLD = 65536
+# Dimensione massima (in impronte) di un blocco ordinato: una fusione non riscrive mai più di così (32 MB)
+MAX_RUN_SIZE = 1 << 22
+
+
+def url_fingerprint(url: str) -> int:
+    '''
+    Funzione: url_fingerprint
+    Calcola l'impronta a 64 bit di un URL (blake2b troncato: collisioni trascurabili fino a miliardi di URL).
+    Parametri formali:
+        str url -> L'URL
+    Valore di ritorno:
+        int -> L'impronta come intero senza segno a 64 bit
+    '''
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8", errors="surrogatepass"), digest_size=8).digest(), "big")
+
+
+class UrlSeenSet:
+    '''
+    Funzione: UrlSeenSet
+    Insieme esatto e compatto degli URL già visti dal crawler. Conserva solo impronte a 64 bit in
+    blocchi ordinati (array "Q", ricerca binaria) più un piccolo set dei fingerprint recenti, che
+    ogni merge_threshold inserimenti diventa un nuovo blocco. I blocchi si fondono con i precedenti
+    di dimensione non maggiore (come un contatore binario), quindi ogni impronta viene riscritta
+    O(log n) volte e nessuna fusione supera max_run_size impronte: costo e picco di memoria di una
+    fusione sono limitati. La memoria cresce di 8 byte per URL; per un limite fisso di memoria, a
+    costo di qualche falso positivo, vedi BloomUrlSet.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        Iterable[str] urls -> URL con cui inizializzare l'insieme
+        int merge_threshold -> Dimensione del set dei recenti oltre la quale diventa un blocco ordinato
+        int max_run_size -> Dimensione oltre la quale un blocco non viene più fuso
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, urls: Iterable[str] = (), merge_threshold: int = MERGE_THRESHOLD, max_run_size: int = MAX_RUN_SIZE):
+        self.merge_threshold = merge_threshold
+        self.max_run_size = max_run_size
+        self._runs: list[array] = [] # blocchi ordinati, dal più grande al più piccolo
+        self._recent: set[int] = set()
+        for url in urls:
+            self.add(url)
+
+    def __len__(self) -> int:
+        return sum(len(run) for run in self._runs) + len(self._recent)
+
+    def __contains__(self, url: str) -> bool:
+        return self._contains(url_fingerprint(url))
+
+    def _contains(self, fingerprint: int) -> bool:
+        if fingerprint in self._recent:
+            return True
+        for run in self._runs:
+            index = bisect_left(run, fingerprint)
+            if index < len(run) and run[index] == fingerprint:
+                return True
+        return False
+
+    def add(self, url: str) -> bool:
+        '''
+        Funzione: add
+        Aggiunge un URL all'insieme.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL da aggiungere
+        Valore di ritorno:
+            bool -> True se l'URL era nuovo, False se era già presente
+        '''
+        fingerprint = url_fingerprint(url)
+        if self._contains(fingerprint):
+            return False
+        self._recent.add(fingerprint)
+        if len(self._recent) >= self.merge_threshold:
+            self._merge()
+        return True
+
+    def _merge(self) -> None:
+        run = array("Q", sorted(self._recent))
+        self._recent.clear()
+        # Fonde solo blocchi di dimensione comparabile: costo ammortizzato O(log n) per impronta
+        while self._runs and len(self._runs[-1]) <= len(run) and len(self._runs[-1]) + len(run) <= self.max_run_size:
+            run = array("Q", merge(self._runs.pop(), run))
+        self._runs.append(run)
+
+    def clear(self) -> None:
+        self._runs.clear()
+        self._recent.clear()
+
+
+class BloomUrlSet:
+    '''
+    Funzione: BloomUrlSet
+    Insieme approssimato degli URL già visti, con la stessa interfaccia di UrlSeenSet ma memoria fissa:
+    un filtro di Bloom dimensionato per capacity URL con un tasso di falsi positivi false_positive_rate
+    (circa 1,2 byte per URL all'1%). Un falso positivo fa considerare già visto un URL nuovo, che quindi
+    non viene scaricato; oltre capacity il tasso di falsi positivi cresce. Da usare per crawl molto grandi
+    in cui la memoria di UrlSeenSet non è accettabile.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        int capacity -> Numero di URL previsto
+        float false_positive_rate -> Tasso di falsi positivi desiderato a capacity URL (tra 0 e 1)
+        Iterable[str] urls -> URL con cui inizializzare l'insieme
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.001, urls: Iterable[str] = ()):
+        if capacity <= 0 or not 0 < false_positive_rate < 1:
+            raise ValueError("capacity deve essere positiva e false_positive_rate compreso tra 0 e 1")
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+        for url in urls:
+            self.add(url)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _positions(self, url: str) -> list[int]:
+        # Double hashing (Kirsch-Mitzenmacher): k posizioni da due impronte a 64 bit
+        digest = hashlib.blake2b(url.encode("utf-8", errors="surrogatepass"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, url: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(url))
+
+    def add(self, url: str) -> bool:
+        '''
+        Funzione: add
+        Aggiunge un URL all'insieme.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL da aggiungere
+        Valore di ritorno:
+            bool -> True se l'URL era nuovo, False se era (probabilmente) già presente
+        '''
+        new = False
+        for pos in self._positions(url):
+            byte, bit = pos >> 3, 1 << (pos & 7)
+            if not self._bits[byte] & bit:
+                self._bits[byte] |= bit
+                new = True
+        if new:
+            self._count += 1
+            if self._count == self.capacity + 1:
+                logger.warning(f"Superata la capacità del filtro di Bloom ({self.capacity} URL): i falsi positivi aumentano")
+        return new
+
+    def clear(self) -> None:
+        self._bits = bytearray(len(self._bits))
+        self._count = 0
@@ -0,0 +1,94 @@
+import hashlib
+import re
+from collections import defaultdict
+
+FINGERPRINT_BITS = 64
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8", errors="surrogatepass"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str | None, shingle_size: int = 3) -> int | None:
+    '''
+    Funzione: simhash
+    Calcola l'impronta SimHash a 64 bit di un testo, a partire dagli shingle di parole consecutive:
+    testi quasi uguali producono impronte che differiscono in pochi bit.
+    Parametri formali:
+        str | None text -> Il testo (es. ExtractedData.content)
+        int shingle_size -> Numero di parole per shingle
+    Valore di ritorno:
+        int | None -> L'impronta, o None se il testo è troppo corto per essere significativo
+    '''
+    if not text:
+        return None
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < shingle_size:
+        return None
+
+    weights = [0] * FINGERPRINT_BITS
+    for i in range(len(tokens) - shingle_size + 1):
+        shingle_hash = _hash64(" ".join(tokens[i:i + shingle_size]))
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if shingle_hash >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class SimHashIndex:
+    '''
+    Funzione: SimHashIndex
+    Indice per trovare impronte SimHash entro una distanza di Hamming massima senza confronti con
+    tutte le impronte note: l'impronta è divisa in max_distance + 1 blocchi e, per il principio dei
+    cassetti, due impronte abbastanza vicine coincidono esattamente in almeno un blocco; si
+    confrontano quindi solo le impronte che condividono un blocco.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        int max_distance -> Bit di differenza entro cui due pagine sono considerate quasi duplicate
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self._blocks = max_distance + 1
+        self._block_bits = -(-FINGERPRINT_BITS // self._blocks) # divisione arrotondata per eccesso
+        self._tables: list[dict[int, list[tuple[int, str]]]] = [defaultdict(list) for _ in range(self._blocks)]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _keys(self, fingerprint: int) -> list[int]:
+        mask = (1 << self._block_bits) - 1
+        return [(fingerprint >> (i * self._block_bits)) & mask for i in range(self._blocks)]
+
+    def find(self, fingerprint: int) -> str | None:
+        '''
+        Funzione: find
+        Cerca una pagina già indicizzata quasi uguale a quella dell'impronta data.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            int fingerprint -> L'impronta SimHash
+        Valore di ritorno:
+            str | None -> L'URL della pagina quasi duplicata, o None
+        '''
+        for table, key in zip(self._tables, self._keys(fingerprint)):
+            for candidate, url in table.get(key, ()):
+                if hamming_distance(candidate, fingerprint) <= self.max_distance:
+                    return url
+        return None
+
+    def add(self, fingerprint: int, url: str) -> None:
+        for table, key in zip(self._tables, self._keys(fingerprint)):
+            table[key].append((fingerprint, url))
+        self._size += 1
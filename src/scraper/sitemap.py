@@ -0,0 +1,157 @@
+import gzip
+import io
+import logging
+import tempfile
+import xml.etree.ElementTree as ET
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Callable, Iterator
+from urllib.parse import urljoin
+
+from scraper.fetcher import WebFetcher
+
+logger = logging.getLogger("scraper.sitemap")
+
+GZIP_MAGIC = b"\x1f\x8b"
+# Dimensione massima di una sitemap secondo il protocollo (sitemaps.org): 50 MB non compressi
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+
+
+@dataclass
+class SitemapEntry:
+    '''
+    Funzione: SitemapEntry
+    Un URL elencato in una sitemap, con i suggerimenti facoltativi per il crawler.
+    Parametri formali:
+        str loc -> L'URL della pagina
+        str | None lastmod -> Data di ultima modifica dichiarata (formato W3C, confrontabile come stringa)
+        float | None priority -> Priorità relativa dichiarata (0.0 - 1.0)
+    '''
+    loc: str
+    lastmod: str | None = None
+    priority: float | None = None
+
+
+def _local_name(tag: str) -> str:
+    # "{http://www.sitemaps.org/schemas/sitemap/0.9}url" -> "url"
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_sitemap(source: IO[bytes]) -> Iterator[tuple[str, SitemapEntry]]:
+    '''
+    Funzione: parse_sitemap
+    Analizza in streaming una sitemap o un indice di sitemap: ogni elemento <url> o <sitemap> viene
+    restituito appena chiuso e poi rimosso dall'albero, quindi la memoria non cresce con il file.
+    Parametri formali:
+        IO[bytes] source -> Il contenuto XML (file o buffer, anche già decompresso)
+    Valore di ritorno:
+        Iterator[tuple[str, SitemapEntry]] -> Coppie ("url", voce) per le pagine e ("sitemap", voce) per le sotto-sitemap
+    '''
+    root = None
+    for event, element in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+            continue
+
+        kind = _local_name(element.tag)
+        if kind not in ("url", "sitemap"):
+            continue
+        fields = {_local_name(child.tag): (child.text or "").strip() for child in element}
+        if fields.get("loc"):
+            try:
+                priority = float(fields["priority"]) if fields.get("priority") else None
+            except ValueError:
+                priority = None
+            yield kind, SitemapEntry(fields["loc"], fields.get("lastmod") or None, priority)
+        element.clear()
+        root.clear() # rimuove anche i riferimenti agli elementi già elaborati
+
+
+class SitemapIngester:
+    '''
+    Funzione: SitemapIngester
+    Legge le sitemap di un sito (anche indici di sitemap e file .gz) e ne restituisce gli URL in streaming.
+    I file compressi vengono scaricati su disco in una directory temporanea e decompressi durante l'analisi.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        WebFetcher fetcher -> Fetcher da usare (politeness, cache e retry come per le pagine)
+        int max_sitemaps -> Numero massimo di file sitemap da leggere (protezione da indici enormi o ciclici)
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, fetcher: WebFetcher, max_sitemaps: int = 100):
+        self.fetcher = fetcher
+        self.max_sitemaps = max_sitemaps
+        self.stats = {"sitemaps_read": 0, "sitemaps_failed": 0, "urls_listed": 0}
+
+    def iter_entries(self, sitemap_urls: list[str], accept_sitemap: Callable[[str], bool] | None = None) -> Iterator[SitemapEntry]:
+        '''
+        Funzione: iter_entries
+        Restituisce gli URL elencati nelle sitemap indicate, seguendo gli indici di sitemap.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            list[str] sitemap_urls -> Le sitemap di partenza (es. RobotsData.sitemaps)
+            Callable[[str], bool] | None accept_sitemap -> Filtro sulle sotto-sitemap da seguire (es. stesso sito)
+        Valore di ritorno:
+            Iterator[SitemapEntry] -> Le voci <url> di tutte le sitemap lette
+        '''
+        pending = deque(sitemap_urls)
+        seen = set(sitemap_urls)
+        with tempfile.TemporaryDirectory(prefix="browsint_sitemap_") as tmp_dir:
+            while pending and self.stats["sitemaps_read"] < self.max_sitemaps:
+                sitemap_url = pending.popleft()
+                try:
+                    for kind, entry in self._read(sitemap_url, Path(tmp_dir)):
+                        entry.loc = urljoin(sitemap_url, entry.loc)
+                        if kind == "url":
+                            self.stats["urls_listed"] += 1
+                            yield entry
+                        elif entry.loc not in seen and (accept_sitemap is None or accept_sitemap(entry.loc)):
+                            seen.add(entry.loc)
+                            pending.append(entry.loc)
+                except (ET.ParseError, OSError, EOFError) as e:
+                    self.stats["sitemaps_failed"] += 1
+                    logger.warning(f"Sitemap {sitemap_url} non leggibile: {e}")
+            if pending:
+                logger.warning(f"Raggiunto il limite di {self.max_sitemaps} sitemap: {len(pending)} non lette")
+
+    def _read(self, sitemap_url: str, tmp_dir: Path) -> Iterator[tuple[str, SitemapEntry]]:
+        '''
+        Funzione: _read
+        Scarica una sitemap su disco in streaming (anche se XML non compresso, fino a SITEMAP_MAX_BYTES) e ne
+        analizza il contenuto, decomprimendolo se è in formato gzip.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str sitemap_url -> URL della sitemap
+            Path tmp_dir -> Directory per i file scaricati in streaming
+        Valore di ritorno:
+            Iterator[tuple[str, SitemapEntry]] -> Le voci della sitemap (vedi parse_sitemap)
+        '''
+        download_path = tmp_dir / f"sitemap_{self.stats['sitemaps_read']}.bin"
+        response = self.fetcher.fetch_full_response(sitemap_url, destination=lambda url, content_type: download_path,
+                                                    max_bytes=max(SITEMAP_MAX_BYTES, self.fetcher.max_bytes_for("application/xml")),
+                                                    stream_inline=True)
+        if not response or response.status_code != 200:
+            self.stats["sitemaps_failed"] += 1
+            logger.warning(f"Sitemap {sitemap_url} non scaricata (status: {response.status_code if response else 'N/A'})")
+            return
+        self.stats["sitemaps_read"] += 1
+        logger.info(f"Lettura sitemap {sitemap_url}")
+
+        if response.file_path:
+            with open(response.file_path, "rb") as raw:
+                is_gzip = raw.read(2) == GZIP_MAGIC
+            opener = gzip.open if is_gzip else open
+            try:
+                with opener(response.file_path, "rb") as source:
+                    yield from parse_sitemap(source)
+            finally:
+                Path(response.file_path).unlink(missing_ok=True)
+        elif response.content:
+            source = io.BytesIO(response.content)
+            if response.content[:2] == GZIP_MAGIC:
+                source = gzip.GzipFile(fileobj=source)
+            yield from parse_sitemap(source)
@@ -0,0 +1,162 @@
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import parse_qsl, urlsplit
+
+from scraper.scheduler import host_key
+
+logger = logging.getLogger("scraper.traps")
+
+_DIGITS_RE = re.compile(r"\d+")
+# Segmenti che identificano un oggetto più che una sezione: hash, UUID, token di sessione
+_ID_SEGMENT_RE = re.compile(r"^(?=.*\d)[0-9a-f-]{16,}$", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class TrapLimits:
+    '''
+    Funzione: TrapLimits
+    Limiti usati da CrawlTrapDetector per riconoscere le trappole per crawler.
+    Parametri formali:
+        int max_per_pattern -> URL massimi per modello di URL (path con i numeri e le date sostituiti da segnaposto,
+                               più i nomi dei parametri di query): calendari, archivi per data, paginazioni infinite
+        int max_query_variants -> Varianti di query massime per lo stesso path (ricerche a faccette, filtri combinati)
+        int max_query_params -> Parametri di query massimi in un URL
+        int max_segment_repeats -> Volte massime in cui lo stesso segmento può comparire nel path
+        int max_url_length -> Lunghezza massima di un URL
+        int max_length_growth -> Volte massime in cui una sezione del sito può produrre un URL più lungo di tutti
+                                 quelli già visti (URL che si allungano a ogni link: /a/b/a/b/..., ?p=1&p=1&...)
+    '''
+    max_per_pattern: int = 500
+    max_query_variants: int = 100
+    max_query_params: int = 8
+    max_segment_repeats: int = 2
+    max_url_length: int = 1024
+    max_length_growth: int = 40
+
+
+class CrawlTrapDetector:
+    '''
+    Funzione: CrawlTrapDetector
+    Rileva le trappole per crawler (calendari, ricerche a faccette, path ripetuti, URL sempre più lunghi)
+    prima che gli URL entrino nella frontiera. Ogni URL nuovo viene contato nel proprio modello, nel proprio
+    path e nella propria sezione: oltre i limiti di TrapLimits viene rifiutato con il motivo del rifiuto.
+    Lo stato occupa memoria per modello e per path con query, non per URL.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        TrapLimits | None limits -> Limiti da applicare (None = predefiniti)
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, limits: TrapLimits | None = None):
+        self.limits = limits or TrapLimits()
+        self.reset()
+
+    def reset(self) -> None:
+        '''Azzera conteggi e statistiche (all'inizio di ogni crawl).'''
+        self._pattern_counts: dict[str, int] = {}
+        self._query_variants: dict[str, int] = {}
+        self._longest: dict[str, tuple[int, int]] = {} # sezione -> (lunghezza massima, volte in cui è cresciuta)
+        self._rejected: dict[str, int] = {}
+        self._capped_patterns: dict[str, int] = {}
+
+    @staticmethod
+    def url_pattern(url: str) -> str:
+        '''
+        Funzione: url_pattern
+        Calcola il modello di un URL: host, path con numeri, date e identificativi sostituiti da segnaposto
+        e nomi dei parametri di query senza valori.
+        Parametri formali:
+            str url -> L'URL
+        Valore di ritorno:
+            str -> Il modello (es. "site.it/eventi/{n}/{n}/{n}?view" per /eventi/2024/05/01?view=day)
+        '''
+        parts = urlsplit(url)
+        segments = ["{id}" if _ID_SEGMENT_RE.match(segment) else _DIGITS_RE.sub("{n}", segment)
+                    for segment in parts.path.split("/")]
+        pattern = host_key(parts.netloc) + "/".join(segments)
+        if parts.query:
+            pattern += "?" + "&".join(sorted({name for name, _ in parse_qsl(parts.query, keep_blank_values=True)}))
+        return pattern
+
+    def _repeated_path(self, segments: list[str]) -> bool:
+        # Segmenti numerici esclusi: /2024/05/05 è una data, non un ciclo
+        named = [segment for segment in segments if segment and not segment.isdigit()]
+        if any(named.count(segment) > self.limits.max_segment_repeats for segment in set(named)):
+            return True
+        # Blocco ripetuto subito dopo se stesso: /a/b/a/b (link relativi risolti male)
+        for size in range(2, len(named) // 2 + 1):
+            for start in range(len(named) - 2 * size + 1):
+                if named[start:start + size] == named[start + size:start + 2 * size]:
+                    return True
+        return False
+
+    def check(self, url: str) -> str | None:
+        '''
+        Funzione: check
+        Decide se un URL nuovo (non ancora visto) può essere accodato e, se sì, lo conta.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL canonico da accodare
+        Valore di ritorno:
+            str | None -> None se l'URL è ammesso, altrimenti il motivo del rifiuto
+                          ("url_length", "repeated_path", "query_params", "query_variants", "url_growth", "pattern_cap")
+        '''
+        limits = self.limits
+        parts = urlsplit(url)
+        params = parse_qsl(parts.query, keep_blank_values=True)
+        path_key = host_key(parts.netloc) + parts.path
+        section = host_key(parts.netloc) + "/" + parts.path.lstrip("/").split("/", 1)[0]
+        pattern = self.url_pattern(url)
+
+        reason = None
+        if len(url) > limits.max_url_length:
+            reason = "url_length"
+        elif self._repeated_path(parts.path.split("/")):
+            reason = "repeated_path"
+        elif len(params) > limits.max_query_params:
+            reason = "query_params"
+        elif params and self._query_variants.get(path_key, 0) >= limits.max_query_variants:
+            reason = "query_variants"
+        elif self._pattern_counts.get(pattern, 0) >= limits.max_per_pattern:
+            reason = "pattern_cap"
+        else:
+            longest, growth = self._longest.get(section, (0, 0))
+            if len(url) > longest:
+                if growth >= limits.max_length_growth:
+                    reason = "url_growth"
+                else:
+                    self._longest[section] = (len(url), growth + 1)
+
+        if reason:
+            self._rejected[reason] = self._rejected.get(reason, 0) + 1
+            if reason in ("pattern_cap", "query_variants", "url_growth"):
+                capped = pattern if reason == "pattern_cap" else path_key if reason == "query_variants" else section
+                if capped not in self._capped_patterns:
+                    logger.warning(f"Possibile trappola per crawler ({reason}): {capped}, ulteriori URL ignorati")
+                self._capped_patterns[capped] = self._capped_patterns.get(capped, 0) + 1
+            return reason
+
+        self._pattern_counts[pattern] = self._pattern_counts.get(pattern, 0) + 1
+        if params:
+            self._query_variants[path_key] = self._query_variants.get(path_key, 0) + 1
+        return None
+
+    def get_stats(self) -> dict[str, Any]:
+        '''
+        Funzione: get_stats
+        Restituisce le statistiche delle trappole dall'ultimo reset.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+        Valore di ritorno:
+            dict[str, Any] -> rejected (URL rifiutati in totale), by_reason (rifiutati per motivo),
+                              top_traps (fino a 10 modelli, path o sezioni limitati, con gli URL rifiutati)
+        '''
+        top = sorted(self._capped_patterns.items(), key=lambda item: item[1], reverse=True)[:10]
+        return {
+            "rejected": sum(self._rejected.values()),
+            "by_reason": dict(self._rejected),
+            "top_traps": [{"pattern": pattern, "rejected": count} for pattern, count in top],
+        }
@@ -0,0 +1,88 @@
+#  Rilevamento della codifica dei contenuti scaricati, dal metodo più economico al più costoso
+
+import codecs
+import re
+
+from requests.compat import chardet
+
+# Quanti byte iniziali esaminare per <meta charset> / dichiarazione XML
+META_SCAN_BYTES = 4096
+# Dimensione massima del campione passato al rilevamento statistico
+DETECTION_SAMPLE_BYTES = 64 * 1024
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+_HEADER_CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+_META_CHARSET_RE = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE)
+_XML_ENCODING_RE = re.compile(rb"^<\?xml[^>]+encoding\s*=\s*[\"']([\w.:-]+)[\"']", re.IGNORECASE)
+_TEXT_TYPES = ("html", "xml", "text", "json", "javascript")
+
+
+def _normalize(label: str | bytes | None) -> str | None:
+    '''
+    Funzione: _normalize
+    Verifica che un nome di codifica sia noto a Python e lo restituisce in forma canonica.
+    Parametri formali:
+        str | bytes | None label -> Il nome della codifica dichiarato
+    Valore di ritorno:
+        str | None -> Il nome canonico (es. "utf-8", "cp1252"), None se sconosciuto
+    '''
+    if not label:
+        return None
+    if isinstance(label, bytes):
+        label = label.decode("ascii", errors="ignore")
+    try:
+        return codecs.lookup(label.strip()).name
+    except LookupError:
+        return None
+
+
+def detect_encoding(content: bytes | None, content_type: str = "") -> tuple[str | None, str | None]:
+    '''
+    Funzione: detect_encoding
+    Determina la codifica di un contenuto provando, in ordine: il charset del Content-Type, il BOM,
+    <meta charset> (o la dichiarazione XML) nei primi KB, e solo come ultima risorsa il rilevamento
+    statistico su un campione limitato. I contenuti non testuali non vengono analizzati.
+    Parametri formali:
+        bytes | None content -> Il corpo della risposta
+        str content_type -> Il valore dell'header Content-Type
+    Valore di ritorno:
+        tuple[str | None, str | None] -> (codifica, livello che l'ha determinata: "header", "bom", "meta",
+                                          "detected" o "default"); (None, None) se non applicabile
+    '''
+    header_match = _HEADER_CHARSET_RE.search(content_type or "")
+    if header_match and (encoding := _normalize(header_match.group(1))):
+        return encoding, "header"
+
+    if not content:
+        return None, None
+    content_type = (content_type or "").lower()
+    if content_type and not any(t in content_type for t in _TEXT_TYPES):
+        return None, None
+
+    for bom, encoding in _BOMS:
+        if content.startswith(bom):
+            return encoding, "bom"
+
+    head = content[:META_SCAN_BYTES]
+    declared = _XML_ENCODING_RE.search(head) or _META_CHARSET_RE.search(head)
+    if declared and (encoding := _normalize(declared.group(1))):
+        return encoding, "meta"
+
+    sample = content[:DETECTION_SAMPLE_BYTES]
+    try:
+        # UTF-8 valido è il caso più comune e si verifica senza statistica (final=False: il campione può troncare un carattere)
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8", "detected"
+    except UnicodeDecodeError:
+        pass
+
+    encoding = _normalize(chardet.detect(sample).get("encoding"))
+    if encoding:
+        return encoding, "detected"
+    return "utf-8", "default"
@@ -0,0 +1,61 @@
+# Percorsi delle pagine di un sito che più spesso contengono contatti (contatti, chi siamo, team, note legali)
+# Usati da fetch_website_contacts e, come parole chiave, dal crawler best-first in modalità OSINT
+
+import re
+
+CONTACT_PAGE_PATHS = [
+    "", # Homepage
+    "/contact",
+    "/contact-us",
+    "/contatti",
+    "/contacto",
+    "/about",
+    "/about-us",
+    "/chi-siamo",
+    "/sobre-nos",
+    "/privacy-policy",
+    "/terms-of-service",
+    "/impressum",
+    "/direttiva-cookies",
+    "/terms-and-conditions",
+    "/legal-notice",
+    "/faq",
+    "/help",
+    "/support",
+    "/customer-service",
+    "/customer-support",
+    "/team",
+    "/staff",
+    "/our-team",
+    "/our-staff",
+    "/team-members",
+    "/team-staff",
+    "/team-membership",
+    "/team-staff-members",
+    "/team-contacts",
+    "/team-contact",
+    "/team-contact-us",
+    "/team-contacto",
+    "/team-chi-siamo",
+    "/team-about",
+]
+
+# Parole dei percorsi troppo generiche per indicare da sole una pagina di contatti
+_GENERIC_WORDS = {"us", "our", "of", "and", "nos", "members", "membership"}
+
+
+def contact_keywords() -> list[str]:
+    '''
+    Funzione: contact_keywords
+    Ricava da CONTACT_PAGE_PATHS le parole chiave significative (es. "contact", "chi-siamo" -> "chi", "siamo").
+    Parametri formali:
+        None -> La funzione non ha parametri
+    Valore di ritorno:
+        list[str] -> Le parole chiave, in ordine di prima apparizione
+    '''
+    keywords: dict[str, None] = {}
+    for path in CONTACT_PAGE_PATHS:
+        for word in re.split(r"[-/]", path.lower()):
+            if len(word) > 2 and word not in _GENERIC_WORDS:
+                keywords.setdefault(word)
+    return list(keywords)
@@ -17,6 +17,7 @@ from datetime import datetime
 # Importa le utility già esistenti per le chiamate API e l'estrazione/filtraggio
 from .clients import fetch_whois, fetch_dns_records, fetch_shodan, fetch_hunterio, check_email_breaches, fetch_wayback_snapshots
 from .extractors import extract_emails, filter_emails, extract_phone_numbers, filter_phone_numbers
+from .contact_pages import CONTACT_PAGE_PATHS
 
 logger = logging.getLogger("osint.sources")
 
@@ -416,48 +417,11 @@ def fetch_website_contacts(domain: str, ) -> Dict[str, List[str]]:
     logger.info(f"Extracting contacts from website: {domain}")
     contacts = {"emails": set(), "phone_numbers": set()}
 
-    pages_to_check_paths = [
-        "", # Homepage
-        "/contact",
-        "/contact-us",
-        "/contatti",
-        "/contacto",
-        "/about",
-        "/about-us",
-        "/chi-siamo",
-        "/sobre-nos",
-        "/privacy-policy",
-        "/terms-of-service",
-         "/impressum", 
-         "/direttiva-cookies"
-         "/terms-and-conditions",
-        "/legal-notice",
-        "/faq",
-        "/help",
-        "/support",
-        "/customer-service",
-        "/customer-support",
-        "/team",
-        "/staff",
-        "/our-team",
-        "/our-staff",
-        "/team-members",
-        "/team-staff",
-        "/team-membership",
-        "/team-staff-members",
-        "/team-contacts",
-        "/team-contact",
-        "/team-contact-us",
-        "/team-contacto",
-        "/team-chi-siamo",
-        "/team-about",
-    ]
-
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
 
-    for path in pages_to_check_paths:
+    for path in CONTACT_PAGE_PATHS:
         # Try both HTTPS and HTTP, but prefer HTTPS
         urls_to_try = [f"https://{domain}{path}"]
         if not path.startswith("http"): # Avoid adding http scheme if path is already a full URL
@@ -93,42 +93,48 @@ class RobotsParser:
         in_relevant_agent = False
 
         for line in robots_content.splitlines():
-            line = line.strip().lower()
-            if not line or line.startswith('#'):
+            line = line.split('#', 1)[0].strip()
+            if not line or ':' not in line:
                 continue
+            # Solo il nome della direttiva è case-insensitive: path e URL delle sitemap mantengono le maiuscole
+            directive, value = line.split(':', 1)
+            directive = directive.strip().lower()
+            value = value.strip()
 
-            if line.startswith('user-agent:'):
-                agent = line.split(':', 1)[1].strip()
+            if directive == 'user-agent':
+                agent = value.lower()
                 in_relevant_agent = agent == '*'
                 current_agent = agent
                 continue
 
+            # Le sitemap valgono per tutto il file, indipendentemente dal gruppo user-agent
+            if directive == 'sitemap':
+                if value:
+                    data.sitemaps.append(value)
+                continue
+
             if current_agent != '*' and not in_relevant_agent:
                 continue
 
-            if line.startswith('allow:'):
-                path = line.split(':', 1)[1].strip()
+            if directive == 'allow':
+                path = value
                 full_path = urljoin(base_url, path)
                 rule = RobotsRule(path=path, allow=True, is_sensitive=self._is_sensitive_path(path)) 
                 data.rules.append(rule)
                 if rule.is_sensitive:
                     data.sensitive_paths.add(path) 
 
-            elif line.startswith('disallow:'):
-                path = line.split(':', 1)[1].strip()
+            elif directive == 'disallow' and value: # "Disallow:" vuoto significa nessuna restrizione
+                path = value
                 full_path = urljoin(base_url, path)
                 rule = RobotsRule(path=path, allow=False, is_sensitive=self._is_sensitive_path(path))
                 data.rules.append(rule)
                 if rule.is_sensitive:
                     data.sensitive_paths.add(path)
 
-            elif line.startswith('sitemap:'):
-                sitemap = line.split(':', 1)[1].strip()
-                data.sitemaps.append(sitemap)
-
-            elif line.startswith('crawl-delay:'):
+            elif directive == 'crawl-delay':
                 try:
-                    data.crawl_delay = float(line.split(':', 1)[1].strip())
+                    data.crawl_delay = float(value)
                 except ValueError:
                     pass
 
@@ -170,6 +170,58 @@ def detect_analytics(html_content: str) -> list:
     return list(analytics_services)
 
 
+def analyze_technologies(soup: BeautifulSoup, headers: dict, html_content: str, url: str) -> Dict[str, Any]:
+    '''
+    Funzione: analyze_technologies
+    Rileva le tecnologie di una pagina già scaricata e analizzata (meta tag, server, framework, JS libs,
+    security headers, analytics), senza nuove richieste né un nuovo parsing.
+    Parametri formali:
+        BeautifulSoup soup -> Albero della pagina
+        dict headers -> Header della risposta HTTP
+        str html_content -> Contenuto HTML come stringa
+        str url -> URL finale della pagina
+    Valore di ritorno:
+        dict -> Le tecnologie rilevate (solo le voci trovate)
+    '''
+    tech_data: Dict[str, Any] = {}
+
+    # Estrazione Meta Tags
+    meta_tags = {}
+    for meta in soup.find_all("meta"):
+        name = meta.get("name") or meta.get("property")
+        content_meta = meta.get("content") # Rinominato per evitare conflitto
+        if name and content_meta:
+            meta_tags[name.lower()] = content_meta
+    if meta_tags:
+        tech_data["meta_tags"] = meta_tags
+
+    # Server Header
+    if "Server" in headers:
+        tech_data["web_server"] = headers["Server"]
+
+    # Rilevamento Framework/CMS
+    frameworks = detect_framework(soup, headers, html_content, url)
+    if frameworks and frameworks != "Unknown": # Controlla sia per lista non vuota che per "Unknown"
+         tech_data["framework_cms"] = frameworks
+
+    # Rilevamento JS Libraries
+    js_libs = detect_js_libraries(soup, html_content)
+    if js_libs:
+        tech_data["js_libraries"] = js_libs
+
+    # Controllo Security Headers
+    security_headers = check_security_headers(headers)
+    if security_headers:
+        tech_data["security_headers"] = security_headers
+
+    # Rilevamento Analytics
+    analytics = detect_analytics(html_content)
+    if analytics:
+        tech_data["analytics"] = analytics
+
+    return tech_data
+
+
 # === FUNZIONE CONSOLIDATA PER IL RILEVAMENTO TECNOLOGIE ===
 def detect_technologies(domain: str, logger: logging.Logger) -> Dict[str, Any]:
     '''
@@ -178,6 +230,7 @@ def detect_technologies(domain: str, logger: logging.Logger) -> Dict[str, Any]:
 
     Questa funzione effettua la richiesta HTTP, analizza la risposta (headers, contenuto)
     e chiama le funzioni di rilevamento specifiche (framework, js, analytics, security headers).
+    Se la pagina è già stata scaricata usare PageAnalysis.technologies (nessuna seconda richiesta).
 
     Parametri formali:
         str domain -> Il dominio del sito per cui rilevare le tecnologie
@@ -205,44 +258,8 @@ def detect_technologies(domain: str, logger: logging.Logger) -> Dict[str, Any]:
         )
         response.raise_for_status() # Solleva un'eccezione per status codes 4xx/5xx
 
-        final_url = response.url
         content = response.text # Ottieni il contenuto testuale
-
-        soup = BeautifulSoup(content, "html.parser")
-
-        # Estrazione Meta Tags
-        meta_tags = {}
-        for meta in soup.find_all("meta"):
-            name = meta.get("name") or meta.get("property")
-            content_meta = meta.get("content") # Rinominato per evitare conflitto
-            if name and content_meta:
-                meta_tags[name.lower()] = content_meta
-        if meta_tags:
-            tech_data["meta_tags"] = meta_tags
-
-        # Server Header
-        if "Server" in response.headers:
-            tech_data["web_server"] = response.headers["Server"]
-
-        # Rilevamento Framework/CMS (chiama la funzione locale)
-        frameworks = detect_framework(soup, response.headers, content, final_url)
-        if frameworks and frameworks != "Unknown": # Controlla sia per lista non vuota che per "Unknown"
-             tech_data["framework_cms"] = frameworks
-
-        # Rilevamento JS Libraries (chiama la funzione locale)
-        js_libs = detect_js_libraries(soup, content)
-        if js_libs:
-            tech_data["js_libraries"] = js_libs
-
-        # Controllo Security Headers (chiama la funzione locale)
-        security_headers = check_security_headers(response.headers)
-        if security_headers:
-            tech_data["security_headers"] = security_headers
-
-        # Rilevamento Analytics (chiama la funzione locale)
-        analytics = detect_analytics(content)
-        if analytics:
-            tech_data["analytics"] = analytics
+        tech_data.update(analyze_technologies(BeautifulSoup(content, "html.parser"), response.headers, content, response.url))
 
         #logger.info(f"Technology detection successful for {domain}.")
 
@@ -258,37 +275,8 @@ def detect_technologies(domain: str, logger: logging.Logger) -> Dict[str, Any]:
             response_http.raise_for_status()
 
             # Ripeti l'analisi con la risposta HTTP
-            final_url = response_http.url
             content = response_http.text
-            soup = BeautifulSoup(content, "html.parser")
-
-            meta_tags = {}
-            for meta in soup.find_all("meta"):
-                name = meta.get("name") or meta.get("property")
-                content_meta = meta.get("content") # Rinominato per evitare conflitto
-                if name and content_meta:
-                    meta_tags[name.lower()] = content_meta
-            if meta_tags:
-                tech_data["meta_tags"] = meta_tags
-
-            if "Server" in response_http.headers:
-                tech_data["web_server"] = response_http.headers["Server"]
-
-            frameworks = detect_framework(soup, response_http.headers, content, final_url)
-            if frameworks and frameworks != "Unknown":
-                 tech_data["framework_cms"] = frameworks
-
-            js_libs = detect_js_libraries(soup, content)
-            if js_libs:
-                tech_data["js_libraries"] = js_libs
-
-            security_headers = check_security_headers(response_http.headers)
-            if security_headers:
-                tech_data["security_headers"] = security_headers
-
-            analytics = detect_analytics(content)
-            if analytics:
-                tech_data["analytics"] = analytics
+            tech_data.update(analyze_technologies(BeautifulSoup(content, "html.parser"), response_http.headers, content, response_http.url))
 
             tech_data["note"] = "Analysis performed via HTTP fallback due to SSL error on HTTPS."
             logger.info(f"Technology detection successful via HTTP fallback for {domain}.")
@@ -0,0 +1,415 @@
+import gzip
+import logging
+import mimetypes
+import os
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from http.client import responses as http_reasons
+from pathlib import Path
+from typing import Callable, Iterator, NamedTuple
+from urllib.parse import unquote, urlsplit
+from urllib.request import url2pathname
+
+logger = logging.getLogger("scraper.warc")
+
+WARC_VERSION = "WARC/1.0"
+# Campo WARC non standard (consentito dalla specifica) con l'URL richiesto prima dei redirect
+REQUEST_URI_FIELD = "WARC-Browsint-Request-URI"
+# Intestazioni che descrivono la codifica di trasferimento: il corpo archiviato è già decodificato
+_SKIPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+
+
+class ArchivedResponse(NamedTuple):
+    '''
+    Funzione: ArchivedResponse
+    Risposta HTTP letta da un archivio WARC o da un mirror locale.
+    Parametri formali:
+        int status_code -> Codice di stato HTTP
+        dict[str, str] headers -> Intestazioni della risposta
+        str url -> URL finale (dopo eventuali redirect)
+        bytes content -> Corpo della risposta
+    '''
+    status_code: int
+    headers: dict[str, str]
+    url: str
+    content: bytes
+
+
+def _warc_date() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _http_block_head(status_code: int, headers: dict[str, str], content_length: int) -> bytes:
+    '''
+    Funzione: _http_block_head
+    Serializza status line e intestazioni HTTP del blocco di un record "response".
+    Parametri formali:
+        int status_code -> Codice di stato HTTP
+        dict[str, str] headers -> Intestazioni della risposta
+        int content_length -> Lunghezza del corpo archiviato
+    Valore di ritorno:
+        bytes -> La testata HTTP terminata da una riga vuota
+    '''
+    lines = [f"HTTP/1.1 {status_code} {http_reasons.get(status_code, '')}".rstrip()]
+    for name, value in headers.items():
+        if name.lower() in _SKIPPED_HEADERS:
+            continue
+        lines.append(f"{name}: {value}")
+    lines.append(f"Content-Length: {content_length}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8", errors="replace")
+
+
+class WarcWriter:
+    '''
+    Funzione: WarcWriter
+    Scrive le risposte scaricate in file WARC compressi (un membro gzip per record), ruotando il file
+    quando supera max_file_bytes. Thread-safe.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        str | Path directory -> Directory in cui creare i file .warc.gz
+        str prefix -> Prefisso del nome dei file
+        int max_file_bytes -> Dimensione oltre la quale si apre un nuovo file
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, directory: str | Path, prefix: str = "browsint", max_file_bytes: int = 1024 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.max_file_bytes = max_file_bytes
+        self._lock = threading.Lock()
+        self._file = None
+        self._path: Path | None = None
+        self._serial = 0
+        self.records_written = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _open_next_file(self) -> None:
+        if self._file:
+            self._file.close()
+        self._serial += 1
+        timestamp = time.strftime("%Y%m%d%H%M%S")
+        self._path = self.directory / f"{self.prefix}-{timestamp}-{os.getpid()}-{self._serial:05d}.warc.gz"
+        self._file = open(self._path, "ab")
+        info = b"software: Browsint\r\nformat: WARC File Format 1.0\r\n"
+        self._write_record("warcinfo", None, info, {"Content-Type": "application/warc-fields", "WARC-Filename": self._path.name})
+        logger.info(f"Registrazione WARC in {self._path}")
+
+    def _write_record(self, record_type: str, target_uri: str | None, block: bytes | Iterator[bytes], extra_fields: dict[str, str], block_length: int | None = None) -> None:
+        '''
+        Funzione: _write_record
+        Scrive un record WARC come membro gzip indipendente (permette l'accesso diretto per offset).
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str record_type -> Tipo del record (warcinfo, response, ...)
+            str | None target_uri -> WARC-Target-URI del record
+            bytes | Iterator[bytes] block -> Contenuto del record, intero o a chunk
+            dict[str, str] extra_fields -> Campi aggiuntivi della testata WARC
+            int | None block_length -> Lunghezza del blocco (obbligatoria se block è un iteratore)
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        if isinstance(block, bytes):
+            block_length = len(block)
+            block = iter([block])
+        fields = {
+            "WARC-Type": record_type,
+            "WARC-Record-ID": f"<urn:uuid:{uuid.uuid4()}>",
+            "WARC-Date": _warc_date(),
+        }
+        if target_uri:
+            fields["WARC-Target-URI"] = target_uri
+        fields.update(extra_fields)
+        fields["Content-Length"] = str(block_length)
+        head = WARC_VERSION + "\r\n" + "".join(f"{k}: {v}\r\n" for k, v in fields.items()) + "\r\n"
+
+        with gzip.GzipFile(fileobj=self._file, mode="wb") as member:
+            member.write(head.encode("utf-8"))
+            for chunk in block:
+                member.write(chunk)
+            member.write(b"\r\n\r\n")
+        self._file.flush()
+
+    def write_response(self, requested_url: str, status_code: int, headers: dict[str, str], final_url: str, content: bytes | None = None, file_path: str | None = None) -> None:
+        '''
+        Funzione: write_response
+        Archivia una risposta HTTP come record "response". Il corpo può essere in memoria o in un file
+        già scritto su disco (download in streaming), letto a chunk.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str requested_url -> URL richiesto (chiave per il replay)
+            int status_code -> Codice di stato HTTP
+            dict[str, str] headers -> Intestazioni della risposta
+            str final_url -> URL finale dopo i redirect
+            bytes | None content -> Corpo della risposta in memoria
+            str | None file_path -> File contenente il corpo, se scaricato in streaming
+        Valore di ritorno:
+            None -> La funzione non restituisce un valore
+        '''
+        if file_path:
+            body_length = os.path.getsize(file_path)
+
+            def _body_chunks() -> Iterator[bytes]:
+                with open(file_path, "rb") as f:
+                    while chunk := f.read(64 * 1024):
+                        yield chunk
+            body = _body_chunks()
+        else:
+            content = content or b""
+            body_length = len(content)
+            body = iter([content])
+
+        http_head = _http_block_head(status_code, headers, body_length)
+
+        def _block() -> Iterator[bytes]:
+            yield http_head
+            yield from body
+
+        with self._lock:
+            if self._file is None or self._file.tell() > self.max_file_bytes:
+                self._open_next_file()
+            self._write_record(
+                "response", final_url, _block(),
+                {"Content-Type": "application/http; msgtype=response", REQUEST_URI_FIELD: requested_url},
+                block_length=len(http_head) + body_length,
+            )
+            self.records_written += 1
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+def _iter_member_heads(path: Path, head_bytes: int = 16 * 1024) -> Iterator[tuple[int, bytes]]:
+    '''
+    Funzione: _iter_member_heads
+    Scorre i membri gzip di un file leggendolo a chunk e restituisce per ciascuno l'offset di inizio e
+    i primi head_bytes decompressi (bastano per la testata WARC: il resto viene scartato).
+    Parametri formali:
+        Path path -> Il file .warc.gz
+        int head_bytes -> Quanti byte decompressi conservare per ogni membro
+    Valore di ritorno:
+        Iterator[tuple[int, bytes]] -> Coppie (offset, inizio del membro decompresso)
+    '''
+    with open(path, "rb") as f:
+        offset = 0
+        buffer = b""
+        while True:
+            decompressor = zlib.decompressobj(wbits=31)
+            head = bytearray()
+            consumed = 0
+            while not decompressor.eof:
+                if not buffer:
+                    buffer = f.read(64 * 1024)
+                    if not buffer:
+                        return
+                output = decompressor.decompress(buffer)
+                if len(head) < head_bytes:
+                    head += output[:head_bytes - len(head)]
+                if decompressor.eof:
+                    consumed += len(buffer) - len(decompressor.unused_data)
+                    buffer = decompressor.unused_data
+                else:
+                    consumed += len(buffer)
+                    buffer = b""
+            yield offset, bytes(head)
+            offset += consumed
+
+
+def _read_member(path: Path, offset: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        decompressor = zlib.decompressobj(wbits=31)
+        output = bytearray()
+        while not decompressor.eof:
+            chunk = f.read(64 * 1024)
+            if not chunk:
+                break
+            output += decompressor.decompress(chunk)
+        return bytes(output)
+
+
+def _parse_fields(raw: bytes) -> dict[str, str]:
+    fields = {}
+    for line in raw.decode("utf-8", errors="replace").split("\r\n")[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            fields[name.strip()] = value.strip()
+    return fields
+
+
+def _parse_response_record(record: bytes) -> ArchivedResponse | None:
+    '''
+    Funzione: _parse_response_record
+    Estrae la risposta HTTP da un record WARC "response" decompresso.
+    Parametri formali:
+        bytes record -> Il record completo (testata WARC + blocco)
+    Valore di ritorno:
+        ArchivedResponse | None -> La risposta, o None se il record non è valido
+    '''
+    warc_head, _, block = record.partition(b"\r\n\r\n")
+    fields = _parse_fields(warc_head)
+    block_length = int(fields.get("Content-Length", len(block)))
+    block = block[:block_length]
+
+    http_head, _, body = block.partition(b"\r\n\r\n")
+    lines = http_head.decode("utf-8", errors="replace").split("\r\n")
+    try:
+        status_code = int(lines[0].split(" ", 2)[1])
+    except (IndexError, ValueError):
+        return None
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip()] = value.strip()
+    return ArchivedResponse(status_code, headers, fields.get("WARC-Target-URI", ""), body)
+
+
+class WarcArchive:
+    '''
+    Funzione: WarcArchive
+    Indice in sola lettura di uno o più file .warc.gz per il replay: per ogni URL richiesto ricorda
+    file e offset dell'ultimo record "response", che viene letto solo quando serve.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        str | Path source -> Un file .warc.gz o una directory che li contiene
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, source: str | Path):
+        self.source = Path(source)
+        self._index: dict[str, tuple[Path, int]] = {}
+        files = [self.source] if self.source.is_file() else sorted(self.source.glob("*.warc.gz"))
+        for path in files:
+            self._index_file(path)
+        logger.info(f"Archivio WARC caricato da {self.source}: {len(self._index)} URL")
+
+    def _index_file(self, path: Path) -> None:
+        try:
+            for offset, record in _iter_member_heads(path):
+                fields = _parse_fields(record.partition(b"\r\n\r\n")[0])
+                if fields.get("WARC-Type") != "response":
+                    continue
+                for uri in {fields.get(REQUEST_URI_FIELD), fields.get("WARC-Target-URI")}:
+                    if uri:
+                        self._index[uri] = (path, offset)
+        except (OSError, zlib.error) as e:
+            logger.warning(f"File WARC illeggibile {path}: {e}")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, url: str) -> ArchivedResponse | None:
+        '''
+        Funzione: get
+        Restituisce la risposta archiviata per l'URL.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL richiesto
+        Valore di ritorno:
+            ArchivedResponse | None -> La risposta archiviata, o None se l'URL non è nell'archivio
+        '''
+        location = self._index.get(url) or self._index.get(url.split("#", 1)[0])
+        if location is None:
+            return None
+        try:
+            return _parse_response_record(_read_member(*location))
+        except (OSError, zlib.error) as e:
+            logger.warning(f"Record WARC illeggibile per {url}: {e}")
+            return None
+
+
+def file_url_to_path(url: str) -> Path:
+    '''
+    Funzione: file_url_to_path
+    Converte un URL file:// nel percorso locale corrispondente.
+    Parametri formali:
+        str url -> L'URL file://
+    Valore di ritorno:
+        Path -> Il percorso locale
+    '''
+    return Path(url2pathname(unquote(urlsplit(url).path)))
+
+
+def read_local_file(path: Path, url: str, max_bytes: Callable[[str], int] | None = None) -> ArchivedResponse | None:
+    '''
+    Funzione: read_local_file
+    Legge un file locale come se fosse una risposta HTTP (200 con Content-Type dedotto dall'estensione,
+    404 se il file non esiste). Per le directory si usa index.html.
+    Parametri formali:
+        Path path -> Il percorso del file
+        str url -> L'URL con cui il file è stato richiesto
+        Callable[[str], int] | None max_bytes -> Limite di dimensione per Content-Type (vedi WebFetcher.max_bytes_for)
+    Valore di ritorno:
+        ArchivedResponse | None -> La risposta costruita dal file, None se il file supera il limite
+    '''
+    if path.is_dir():
+        path = path / "index.html"
+    if not path.is_file():
+        return ArchivedResponse(404, {"Content-Type": "text/plain"}, url, b"")
+    content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if max_bytes is not None and (size := path.stat().st_size) > (limit := max_bytes(content_type)):
+        logger.warning(f"File {path} ({size} byte) oltre il limite di {limit} byte per {content_type}: non letto")
+        return None
+    return ArchivedResponse(200, {"Content-Type": content_type}, url, path.read_bytes())
+
+
+class MirrorDirectory:
+    '''
+    Funzione: MirrorDirectory
+    Serve URL http(s) da una copia locale di siti (layout di "wget --mirror": <root>/<host>/<percorso>)
+    e URL file:// dei file del mirror. Nessun file fuori dalla radice viene letto.
+    Parametri formali:
+        self -> Riferimento all'istanza della classe
+        str | Path root -> Directory radice del mirror (anche come URL file://)
+        Callable[[str], int] | None max_bytes -> Limite di dimensione per Content-Type dei file serviti
+    Valore di ritorno:
+        None -> Il costruttore non restituisce un valore esplicito
+    '''
+
+    def __init__(self, root: str | Path, max_bytes: Callable[[str], int] | None = None):
+        root = str(root)
+        self.root = (file_url_to_path(root) if root.startswith("file://") else Path(root)).resolve()
+        self.max_bytes = max_bytes
+
+    def _read(self, path: Path, url: str) -> ArchivedResponse | None:
+        path = path.resolve()
+        if path != self.root and self.root not in path.parents:
+            logger.warning(f"{url} è fuori dalla radice del mirror {self.root}: non servito")
+            return ArchivedResponse(404, {"Content-Type": "text/plain"}, url, b"")
+        return read_local_file(path, url, self.max_bytes)
+
+    def get_file(self, url: str) -> ArchivedResponse | None:
+        '''
+        Funzione: get_file
+        Restituisce il file indicato da un URL file://, solo se si trova dentro la radice del mirror.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL file://
+        Valore di ritorno:
+            ArchivedResponse | None -> La risposta costruita dal file (404 se manca o è fuori dal mirror), None se troppo grande
+        '''
+        return self._read(file_url_to_path(url), url)
+
+    def get(self, url: str) -> ArchivedResponse | None:
+        '''
+        Funzione: get
+        Restituisce il file del mirror corrispondente all'URL.
+        Parametri formali:
+            self -> Riferimento all'istanza della classe
+            str url -> L'URL richiesto
+        Valore di ritorno:
+            ArchivedResponse | None -> La risposta costruita dal file (404 se manca)
+        '''
+        parts = urlsplit(url)
+        relative = unquote(parts.path).lstrip("/")
+        if parts.query:
+            relative += "?" + parts.query
+        return self._read(self.root / parts.netloc / relative, url)
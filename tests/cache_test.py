@@ -0,0 +1,129 @@
+# Test della cache HTTP su disco e della rivalidazione condizionale.
+
+import threading
+
+from scraper.fetcher import WebFetcher
+from scraper.refresh import PageHistory, RefreshPolicy
+
+
+def test_cache_serves_hits_and_honours_force_download(server_url, tmp_path):
+    """Una pagina già scaricata viene servita dalla cache; force_download la riscarica."""
+    with WebFetcher(cache_dir=str(tmp_path), delay_range=(0.0, 0.0)) as cached_fetcher:
+        first = cached_fetcher.fetch_full_response(f"{server_url}/cached")
+        second = cached_fetcher.fetch_full_response(f"{server_url}/cached")
+        forced = cached_fetcher.fetch_full_response(f"{server_url}/cached", force_download=True)
+
+        assert not first.from_cache and second.from_cache and not forced.from_cache
+        assert second.content == first.content
+        assert second.headers["Content-Type"] == "text/html; charset=utf-8"
+        assert cached_fetcher.get_connection_stats()["requests"] == 2
+
+        stats = cached_fetcher.get_cache_stats()
+        assert stats["hits"] == 1 and stats["bytes_served"] == len(first.content)
+
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Oltre max_bytes si eliminano le voci usate meno di recente."""
+    from scraper.cache import ResponseCache
+
+    cache = ResponseCache(tmp_path, max_bytes=10_000, compression_level=0)
+    body = b"x" * 4000
+    cache.put("http://a/", 200, {}, "http://a/", body, "utf-8")
+    cache.put("http://b/", 200, {}, "http://b/", body, "utf-8")
+    assert cache.get("http://a/") is not None  # "a" diventa la più recente
+    cache.put("http://c/", 200, {}, "http://c/", body, "utf-8")
+
+    assert cache.get("http://b/") is None
+    assert cache.get("http://a/").content == body
+    assert cache.get_stats()["evictions"] == 1
+
+
+
+def test_cache_removes_only_legacy_files_and_writes_concurrently(tmp_path):
+    """All'avvio si rimuovono solo i file <md5>.html del vecchio formato; salvataggi concorrenti della stessa voce non collidono."""
+    from scraper.cache import ResponseCache
+
+    legacy = tmp_path / ("0" * 32 + ".html")
+    legacy.write_text("vecchio")
+    (tmp_path / "report.html").write_text("dell'utente")
+    cache = ResponseCache(tmp_path)
+    assert not legacy.exists() and (tmp_path / "report.html").exists()
+
+    bodies = [bytes([65 + i]) * 50_000 for i in range(8)]
+    threads = [threading.Thread(target=cache.put, args=("http://a/", 200, {}, "http://a/", body, "utf-8")) for body in bodies]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.get("http://a/").content in bodies
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+
+def test_stale_entry_is_revalidated_with_etag(server_url, site_handler, tmp_path):
+    """Una voce scaduta con ETag viene rivalidata: la 304 è servita dalla cache senza corpo."""
+    with WebFetcher(cache_dir=str(tmp_path), delay_range=(0.0, 0.0), cache_ttl=0) as cached_fetcher:
+        first = cached_fetcher.fetch_full_response(f"{server_url}/etag")
+        second = cached_fetcher.fetch_full_response(f"{server_url}/etag")
+
+        assert not first.from_cache
+        assert second.from_cache and second.status_code == 200
+        assert second.content == first.content
+        assert site_handler.conditional_hits == 1
+
+        stats = cached_fetcher.get_cache_stats()
+        assert stats["revalidated"] == 1 and stats["bytes_saved"] == len(first.content)
+
+
+
+def test_cache_freshness_follows_cache_control_and_expires(server_url, site_handler, tmp_path):
+    """max-age rende la voce valida senza richieste; no-cache forza la rivalidazione, la 304 la aggiorna e la rende di nuovo valida."""
+    with WebFetcher(cache_dir=str(tmp_path), delay_range=(0.0, 0.0)) as cached_fetcher:
+        cached_fetcher.fetch_full_response(f"{server_url}/etag?cc=max-age=60")
+        assert cached_fetcher.fetch_full_response(f"{server_url}/etag?cc=max-age=60").from_cache
+        assert site_handler.hits["/etag?cc=max-age=60"] == 1
+
+        first = cached_fetcher.fetch_full_response(f"{server_url}/etag?cc=no-cache")
+        stale = cached_fetcher.fetch_full_response(f"{server_url}/etag?cc=no-cache")  # scaduta: GET condizionale, 304
+        fresh = cached_fetcher.fetch_full_response(f"{server_url}/etag?cc=no-cache")  # la 304 ha portato max-age=60
+        assert stale.from_cache and fresh.from_cache and fresh.content == first.content
+        assert site_handler.hits["/etag?cc=no-cache"] == 2 and site_handler.conditional_hits == 1
+        assert cached_fetcher.get_cache_stats()["revalidated"] == 1
+
+
+def test_cache_entry_freshness_lifetime():
+    """Durata di validità: no-cache, poi max-age, poi Expires rispetto a Date, altrimenti il ttl predefinito."""
+    from scraper.cache import CacheEntry
+
+    def entry(**headers):
+        return CacheEntry(200, {name.replace("_", "-"): value for name, value in headers.items()}, "http://a/", b"", None, 1_000.0)
+
+    assert entry().freshness_lifetime(3600) == 3600 and entry().freshness_lifetime(None) is None
+    assert entry(Cache_Control="public, max-age=120").freshness_lifetime(3600) == 120
+    assert entry(Cache_Control="no-cache, max-age=120").freshness_lifetime(3600) == 0
+    assert entry(Date="Sun, 06 Nov 1994 08:49:37 GMT", Expires="Sun, 06 Nov 1994 08:59:37 GMT").freshness_lifetime(3600) == 600
+    assert entry(Cache_Control="max-age=5", Expires="Sun, 06 Nov 1994 08:59:37 GMT").freshness_lifetime(3600) == 5
+    assert entry(Expires="0").freshness_lifetime(3600) == 0
+
+
+def test_refresh_policy_adapts_and_revalidates(server_url, site_handler, fetcher):
+    """L'intervallo si accorcia se la pagina cambia e si allunga se no; il lastmod della sitemap prevale; i validatori salvati producono una 304."""
+    from datetime import datetime
+    policy = RefreshPolicy(min_interval=60, max_interval=3600, initial_interval=600)
+    assert policy.next_interval(None, changed=True) == 600
+    assert policy.next_interval(600, changed=True) == 300
+    assert policy.next_interval(2400, changed=False) == 3600
+    assert policy.next_interval(100, changed=True) == 60
+
+    now = datetime(2024, 6, 1, 12, 0, 0)
+    history = PageHistory(1, "abc", '"v1"', None, 600, next_check="2024-06-01 12:05:00", last_checked="2024-06-01 11:55:00")
+    assert policy.decide(None, now) == "fetch"
+    assert policy.decide(history, now) == "skip"
+    assert policy.decide(history, datetime(2024, 6, 1, 12, 10)) == "revalidate"
+    assert policy.decide(history, now, sitemap_lastmod="2024-06-01T12:58:00+02:00") == "skip"
+    assert policy.decide(history, now, sitemap_lastmod="2024-06-01T11:58:00Z") == "fetch"
+
+    response = fetcher.fetch_full_response(f"{server_url}/etag", conditional_headers=history.conditional_headers())
+    assert response.status_code == 304 and response.content == b""
+    assert site_handler.conditional_hits == 1
@@ -0,0 +1,65 @@
+# Test della canonicalizzazione degli URL e della risoluzione dei link durante il crawl.
+
+from scraper.canonical import DEFAULT_INDEX_FILES, UrlCanonicalizer
+from scraper.crawler import Crawler
+from scraper.fetcher import WebFetcher
+from scraper.parser import WebParser
+from db.manager import DatabaseManager
+
+
+def test_canonicalizer_collapses_equivalent_urls():
+    """Varianti banali dello stesso URL producono la stessa forma canonica; le regole per sito prevalgono."""
+    canonicalizer = UrlCanonicalizer()
+    variants = [
+        "HTTP://Example.COM:80/docs/?b=2&a=1&utm_source=news#intro",
+        "http://example.com/docs/?a=1&b=2&PHPSESSID=abc",
+        "http://example.com/docs/;jsessionid=XYZ?a=1&b=2",
+        "/docs/?a=1&b=2&gclid=1",
+    ]
+    canonical = {canonicalizer.canonicalize(url, "http://example.com/") for url in variants}
+    assert canonical == {"http://example.com/docs/?a=1&b=2"}
+    assert canonicalizer.canonicalize("https://example.com:8443/") == "https://example.com:8443/"
+    assert canonicalizer.canonicalize("mailto:info@example.com") == "mailto:info@example.com"
+    assert canonicalizer.get_stats()["fetches_saved"] == 3
+
+    canonicalizer.set_site_rules("iis.example.com", lowercase_path=True, strip_params=("ref",))
+    assert canonicalizer.canonicalize("http://iis.example.com/About.ASPX?ref=x&utm_id=1") == "http://iis.example.com/about.aspx?utm_id=1"
+
+
+def test_canonicalizer_keeps_path_shape_unless_enabled_per_site():
+    """Slash finale e file indice restano di default; si tolgono solo per i siti che lo abilitano."""
+    canonicalizer = UrlCanonicalizer()
+    assert canonicalizer.canonicalize("http://example.com/docs/") == "http://example.com/docs/"
+    assert canonicalizer.canonicalize("http://example.com/docs/index.html") == "http://example.com/docs/index.html"
+
+    canonicalizer.set_site_rules("static.example.com", index_files=DEFAULT_INDEX_FILES, strip_trailing_slash=True)
+    assert canonicalizer.canonicalize("http://static.example.com/docs/index.html") == "http://static.example.com/docs"
+    assert canonicalizer.canonicalize("http://static.example.com/docs/") == "http://static.example.com/docs"
+
+
+def test_canonicalizer_round_trips_query_values():
+    """La query non viene decodificata: +, %2B, %26, %3D e parametri senza "=" mantengono il loro significato."""
+    canonicalizer = UrlCanonicalizer()
+    assert canonicalizer.canonicalize("http://example.com/s?q=c%2B%2B") == "http://example.com/s?q=c%2B%2B"
+    assert canonicalizer.canonicalize("http://example.com/s?q=a+b") == "http://example.com/s?q=a+b"
+    assert canonicalizer.canonicalize("http://example.com/s?x=%26y%3Dz") == "http://example.com/s?x=%26y%3Dz"
+    assert canonicalizer.canonicalize("http://example.com/s?flag&b=") == "http://example.com/s?b=&flag"
+    # Solo la forma della codifica viene normalizzata
+    assert canonicalizer.canonicalize("http://example.com/%7euser/caffè?q=%2b") == "http://example.com/~user/caff%C3%A8?q=%2B"
+    assert canonicalizer.canonicalize("http://example.com/a%2Fb") == "http://example.com/a%2Fb"
+
+
+def test_crawler_resolves_links_against_the_response_url(server_url, site_handler, tmp_path, monkeypatch):
+    """Un link relativo in /docs/ porta a /docs/intro.html, non a /intro.html, anche se /docs/ è stata raggiunta con un redirect."""
+    monkeypatch.setattr("builtins.input", lambda prompt="": "y")
+    with WebFetcher(delay_range=(0.0, 0.0)) as f:
+        crawler = Crawler(f, WebParser(), DatabaseManager(str(tmp_path / "websites.db")))
+        stats = crawler.start_crawl(f"{server_url}/docs/", depth_limit=1, politeness_delay=0, save_to_disk=False)
+    assert site_handler.hits.get("/docs/intro.html") == 1 and "/intro.html" not in site_handler.hits
+    assert stats["urls_visited"] == 2 and stats["errors"] == 0
+
+    site_handler.hits.clear()
+    with WebFetcher(delay_range=(0.0, 0.0)) as f:
+        crawler = Crawler(f, WebParser(), DatabaseManager(str(tmp_path / "websites.db")))
+        crawler.start_crawl(f"{server_url}/old-docs", depth_limit=1, politeness_delay=0, save_to_disk=False)
+    assert site_handler.hits.get("/docs/intro.html") == 1 and "/intro.html" not in site_handler.hits
@@ -0,0 +1,178 @@
+# Fixture condivise dai test: server HTTP locale (nessun accesso alla rete esterna) e fetcher senza attese.
+
+import gzip
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# Aggiunge src/ al path come fa main.py
+src_path = str(Path(__file__).parent.parent / "src")
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from scraper.fetcher import WebFetcher
+
+
+_SITEMAP_NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+_SITEMAPS = {
+    "/sitemap_index.xml": (
+        f'<sitemapindex {_SITEMAP_NS}><sitemap><loc>/sitemap_a.xml</loc></sitemap>'
+        f'<sitemap><loc>/sitemap_b.xml.gz</loc></sitemap></sitemapindex>'.encode(),
+        "application/xml",
+    ),
+    "/sitemap_a.xml": (
+        f'<urlset {_SITEMAP_NS}><url><loc>/a</loc><lastmod>2024-01-01</lastmod><priority>0.8</priority></url></urlset>'.encode(),
+        "application/xml",
+    ),
+    # Sitemap non compressa oltre i limiti generici di text/ e application/xml, ma entro i 50 MB del protocollo
+    "/sitemap_big.xml": (
+        f'<urlset {_SITEMAP_NS}>{(" " * 1023 + chr(10)) * 21 * 1024}<url><loc>/big</loc></url></urlset>'.encode(),
+        "text/xml",
+    ),
+    "/sitemap_b.xml.gz": (
+        gzip.compress(f'<urlset {_SITEMAP_NS}>{"".join(f"<url><loc>/b{i}</loc></url>" for i in range(3))}</urlset>'.encode()),
+        "application/x-gzip",
+    ),
+}
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+    conditional_hits = 0
+    flaky_calls = 0
+    slow_robots_host: str | None = None
+    hits: dict = {}
+
+    def do_GET(self):
+        with SiteHandler.lock:
+            SiteHandler.hits[self.path] = SiteHandler.hits.get(self.path, 0) + 1
+        if self.path.startswith("/bin"):
+            body = b"\0" * 200_000
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path in _SITEMAPS:
+            body, content_type = _SITEMAPS[self.path]
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path.startswith("/flaky"):
+            SiteHandler.flaky_calls += 1
+            if SiteHandler.flaky_calls == 1:
+                self.send_response(503)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        if self.path.startswith("/etag"):
+            if self.headers.get("If-None-Match") == '"v1"':
+                SiteHandler.conditional_hits += 1
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                if "?cc=" in self.path:
+                    self.send_header("Cache-Control", "max-age=60") # la 304 rinnova la validità della voce
+                self.end_headers()
+                return
+        if self.path == "/old-docs":
+            self.send_response(301)
+            self.send_header("Location", "/docs/")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/docs/":
+            # Link relativo: va risolto rispetto a /docs/ (l'URL della risposta), non a una forma senza slash finale
+            body = b'<html><body><a href="intro.html">Intro</a></body></html>'
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path == "/robots.txt" and SiteHandler.slow_robots_host and self.headers.get("Host", "").startswith(SiteHandler.slow_robots_host):
+            # Sito "lento" per i crawl multi-dominio: robots.txt di quell'host risponde solo dopo 2 secondi
+            time.sleep(2)
+        if self.path.startswith("/slowtree"):
+            # Come /tree, ma ogni pagina risponde dopo 50 ms: misura quante richieste il crawler tiene in volo
+            with SiteHandler.lock:
+                SiteHandler.in_flight += 1
+                SiteHandler.max_in_flight = max(SiteHandler.max_in_flight, SiteHandler.in_flight)
+            time.sleep(0.05)
+            with SiteHandler.lock:
+                SiteHandler.in_flight -= 1
+        if self.path.startswith(("/tree", "/slowtree")):
+            # Albero di pagine collegate per i test del crawler: ogni nodo ha tre figli
+            links = "".join(f'<a href="{self.path.rstrip("/")}/{i}">{i}</a>' for i in range(3))
+            seed = zlib.crc32(self.path.encode())
+            text = " ".join(f"parola{(seed >> i) % 97}" for i in range(24)) # testo diverso per pagina (niente quasi duplicati)
+            body = f"<html><body><p>{text}</p>{links}</body></html>".encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path.startswith("/slow"):
+            with SiteHandler.lock:
+                SiteHandler.in_flight += 1
+                SiteHandler.max_in_flight = max(SiteHandler.max_in_flight, SiteHandler.in_flight)
+            time.sleep(0.1)
+            with SiteHandler.lock:
+                SiteHandler.in_flight -= 1
+        body = f"<html><body>{self.path}</body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if self.path.startswith("/etag"):
+            self.send_header("ETag", '"v1"')
+            if "?cc=" in self.path:
+                self.send_header("Cache-Control", self.path.split("?cc=", 1)[1])
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+    @classmethod
+    def reset(cls):
+        cls.in_flight = cls.max_in_flight = cls.conditional_hits = cls.flaky_calls = 0
+        cls.hits = {}
+        cls.slow_robots_host = None
+
+
+@pytest.fixture
+def server_url():
+    """Avvia un server HTTP locale in un thread e restituisce l'URL base."""
+    SiteHandler.reset()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def site_handler(server_url):
+    """Handler del server locale, con i contatori delle richieste ricevute (azzerati a ogni test)."""
+    return SiteHandler
+
+
+@pytest.fixture
+def fetcher():
+    """Fetcher senza attese di politeness per velocizzare i test."""
+    with WebFetcher(delay_range=(0.0, 0.0)) as f:
+        yield f
@@ -0,0 +1,218 @@
+# Test end-to-end del Crawler contro un server HTTP locale: checkpoint e ripresa, sitemap, crawl multi-dominio, budget ed eventi.
+
+import threading
+import time
+from itertools import islice
+from urllib.parse import urlsplit
+
+from scraper.fetcher import WebFetcher
+from scraper.crawl_state import CrawlCheckpoint
+from scraper.sitemap import SitemapIngester
+from scraper.budget import CrawlBudget
+from scraper.events import CrawlError, CrawlFinished, LinkDiscovered, PageFetched, PageParsed, StatsTick
+from scraper.crawler import Crawler
+from scraper.domains import load_seeds
+from scraper.parser import WebParser
+from scraper.utils.robots_parser import RobotsParser
+from db.manager import DatabaseManager
+
+
+def test_crawl_checkpoint_round_trip(tmp_path):
+    """Dopo un checkpoint lo stato ricaricato separa URL completati e URL ancora da scaricare."""
+    db_manager = DatabaseManager(str(tmp_path / "websites.db"))
+    db_manager.init_schema("websites")
+    checkpoint = CrawlCheckpoint.create(db_manager, "http://a.test/", {"depth_limit": 2})
+    for url, depth in [("http://a.test/", 0), ("http://a.test/x", 1), ("http://a.test/y", 1)]:
+        checkpoint.enqueued(url, depth)
+    checkpoint.done("http://a.test/")
+    checkpoint.flush({"urls_visited": 1}, status="interrupted")
+
+    loaded, row = CrawlCheckpoint.load(db_manager, checkpoint.crawl_id)
+    assert row["status"] == "interrupted"
+    assert row["options"] == {"depth_limit": 2} and row["stats"] == {"urls_visited": 1}
+    assert loaded.done_urls() == {"http://a.test/"}
+    assert loaded.pending() == [("http://a.test/x", 1), ("http://a.test/y", 1)]
+    assert CrawlCheckpoint.load(db_manager, checkpoint.crawl_id + 1) is None
+    db_manager.disconnect()
+
+
+
+def test_database_manager_opens_one_connection_per_thread(tmp_path):
+    """Ogni thread usa la propria connessione SQLite (nessuna connessione condivisa tra thread)."""
+    db_manager = DatabaseManager(str(tmp_path / "websites.db"))
+    db_manager.init_schema("websites")
+    main_connection = db_manager.connections["websites"]
+    seen = {}
+
+    def worker():
+        checkpoint = CrawlCheckpoint.create(db_manager, "http://a.test/", {})
+        checkpoint.enqueued("http://a.test/", 0)
+        checkpoint.flush({}, status="interrupted")
+        seen["connection"] = db_manager.connections["websites"]
+        seen["crawl_id"] = checkpoint.crawl_id
+        db_manager.disconnect()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert seen["connection"] is not main_connection
+    assert CrawlCheckpoint.load(db_manager, seen["crawl_id"]) is not None
+
+
+
+def test_sitemap_ingester_follows_index_and_gzip(server_url, fetcher):
+    """Indice di sitemap e sitemap compresse vengono letti in streaming; robots.txt conserva le maiuscole degli URL."""
+    ingester = SitemapIngester(fetcher)
+    entries = list(ingester.iter_entries([f"{server_url}/sitemap_index.xml"]))
+    assert [e.loc for e in entries] == [f"{server_url}/a"] + [f"{server_url}/b{i}" for i in range(3)]
+    assert entries[0].lastmod == "2024-01-01" and entries[0].priority == 0.8
+    assert ingester.stats == {"sitemaps_read": 3, "sitemaps_failed": 0, "urls_listed": 4}
+
+    robots = RobotsParser().parse("User-Agent: *\nDisallow: /Admin\nDisallow:\nSitemap: https://Example.com/Sitemap.XML", "https://example.com/")
+    assert robots.sitemaps == ["https://Example.com/Sitemap.XML"]
+    assert [rule.path for rule in robots.rules] == ["/Admin"]
+
+
+def test_sitemap_ingester_streams_large_uncompressed_sitemaps(server_url, fetcher):
+    """Una sitemap XML non compressa va su disco in streaming e non è troncata dai limiti generici per tipo."""
+    assert fetcher.max_bytes_for("text/xml") < 21 * 1024 * 1024
+    ingester = SitemapIngester(fetcher)
+    assert [e.loc for e in ingester.iter_entries([f"{server_url}/sitemap_big.xml"])] == [f"{server_url}/big"]
+    assert fetcher.get_download_stats()["streamed_files"] == 1
+    assert fetcher.fetch_full_response(f"{server_url}/sitemap_big.xml", force_download=True) is None # fuori dalle sitemap vale il limite
+
+
+
+def test_crawl_many_keeps_per_domain_budgets_and_stats(server_url, tmp_path, capsys):
+    """Più domini in un solo crawl: seed da file, budget e statistiche per dominio, link tra domini non seguiti."""
+    port = server_url.rsplit(":", 1)[1]
+    seeds_file = tmp_path / "seeds.txt"
+    seeds_file.write_text(f"# clienti\n{server_url}/tree\n\nlocalhost:{port}/tree/0\n{server_url}/tree\n")
+    assert load_seeds(seeds_file) == [f"{server_url}/tree", f"https://localhost:{port}/tree/0"]
+
+    with WebFetcher(delay_range=(0.0, 0.0)) as f:
+        crawler = Crawler(f, WebParser(), DatabaseManager(str(tmp_path / "websites.db")))
+        stats = crawler.crawl_many([f"{server_url}/tree", f"http://localhost:{port}/tree/0"], depth_limit=3,
+                                   politeness_delay=0, save_to_disk=False, concurrency=4, max_pages_per_host=6)
+
+    domains = stats["domains"]
+    assert set(domains) == {f"127.0.0.1:{port}", f"localhost:{port}"}
+    assert all(site["urls_visited"] == 6 and site["budget_hit"] == "max_pages_per_host" for site in domains.values())
+    assert stats["urls_visited"] == 12 and stats["errors"] == 0
+    assert set(stats["politeness"]) >= set(domains)
+
+
+
+def test_crawl_many_does_not_wait_for_a_slow_domain(server_url, site_handler, tmp_path):
+    """Un dominio con robots.txt lento non ritarda gli altri e la sua preparazione è limitata da prepare_timeout."""
+    site_handler.slow_robots_host = "localhost"
+    port = server_url.rsplit(":", 1)[1]
+    processed: list[tuple[str, float]] = []
+    with WebFetcher(delay_range=(0.0, 0.0)) as f:
+        crawler = Crawler(f, WebParser(), DatabaseManager(str(tmp_path / "websites.db")))
+        process_page = crawler._process_page
+        def record(current_url, *args, **kwargs):
+            processed.append((urlsplit(current_url).hostname, time.monotonic()))
+            return process_page(current_url, *args, **kwargs)
+        crawler._process_page = record
+        started = time.monotonic()
+        stats = crawler.crawl_many([f"http://localhost:{port}/tree/0", f"{server_url}/tree"], depth_limit=3,
+                                   politeness_delay=0, save_to_disk=False, concurrency=4, max_pages_per_host=6,
+                                   prepare_timeout=0.5)
+        elapsed = time.monotonic() - started
+
+    fast = [at - started for host, at in processed if host == "127.0.0.1"]
+    slow = [at - started for host, at in processed if host == "localhost"]
+    assert len(fast) == 6 and max(fast) < 0.5 # il dominio pronto parte subito, senza attendere robots.txt di localhost
+    assert len(slow) == 6 and min(slow) >= 0.5 # localhost è preparato dopo il timeout, senza robots.txt
+    assert "robots_txt" not in stats["domains"][f"localhost:{port}"]
+    assert elapsed < 2
+
+
+def test_crawl_budget_stops_on_each_limit(server_url, tmp_path, monkeypatch):
+    """Budget di pagine, byte, tempo ed errori: il crawl si ferma e indica il limite raggiunto."""
+    stats = {"urls_visited": 5, "errors": 0, "bytes_downloaded": 0}
+    assert CrawlBudget(max_pages=10, max_pages_per_host=4).exhausted(stats) == "max_pages_per_host"
+    assert CrawlBudget(max_pages=10, max_pages_per_host=4, single_host=False).pages_left(stats, in_flight=2) == 3
+    assert CrawlBudget(max_bytes=100).exhausted({**stats, "bytes_downloaded": 100}) == "max_bytes"
+    assert CrawlBudget(max_error_rate=0.5).exhausted({**stats, "errors": 4}) is None # troppo poche pagine
+    assert CrawlBudget(max_error_rate=0.5).exhausted({"urls_visited": 20, "errors": 11}) == "error_rate"
+    deadline = CrawlBudget(max_seconds=0.01)
+    deadline.start()
+    time.sleep(0.02)
+    assert deadline.exhausted(stats) == "deadline"
+    assert CrawlBudget.from_options({"max_pages": 0, "max_bytes": -1}) == CrawlBudget()
+
+    monkeypatch.setattr("builtins.input", lambda prompt="": "y")
+    with WebFetcher(delay_range=(0.0, 0.0)) as f:
+        crawler = Crawler(f, WebParser(), DatabaseManager(str(tmp_path / "websites.db")))
+        stats = crawler.start_crawl(f"{server_url}/tree", depth_limit=4, politeness_delay=0, save_to_disk=False,
+                                    max_bytes=1)
+    assert stats["budget_hit"] == "max_bytes" and stats["urls_visited"] == 1
+    assert stats["bytes_downloaded"] > 0 and stats["elapsed_seconds"] >= 0
+
+
+
+def test_iter_events_streams_progress_and_cancels_resumably(server_url, tmp_path, monkeypatch):
+    """Il crawl come flusso di eventi tipizzati; smettere di leggere interrompe il crawl, che resta riprendibile."""
+    monkeypatch.setattr("builtins.input", lambda prompt="": "y")
+    monkeypatch.setattr("scraper.crawler.STATS_TICK_SECONDS", 0.0)
+    with WebFetcher(delay_range=(0.0, 0.0)) as f:
+        db = DatabaseManager(str(tmp_path / "websites.db"))
+        db.init_schema("websites") # il thread del crawl apre una propria connessione
+        crawler = Crawler(f, WebParser(), db)
+        events = list(crawler.iter_events(crawler.start_crawl, f"{server_url}/tree", depth_limit=1,
+                                          politeness_delay=0, save_to_disk=False, max_pages=3))
+        kinds = [type(event) for event in events]
+        assert kinds.count(PageFetched) == kinds.count(PageParsed) == 3 and kinds.count(LinkDiscovered) == 3
+        assert StatsTick in kinds and CrawlError not in kinds and kinds[-1] is CrawlFinished
+        assert events[-1].stats["urls_visited"] == 3 and events[-1].to_dict()["event"] == "finished"
+        assert next(e for e in events if isinstance(e, LinkDiscovered)).source_url == f"{server_url}/tree"
+
+        stream = crawler.iter_events(crawler.start_crawl, f"{server_url}/tree", depth_limit=3,
+                                     politeness_delay=0, save_to_disk=False, max_pending=1)
+        fetched = list(islice((event for event in stream if isinstance(event, PageFetched)), 2))
+        stream.close()
+        crawl_id = events[-1].stats["crawl_id"] + 1
+        assert len(fetched) == 2 and CrawlCheckpoint.load(db, crawl_id)[1]["status"] == "interrupted"
+
+
+
+def test_concurrent_crawl_keeps_pages_in_flight_and_visits_each_once(server_url, site_handler, tmp_path, monkeypatch):
+    """Con più worker il crawl tiene più richieste in volo e scarica ogni pagina una sola volta."""
+    monkeypatch.setattr("builtins.input", lambda prompt="": "y")
+    with WebFetcher(delay_range=(0.0, 0.0)) as f:
+        crawler = Crawler(f, WebParser(), DatabaseManager(str(tmp_path / "websites.db")))
+        stats = crawler.start_crawl(f"{server_url}/slowtree", depth_limit=2, politeness_delay=0, save_to_disk=False,
+                                    concurrency=4)
+
+    pages = [path for path in site_handler.hits if path.startswith("/slowtree")]
+    assert len(pages) == 13 and all(site_handler.hits[path] == 1 for path in pages)
+    assert stats["urls_visited"] == 13 and stats["errors"] == 0
+    assert 1 < site_handler.max_in_flight <= 4
+
+
+def test_resume_crawl_finishes_without_refetching_completed_pages(server_url, site_handler, tmp_path, monkeypatch):
+    """Un crawl interrotto riprende dal checkpoint con un nuovo Crawler: le pagine completate non vengono riscaricate."""
+    monkeypatch.setattr("builtins.input", lambda prompt="": "y")
+    with WebFetcher(delay_range=(0.0, 0.0)) as f:
+        db = DatabaseManager(str(tmp_path / "websites.db"))
+        crawler = Crawler(f, WebParser(), db)
+        stream = crawler.iter_events(crawler.start_crawl, f"{server_url}/tree", depth_limit=2, politeness_delay=0,
+                                     save_to_disk=False, max_pending=1)
+        list(islice((event for event in stream if isinstance(event, PageFetched)), 4))
+        stream.close()
+
+        checkpoint, row = CrawlCheckpoint.load(db, 1)
+        done = checkpoint.done_urls()
+        assert row["status"] == "interrupted" and 0 < len(done) < 13
+
+        stats = Crawler(f, WebParser(), db).resume_crawl(1)
+
+    pages = [path for path in site_handler.hits if path.startswith("/tree")]
+    # Solo le pagine in lavorazione al momento dell'interruzione vengono scaricate di nuovo
+    assert len(pages) == 13 and stats["crawl_id"] == 1
+    assert all(site_handler.hits[urlsplit(url).path] == 1 for url in done)
+    assert stats["urls_visited"] == sum(site_handler.hits[path] for path in pages)
+    assert CrawlCheckpoint.load(db, 1)[1]["status"] == "completed"
+    assert Crawler(f, WebParser(), db).resume_crawl(1) == stats  # già completato: niente da riprendere
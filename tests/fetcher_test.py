@@ -0,0 +1,126 @@
+# Test del WebFetcher contro un server HTTP locale: connessioni, download concorrenti, streaming su disco, codifiche, record/replay.
+
+from scraper.fetcher import WebFetcher
+from scraper.async_fetcher import AsyncWebFetcher
+
+
+def test_connection_reuse_same_host(fetcher, server_url):
+    """Più pagine dello stesso host devono riutilizzare la stessa connessione keep-alive."""
+    for i in range(3):
+        response = fetcher.fetch_full_response(f"{server_url}/page{i}")
+        assert response is not None and response.status_code == 200
+
+    stats = fetcher.get_connection_stats()
+    assert stats["requests"] == 3
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 2
+
+
+
+def test_async_fetch_many_keeps_order_and_host_limit(fetcher, server_url, site_handler):
+    """fetch_many restituisce le risposte nell'ordine degli URL senza superare il limite per host."""
+    async_fetcher = AsyncWebFetcher(fetcher, max_concurrency=10, per_host_concurrency=3)
+    urls = [f"{server_url}/slow{i}" for i in range(9)]
+    try:
+        responses = async_fetcher.fetch_many_blocking(urls)
+    finally:
+        async_fetcher.close()
+
+    assert [r.content.decode() for r in responses] == [f"<html><body>/slow{i}</body></html>" for i in range(9)]
+    assert 1 < site_handler.max_in_flight <= 3
+
+
+def test_each_thread_uses_its_own_session(server_url):
+    """requests.Session non è thread-safe: ogni thread ha la propria sessione, chiuse tutte da close()."""
+    with WebFetcher(delay_range=(0.0, 0.0)) as threaded_fetcher:
+        main_session = threaded_fetcher.session
+        async_fetcher = AsyncWebFetcher(threaded_fetcher, max_concurrency=4, per_host_concurrency=4)
+        try:
+            responses = async_fetcher.fetch_many_blocking([f"{server_url}/slow{i}" for i in range(8)])
+        finally:
+            async_fetcher.close()
+        worker_sessions = [session for session in threaded_fetcher._sessions if session is not main_session]
+        assert all(r.status_code == 200 for r in responses)
+        assert threaded_fetcher.session is main_session and 1 < len(worker_sessions) <= 4
+    assert threaded_fetcher._sessions == []
+
+
+
+def test_binary_streamed_to_disk_and_oversized_aborted(server_url, tmp_path):
+    """I binari vanno su disco senza restare in memoria; oltre il limite per tipo il download si interrompe."""
+    target = tmp_path / "file.bin"
+    with WebFetcher(delay_range=(0.0, 0.0)) as stream_fetcher:
+        response = stream_fetcher.fetch_full_response(f"{server_url}/bin", destination=lambda url, ct: target)
+        assert response.content is None and response.file_path == str(target)
+        assert target.stat().st_size == 200_000
+        assert not (tmp_path / "file.bin.part").exists()
+
+    limits = {"application/octet-stream": 100_000}
+    with WebFetcher(delay_range=(0.0, 0.0), max_bytes_by_type=limits) as limited_fetcher:
+        assert limited_fetcher.fetch_full_response(f"{server_url}/bin") is None
+        assert limited_fetcher.get_download_stats()["aborted_oversized"] == 1
+
+
+
+def test_detect_encoding_tiers():
+    """Il rilevamento della codifica si ferma al primo livello che decide."""
+    from scraper.utils.charset import detect_encoding
+
+    assert detect_encoding(b"<html></html>", "text/html; charset=ISO-8859-1") == ("iso8859-1", "header")
+    assert detect_encoding(b"\xef\xbb\xbf<html></html>", "text/html") == ("utf-8-sig", "bom")
+    assert detect_encoding(b'<html><head><meta charset="windows-1252">', "text/html") == ("cp1252", "meta")
+    assert detect_encoding("<html>caffè</html>".encode("utf-8"), "text/html") == ("utf-8", "detected")
+    assert detect_encoding(b"\x89PNG\r\n", "image/png") == (None, None)
+
+
+
+def test_concurrent_fetches_of_same_url_share_one_request(fetcher, server_url, site_handler):
+    """Download concorrenti dello stesso URL (anche con host in maiuscolo) producono una sola richiesta."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    urls = [f"{server_url}/slow-shared", f"{server_url.upper().replace('HTTP', 'http')}/slow-shared#frag"] * 3
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        responses = list(pool.map(fetcher.fetch_full_response, urls))
+
+    assert all(r is not None and r.status_code == 200 for r in responses)
+    assert site_handler.hits["/slow-shared"] == 1
+    assert fetcher.get_download_stats()["coalesced"] == 5
+
+
+
+def test_record_then_replay_without_network(server_url, tmp_path):
+    """Le risposte registrate in WARC vengono servite identiche in replay, senza rete; file:// legge un mirror."""
+    warc_dir = tmp_path / "warc"
+    urls = [f"{server_url}/page-a", f"{server_url}/bin"]
+    with WebFetcher(delay_range=(0.0, 0.0), mode="record", warc_path=str(warc_dir)) as recorder:
+        recorded = [recorder.fetch_full_response(url) for url in urls]
+
+    with WebFetcher(mode="replay", warc_path=str(warc_dir)) as replayer:
+        replayed = [replayer.fetch_full_response(url) for url in urls]
+        assert replayer.fetch_full_response(f"{server_url}/missing") is None
+        assert replayer.get_connection_stats()["requests"] == 0
+
+    for original, replay in zip(recorded, replayed):
+        assert replay.status_code == original.status_code
+        assert replay.content == original.content
+        assert replay.headers["Content-Type"] == original.headers["Content-Type"]
+
+    mirror = tmp_path / "mirror" / "example.test"
+    mirror.mkdir(parents=True)
+    (mirror / "index.html").write_text("<html>mirror</html>")
+    with WebFetcher(mode="replay", warc_path=(tmp_path / "mirror").as_uri()) as mirror_fetcher:
+        page = mirror_fetcher.fetch_full_response("https://example.test/")
+        assert page.status_code == 200 and page.content == b"<html>mirror</html>"
+        assert page.headers["Content-Type"] == "text/html"
+        local = mirror_fetcher.fetch_full_response((mirror / "index.html").as_uri())
+        assert local.content == b"<html>mirror</html>"
+        outside = tmp_path / "secret.txt"
+        outside.write_text("secret")
+        assert mirror_fetcher.fetch_full_response(outside.as_uri()).status_code == 404
+
+    with WebFetcher(mode="replay", warc_path=(tmp_path / "mirror").as_uri(), max_bytes_by_type={"text/html": 5}) as small:
+        assert small.fetch_full_response("https://example.test/") is None
+
+    # In live file:// non viene mai letto dal disco
+    with WebFetcher(delay_range=(0.0, 0.0)) as live:
+        assert live.fetch_full_response((mirror / "index.html").as_uri()) is None
@@ -0,0 +1,145 @@
+# Test della frontiera del crawler: code per host, priorità, spill su disco, deduplicazione e trappole.
+
+from scraper.frontier import HostFrontier, PriorityFrontier
+from scraper.link_scoring import LinkScorer
+from scraper.seen import BloomUrlSet, UrlSeenSet
+from scraper.traps import CrawlTrapDetector, TrapLimits
+from scraper.scheduler import HostScheduler
+
+
+def test_frontier_rotates_hosts_and_respects_per_host_limit():
+    """La frontiera alterna gli host, non supera il limite per host e preferisce l'host servibile prima."""
+    frontier = HostFrontier(per_host_limit=1, max_size=4)
+    for item in [("http://a.test/1", 0), ("http://a.test/2", 0), ("http://b.test/1", 0), ("http://b.test/2", 0)]:
+        assert frontier.append(item)
+    assert not frontier.append(("http://c.test/1", 0))
+    assert frontier.dropped == 1
+
+    assert frontier.pop_ready() == ("http://a.test/1", 0)
+    assert frontier.pop_ready() == ("http://b.test/1", 0)
+    assert frontier.pop_ready() is None  # entrambi gli host hanno già una richiesta in corso
+    frontier.task_done("http://b.test/1")
+    assert frontier.pop_ready() == ("http://b.test/2", 0)
+
+    scheduler = HostScheduler(default_delay=10.0)
+    scheduler.reserve("http://a.test/")  # a.test sarà servibile solo tra 10 secondi
+    frontier = HostFrontier(scheduler)
+    frontier.append(("http://a.test/1", 0))
+    frontier.append(("http://b.test/1", 0))
+    assert frontier.pop_ready() == ("http://b.test/1", 0)
+    assert len(frontier) == 1
+
+
+
+def test_frontier_holds_paused_hosts_until_resumed():
+    """Gli URL di un host sospeso restano in coda (e accodabili) ma non vengono estratti finché l'host non riprende."""
+    frontier = HostFrontier()
+    frontier.pause_host("a.test")
+    frontier.append(("http://a.test/1", 0))
+    assert frontier and not frontier.has_ready()
+    assert frontier.pop_ready() is None
+    frontier.append(("http://b.test/1", 0))
+    assert frontier.has_ready() and frontier.pop_ready() == ("http://b.test/1", 0)
+    frontier.resume_host("http://A.test/")
+    assert frontier.pop_ready() == ("http://a.test/1", 0)
+
+
+def test_priority_frontier_pops_contact_pages_first():
+    """Pagine di contatti (dal path o dal testo del link) escono prima; le sezioni affollate scendono di priorità."""
+    scorer = LinkScorer()
+    links = [(f"https://site.test/blog/post-{i}", f"Post {i}", 1) for i in range(20)]
+    links += [("https://site.test/chi-siamo.html", "", 1), ("https://site.test/x/y", "Contattaci", 1),
+              ("https://site.test/archivio", "Archivio", 1)]
+    priorities = scorer.score_batch(links)
+    assert priorities[0] > priorities[19] # la sezione /blog perde priorità man mano che viene accodata
+
+    frontier = PriorityFrontier()
+    for (url, _, depth), priority in zip(links, priorities):
+        frontier.append((url, depth), priority)
+    order = [frontier.pop_ready()[0] for _ in range(len(links))]
+    assert order[:2] == ["https://site.test/chi-siamo.html", "https://site.test/x/y"]
+    assert order.index("https://site.test/archivio") < order.index("https://site.test/blog/post-1")
+    assert frontier.pop_ready() is None and not frontier
+
+
+
+def test_frontier_spills_to_disk_preserving_order(tmp_path):
+    """Oltre il limite in memoria gli URL vanno su disco: nessuno viene scartato e l'ordine FIFO resta."""
+    frontier = HostFrontier(max_size=4, spill=True, spill_dir=tmp_path)
+    items = [(f"http://a.test/{i}", i) for i in range(1200)]
+    assert all(frontier.append(item) for item in items)
+    assert len(frontier) == 1200 and frontier.dropped == 0
+    assert frontier.get_stats()["in_memory"] == 4 and frontier.spilled == 1196
+    assert list(frontier)[:6] == items[:6]
+
+    popped = []
+    while (item := frontier.pop_ready()) is not None:
+        popped.append(item)
+        frontier.task_done(item[0])
+        assert frontier.get_stats()["in_memory"] <= 4
+    assert popped == items and not frontier
+
+    frontier.close()
+    assert not list(tmp_path.iterdir())
+
+    best_first = PriorityFrontier(max_size=2, spill=True, spill_dir=tmp_path)
+    for i, priority in enumerate([1.0, 2.0, 5.0, 3.0, 4.0]):
+        best_first.append((f"http://b.test/{i}", 1), priority)
+    order = []
+    while (item := best_first.pop_ready()) is not None:
+        order.append(item[0])
+        best_first.task_done(item[0])
+    assert order == ["http://b.test/1", "http://b.test/0", "http://b.test/2", "http://b.test/4", "http://b.test/3"]
+    best_first.close()
+
+
+
+def test_seen_set_dedups_across_merges():
+    """Gli URL restano riconosciuti anche dopo la fusione dei fingerprint recenti nei blocchi ordinati."""
+    seen = UrlSeenSet(merge_threshold=100)
+    urls = [f"http://a.test/page/{i}" for i in range(1000)]
+    assert all(seen.add(url) for url in urls)
+    assert not any(seen.add(url) for url in urls)
+    assert len(seen) == 1000 and not seen._recent
+    assert [len(run) for run in seen._runs] == [800, 200]  # blocchi fusi come un contatore binario (10 = 8 + 2)
+    assert "http://a.test/page/999" in seen and "http://a.test/page/1000" not in seen
+
+    capped = UrlSeenSet(urls, merge_threshold=100, max_run_size=300)
+    assert max(len(run) for run in capped._runs) <= 300 and len(capped) == 1000
+    assert all(url in capped for url in urls)
+
+
+
+def test_bloom_seen_set_has_fixed_size_and_bounded_false_positives():
+    """Il filtro di Bloom non cresce con gli URL e resta vicino al tasso di falsi positivi richiesto."""
+    bloom = BloomUrlSet(capacity=10_000, false_positive_rate=0.01)
+    size = len(bloom._bits)
+    assert size < 10_000 * 2  # circa 1,2 byte per URL all'1%
+    assert all(bloom.add(f"http://a.test/page/{i}") for i in range(100))
+    for i in range(10_000):
+        bloom.add(f"http://a.test/page/{i}")
+    assert all(f"http://a.test/page/{i}" in bloom for i in range(10_000))
+    false_positives = sum(f"http://b.test/other/{i}" in bloom for i in range(10_000))
+    assert false_positives < 300 and len(bloom._bits) == size
+
+
+
+def test_trap_detector_caps_calendars_facets_and_loops():
+    """Calendari, faccette, path ripetuti e URL che si allungano vengono limitati; le pagine normali passano."""
+    detector = CrawlTrapDetector(TrapLimits(max_per_pattern=10, max_query_variants=5, max_length_growth=8))
+    calendar = [detector.check(f"https://site.test/eventi/2024/{month:02d}/01") for month in range(1, 13)]
+    assert calendar.count(None) == 10 and calendar[-1] == "pattern_cap"
+    assert CrawlTrapDetector.url_pattern("https://Site.test/eventi/2024/05/01?view=day&y=1") == "site.test/eventi/{n}/{n}/{n}?view&y"
+
+    facets = [detector.check(f"https://site.test/shop?color={c}&size={s}") for c in range(3) for s in range(3)]
+    assert facets.count(None) == 5 and facets[-1] == "query_variants"
+    assert detector.check("https://site.test/a/b/a/b/index.html") == "repeated_path"
+    assert detector.check("https://site.test/" + "x/" * 3) == "repeated_path"
+    assert detector.check("https://site.test/q?" + "&".join(f"p{i}=1" for i in range(9))) == "query_params"
+    growing = [detector.check("https://site.test/loop/" + "z" * i) for i in range(1, 20)]
+    assert growing.count(None) == 8 and growing[-1] == "url_growth"
+    assert detector.check("https://site.test/chi-siamo") is None
+
+    stats = detector.get_stats()
+    assert stats["rejected"] == sum(stats["by_reason"].values()) == 2 + 4 + 2 + 1 + 11
+    assert stats["top_traps"][0] == {"pattern": "site.test/loop", "rejected": 11}
@@ -0,0 +1,72 @@
+# Test dell'analisi delle pagine: parsing unico, pool di processi e quasi duplicati.
+
+import pytest
+from bs4 import BeautifulSoup
+from requests.structures import CaseInsensitiveDict
+
+from scraper.simhash import SimHashIndex, hamming_distance, simhash
+from scraper.page_pipeline import PageAnalysis, analyze_content, analyze_in_worker, init_parse_worker
+from scraper.parser import WebParser
+
+
+def test_simhash_index_finds_near_duplicates():
+    """Testi che differiscono per poche parole hanno impronte vicine; testi diversi no."""
+    article = " ".join(f"il prodotto {i} ha un prezzo di {i * 3} euro e spedizione gratuita" for i in range(100))
+    original = simhash(article)
+    printer_view = simhash(article + " versione stampabile")
+    unrelated = simhash(" ".join(f"discussione {i} sul forum riguardo argomento {i * 7}" for i in range(100)))
+    assert simhash("troppo corto") is None
+    assert hamming_distance(original, printer_view) <= 3 < hamming_distance(original, unrelated)
+
+    index = SimHashIndex(max_distance=3)
+    index.add(original, "http://shop.test/p")
+    assert index.find(printer_view) == "http://shop.test/p"
+    assert index.find(unrelated) is None
+
+
+
+def test_page_analysis_runs_in_process_pool():
+    """Parsing ed estrazione girano in un processo separato e tornano solo i risultati compatti."""
+    import multiprocessing
+    import pickle
+    from concurrent.futures import ProcessPoolExecutor
+
+    html = ("<html><head><title>Contatti</title><script src='/js/jquery-3.6.0.min.js'></script></head>"
+            "<body><p>Scrivete a info@site.test oppure chiamate +39 02 1234 5678.</p>"
+            "<a href='/chi-siamo'>Chi siamo</a></body></html>").encode()
+    headers = {"Content-Type": "text/html; charset=utf-8"}
+    local = analyze_content(WebParser(), "https://site.test/contatti", html, "utf-8", headers, "site.test")
+    assert local.is_text and local.fingerprint is not None and "content" not in local.parsed
+    assert local.parsed["title"] == "Contatti" and local.osint["emails"] == ["info@site.test"]
+    assert len(pickle.dumps(local)) < 2 * len(html) + 1024
+
+    assert not analyze_content(WebParser(), "https://site.test/logo.png", b"\x89PNG", None, {"Content-Type": "image/png"}).is_text
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=init_parse_worker, initargs=(WebParser(),)) as pool:
+        remote = pool.submit(analyze_in_worker, "https://site.test/contatti", html, "utf-8", headers, "site.test").result(timeout=60)
+    assert remote == local
+
+
+
+def test_page_analysis_parses_once_and_computes_parts_lazily(monkeypatch):
+    """Una risposta, un parsing: parser, estrattori e tecnologie condividono lo stesso albero, calcolato su richiesta."""
+    import scraper.page_pipeline as page_pipeline
+    trees = []
+    monkeypatch.setattr(page_pipeline, "BeautifulSoup", lambda *args, **kwargs: trees.append(1) or BeautifulSoup(*args, **kwargs))
+    monkeypatch.setattr("scraper.utils.web_analysis.requests.get", lambda *args, **kwargs: pytest.fail("pagina riscaricata"))
+
+    html = ("<html><head><title>Caffè</title><meta name='generator' content='WordPress 6.4'>"
+            "<script src='/js/jquery-3.6.0.min.js'></script></head><body><p>Perché non scriverci? "
+            "Scrivete a info@site.test o chiamate +39 02 1234 5678.</p><a href='/chi-siamo'>Chi siamo</a></body></html>")
+    content = html.encode("latin-1")
+    headers = CaseInsensitiveDict({"Content-Type": "text/html; charset=iso-8859-1", "Server": "nginx"})
+    page = PageAnalysis("https://site.test/", content, "iso-8859-1", headers)
+
+    assert page.is_text and trees == [] # niente viene calcolato finché non serve
+    assert page.parsed["title"] == "Caffè" and page.parsed["content_length"] == len(content)
+    assert "info@site.test" in page.emails and page.phones and page.fingerprint is not None
+    assert page.technologies["framework_cms"] == "WordPress 6.4" and page.technologies["web_server"] == "nginx"
+    assert "jQuery" in page.technologies["js_libraries"]
+    assert page.page_technologies() == {"framework_cms": "WordPress 6.4", "js_libraries": page.technologies["js_libraries"]}
+    assert trees == [1]
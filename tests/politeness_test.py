@@ -0,0 +1,87 @@
+# Test di politeness per host, retry e circuit breaker.
+
+import time
+
+import pytest
+
+from scraper.fetcher import WebFetcher
+
+
+def test_host_scheduler_is_per_host_and_backs_off():
+    """Host diversi non si attendono; 429 con Retry-After rallenta solo l'host che l'ha inviato."""
+    from scraper.scheduler import HostScheduler
+
+    scheduler = HostScheduler(default_delay=1.0)
+    assert scheduler.reserve("http://a.test/1") == 0
+    assert scheduler.reserve("http://b.test/1") == 0
+    assert scheduler.reserve("http://a.test/2") == pytest.approx(1.0, abs=0.05)
+
+    scheduler.record_response("http://b.test/1", 429, latency=0.1, retry_after=5)
+    assert scheduler.reserve("http://b.test/2") == pytest.approx(5.0, abs=0.05)
+    assert scheduler.get_stats()["b.test"]["backoffs"] == 1
+    assert scheduler.get_stats()["a.test"]["backoffs"] == 0
+
+    # delay_range (1, 3) del fetcher: ritardo minimo 1s più fino a 2s di attesa casuale
+    with WebFetcher(delay_range=(1.0, 3.0)) as jittered_fetcher:
+        gaps = [jittered_fetcher.scheduler.reserve("http://c.test/") for _ in range(20)]
+    steps = [b - a for a, b in zip(gaps, gaps[1:])]
+    assert all(1.0 - 0.05 <= step <= 3.0 + 0.05 for step in steps) and max(steps) > 1.1
+
+
+
+def test_retry_on_503_then_circuit_breaker_fails_fast(server_url, site_handler):
+    """Una 503 viene ritentata; un host irraggiungibile apre il circuito e le richieste successive falliscono subito."""
+    from scraper.retry import CircuitBreaker, RetryPolicy
+
+    policy = RetryPolicy(max_attempts=3, backoff_base=0.01)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    with WebFetcher(delay_range=(0.0, 0.0), retry_policy=policy, circuit_breaker=breaker) as retry_fetcher:
+        response = retry_fetcher.fetch_full_response(f"{server_url}/flaky")
+        assert response.status_code == 200 and site_handler.flaky_calls == 2
+
+        # Porta chiusa: connessione rifiutata, due fallimenti aprono il circuito
+        dead_url = "http://127.0.0.1:9/"
+        assert retry_fetcher.fetch_full_response(dead_url, timeout=1) is None
+        assert breaker.is_open(dead_url)
+
+        started = time.monotonic()
+        assert retry_fetcher.fetch_full_response(dead_url, timeout=1) is None
+        assert time.monotonic() - started < 0.1
+        # Rifiutati: il terzo tentativo della prima richiesta e la seconda richiesta
+        assert breaker.get_stats()["127.0.0.1:9"]["rejected"] == 2
+
+
+
+def test_half_open_probe_always_settles(server_url, site_handler, monkeypatch):
+    """Una prova half-open finita con corpo troppo grande o errore non ritentabile non blocca il circuito."""
+    import requests
+    from scraper.retry import CircuitBreaker, RetryPolicy
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    limits = {"application/octet-stream": 100_000}
+    with WebFetcher(delay_range=(0.0, 0.0), circuit_breaker=breaker, max_bytes_by_type=limits) as probe_fetcher:
+        breaker.record_failure(server_url)
+        assert probe_fetcher.fetch_full_response(f"{server_url}/bin") is None  # prova con corpo oltre il limite
+        assert not breaker.is_open(server_url) and breaker.allow(server_url)
+
+    dead_url = "http://127.0.0.1:9/"
+    no_retry = RetryPolicy(max_attempts=1, retry_exceptions=())
+    with WebFetcher(delay_range=(0.0, 0.0), retry_policy=no_retry, circuit_breaker=breaker) as probe_fetcher:
+        breaker.record_failure(dead_url)
+        assert probe_fetcher.fetch_full_response(dead_url, timeout=1) is None  # errore non ritentabile
+        assert breaker.allow(dead_url)  # la prova è stata liberata: ne parte un'altra
+
+    # Dopo una 503 e un errore di connessione all'ultimo tentativo si restituisce la 503
+    policy = RetryPolicy(max_attempts=2, backoff_base=0.01)
+    with WebFetcher(delay_range=(0.0, 0.0), retry_policy=policy) as retry_fetcher:
+        real_get = retry_fetcher.session.get
+        calls = []
+
+        def flaky_get(url, **kwargs):
+            calls.append(url)
+            if len(calls) > 1:
+                raise requests.ConnectionError("connessione persa")
+            return real_get(url, **kwargs)
+
+        monkeypatch.setattr(retry_fetcher.session, "get", flaky_get)
+        assert retry_fetcher.fetch_full_response(f"{server_url}/flaky").status_code == 503
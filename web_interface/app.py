@@ -9,9 +9,10 @@ import asyncio
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 from datetime import datetime
+from urllib.parse import urlsplit
 
 from fastapi import FastAPI, Request, Form, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import uvicorn
@@ -22,6 +23,10 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 from cli.scraper_cli import ScraperCLI
 from scraper.utils.validators import validate_domain
 from scraper.utils.formatters import format_domain_osint_report, format_page_analysis_report
+from scraper.crawler import Crawler
+from scraper.domains import load_seeds
+from scraper.events import CrawlFinished, EntityFound, StatsTick
+from scraper.page_pipeline import PageAnalysis
 
 app = FastAPI(title="Browsint Web Interface", version="2.1.0")
 
@@ -39,6 +44,24 @@ def get_cli_instance():
         cli_instance = ScraperCLI()
     return cli_instance
 
+def new_crawler(cli: ScraperCLI) -> Crawler:
+    """Create a Crawler for one task: per-run state lives on the crawler, so concurrent tasks never share one.
+    Fetcher, parser, database and OSINT extractor are shared (they are safe to use from several threads)."""
+    return Crawler(
+        fetcher=cli.web_fetcher,
+        parser=cli.web_parser,
+        db_manager=cli.db_manager,
+        osint_extractor=cli.osint_extractor,
+        base_dirs=cli.dirs
+    )
+
+def require_http_url(url: str) -> str:
+    """Reject any URL that is not http(s) (file://, ftp://, ...) before it reaches the fetcher"""
+    parts = urlsplit(url.strip())
+    if parts.scheme.lower() not in ("http", "https") or not parts.netloc:
+        raise HTTPException(status_code=400, detail=f"Only http/https URLs are allowed: {url}")
+    return url.strip()
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize CLI on startup"""
@@ -79,35 +102,73 @@ async def get_status():
 @app.post("/api/download/single")
 async def download_single_page(url: str = Form(...)):
     """Download a single page"""
+    url = require_http_url(url)
     cli = get_cli_instance()
     try:
-        content = cli.web_fetcher.fetch(url)
-        if content:
+        response = await cli.async_fetcher.fetch_full_response(url)
+        if response and response.content:
+            content = response.content.decode(response.encoding if response.encoding else 'utf-8', errors='replace')
             return {"success": True, "content_length": len(content), "url": url}
         else:
             return {"success": False, "error": "Failed to download content"}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+@app.post("/api/download/batch")
+async def download_batch(urls: str = Form(...)):
+    """Download many pages concurrently (one URL per line)"""
+    cli = get_cli_instance()
+    url_list = [require_http_url(line) for line in urls.splitlines() if line.strip() and not line.startswith("#")]
+    try:
+        responses = await cli.async_fetcher.fetch_many(url_list)
+        results = []
+        for url, response in zip(url_list, responses):
+            if response and response.content:
+                results.append({"url": url, "success": True, "status_code": response.status_code, "content_length": len(response.content)})
+            else:
+                results.append({"url": url, "success": False, "error": "Failed to download content"})
+        return {"success": True, "results": results}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
 @app.post("/api/crawl/basic")
 async def start_basic_crawl(
     background_tasks: BackgroundTasks,
     url: str = Form(...),
-    depth: int = Form(2)
+    depth: int = Form(2),
+    concurrency: int = Form(1),
+    parse_processes: int = Form(0),
+    sitemaps: bool = Form(False),
+    incremental: bool = Form(False),
+    max_pages: int | None = Form(None),
+    max_bytes: int | None = Form(None),
+    max_seconds: float | None = Form(None),
+    max_error_rate: float | None = Form(None)
 ):
     """Start basic crawling (download mode)"""
+    url = require_http_url(url)
     task_id = f"crawl_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     
-    async def run_crawl():
-        cli = get_cli_instance()
+    def run_crawl():
+        # Sync function: Starlette runs it in a worker thread instead of blocking the event loop;
+        # each task gets its own crawler so concurrent crawls do not share per-run state
+        crawler = new_crawler(get_cli_instance())
         try:
             active_tasks[task_id] = {"status": "running", "type": "basic_crawl", "url": url}
             
-            stats = cli.crawler.start_crawl(
+            stats = crawler.start_crawl(
                 start_url=url,
                 depth_limit=depth,
                 perform_osint_on_pages=False,
-                save_to_disk=True
+                save_to_disk=True,
+                concurrency=concurrency,
+                parse_processes=parse_processes,
+                seed_from_sitemaps=sitemaps,
+                incremental=incremental,
+                max_pages=max_pages,
+                max_bytes=max_bytes,
+                max_seconds=max_seconds,
+                max_error_rate=max_error_rate
             )
             
             active_tasks[task_id] = {
@@ -127,27 +188,94 @@ async def start_basic_crawl(
     background_tasks.add_task(run_crawl)
     return {"task_id": task_id, "status": "started"}
 
+@app.post("/api/crawl/multi")
+async def start_multi_crawl(
+    background_tasks: BackgroundTasks,
+    urls: str = Form(...),
+    depth: int = Form(2),
+    concurrency: int = Form(8),
+    max_pages_per_host: int | None = Form(None),
+    max_bytes: int | None = Form(None),
+    max_seconds: float | None = Form(None),
+    sitemaps: bool = Form(False)
+):
+    """Start a multi-domain crawl (download mode) from a list of seeds (one URL per line)"""
+    # Parsed as lines, never as a server-side file path
+    seeds = [require_http_url(seed) for seed in load_seeds(urls.splitlines())]
+    task_id = f"crawl_multi_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    def run_crawl():
+        crawler = new_crawler(get_cli_instance())
+        try:
+            active_tasks[task_id] = {"status": "running", "type": "multi_crawl", "url": seeds[0] if seeds else ""}
+
+            stats = crawler.crawl_many(
+                seeds,
+                depth_limit=depth,
+                perform_osint_on_pages=False,
+                save_to_disk=True,
+                concurrency=concurrency,
+                max_pages_per_host=max_pages_per_host,
+                max_bytes=max_bytes,
+                max_seconds=max_seconds,
+                seed_from_sitemaps=sitemaps
+            )
+
+            active_tasks[task_id] = {
+                "status": "completed",
+                "type": "multi_crawl",
+                "stats": stats
+            }
+        except Exception as e:
+            active_tasks[task_id] = {
+                "status": "error",
+                "type": "multi_crawl",
+                "error": str(e)
+            }
+
+    background_tasks.add_task(run_crawl)
+    return {"task_id": task_id, "status": "started"}
+
 @app.post("/api/crawl/osint")
 async def start_osint_crawl(
     background_tasks: BackgroundTasks,
     url: str = Form(...),
-    depth: int = Form(1)
+    depth: int = Form(1),
+    max_pages: int | None = Form(None)
 ):
     """Start OSINT crawling"""
+    url = require_http_url(url)
     task_id = f"osint_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     
-    async def run_osint_crawl():
-        cli = get_cli_instance()
+    def run_osint_crawl():
+        # Sync function: Starlette runs it in a worker thread instead of blocking the event loop;
+        # each task gets its own crawler so concurrent crawls do not share per-run state
+        crawler = new_crawler(get_cli_instance())
         try:
-            active_tasks[task_id] = {"status": "running", "type": "osint_crawl", "url": url}
-            
-            stats = cli.crawler.start_crawl(
+            # Live progress for /api/tasks; entities are kept without their full profiles
+            entities, technologies = [], {}
+            active_tasks[task_id] = {"status": "running", "type": "osint_crawl", "url": url, "progress": {}, "entities": entities}
+
+            stats = {}
+            for event in crawler.iter_events(
+                crawler.start_crawl,
                 start_url=url,
                 depth_limit=depth,
                 perform_osint_on_pages=True,
-                save_to_disk=False
-            )
-            
+                save_to_disk=False,
+                max_pages=max_pages
+            ):
+                if isinstance(event, StatsTick):
+                    active_tasks[task_id]["progress"] = event.stats
+                elif isinstance(event, EntityFound) and event.entity_type == "technologies":
+                    technologies[event.page_url] = event.entity
+                elif isinstance(event, EntityFound):
+                    entities.append({"page_url": event.page_url, "entity_type": event.entity_type, "entity": event.entity})
+                elif isinstance(event, CrawlFinished):
+                    stats = event.stats
+            if "osint_summary" in stats:
+                stats["osint_summary"].update(entities_profiled=entities, page_technologies=technologies)
+
             active_tasks[task_id] = {
                 "status": "completed",
                 "type": "osint_crawl",
@@ -165,6 +293,61 @@ async def start_osint_crawl(
     background_tasks.add_task(run_osint_crawl)
     return {"task_id": task_id, "status": "started"}
 
+@app.post("/api/crawl/stream")
+async def stream_crawl(
+    url: str = Form(...),
+    depth: int = Form(1),
+    osint: bool = Form(False),
+    max_pages: int | None = Form(None),
+    max_seconds: float | None = Form(None)
+):
+    """Run a crawl and stream its events as NDJSON (one JSON event per line) while it runs"""
+    url = require_http_url(url)
+    crawler = new_crawler(get_cli_instance())
+    events = crawler.aiter_events(
+        crawler.start_crawl,
+        start_url=url,
+        depth_limit=depth,
+        perform_osint_on_pages=osint,
+        save_to_disk=False,
+        max_pages=max_pages,
+        max_seconds=max_seconds
+    )
+
+    async def ndjson():
+        # The crawl stops (resumable) if the client disconnects and the stream is closed
+        async for event in events:
+            yield json.dumps(event.to_dict(), default=str) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@app.post("/api/crawl/resume/{crawl_id}")
+async def resume_crawl(background_tasks: BackgroundTasks, crawl_id: int):
+    """Resume an interrupted crawl from its last checkpoint"""
+    task_id = f"resume_{crawl_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    def run_resume():
+        crawler = new_crawler(get_cli_instance())
+        try:
+            active_tasks[task_id] = {"status": "running", "type": "resume_crawl", "crawl_id": crawl_id}
+            stats = crawler.resume_crawl(crawl_id)
+            active_tasks[task_id] = {
+                "status": "completed",
+                "type": "resume_crawl",
+                "crawl_id": crawl_id,
+                "stats": stats
+            }
+        except Exception as e:
+            active_tasks[task_id] = {
+                "status": "error",
+                "type": "resume_crawl",
+                "crawl_id": crawl_id,
+                "error": str(e)
+            }
+
+    background_tasks.add_task(run_resume)
+    return {"task_id": task_id, "status": "started"}
+
 @app.get("/api/tasks/{task_id}")
 async def get_task_status(task_id: str):
     """Get task status"""
@@ -273,36 +456,31 @@ async def analyze_username(
 @app.post("/api/analyze/page")
 async def analyze_page(url: str = Form(...)):
     """Analyze single page structure"""
+    url = require_http_url(url)
     cli = get_cli_instance()
     try:
-        response = cli.web_fetcher.fetch_full_response(url)
+        response = await cli.async_fetcher.fetch_full_response(url)
         if not response or not response.content:
             return {"success": False, "error": "Failed to fetch page"}
         
-        content = response.content.decode(response.encoding if response.encoding else 'utf-8', errors='replace')
-        parsed_data = cli.web_parser.parse(content, url)
+        # One decode and one parse tree, shared by the parser, extractors and technology detection
+        page = PageAnalysis.from_response(url, response, cli.web_parser)
+        parsed_data = page.parsed
         
         # Extract OSINT data
         osint_data = {}
         if cli.osint_extractor:
-            from scraper.utils.extractors import extract_emails, extract_phone_numbers
-            from scraper.utils.web_analysis import detect_technologies
-            from urllib.parse import urlparse
-            
-            page_emails = extract_emails(content)
-            page_phones = extract_phone_numbers(content)
-            osint_data["emails"] = list(page_emails)
-            osint_data["phone_numbers"] = list(page_phones)
+            osint_data["emails"] = list(page.emails)
+            osint_data["phone_numbers"] = list(page.phones)
             
-            domain_for_tech = urlparse(url).netloc
-            if domain_for_tech:
-                tech_data = detect_technologies(domain_for_tech, cli.osint_extractor.logger)
-                if tech_data and not tech_data.get("error"):
-                    osint_data["page_technologies"] = tech_data
+            # Technologies from the page already fetched (no second request)
+            if page.technologies:
+                osint_data["page_technologies"] = page.technologies
         
         return {
             "success": True,
             "url": url,
+            "encoding": {"name": response.encoding, "source": response.encoding_source},
             "parsed_data": parsed_data,
             "osint_data": osint_data
         }